@@ -4,6 +4,9 @@ from flask_jwt_extended import JWTManager
 from flask_pymongo import PyMongo
 import os
 
+from .indexes import ensure_indexes, indexes_cli
+from .schedule_signals import ensure_signal_collection
+
 # Initialize extensions
 mongo = PyMongo()
 jwt = JWTManager()
@@ -39,11 +42,12 @@ default_questions = [
 
 
 def initialize_database(app, mongo_instance):
-    """Seed default quiz questions if collection is empty"""
+    """Seed default quiz questions if collection is empty and apply indexes"""
     with app.app_context():
         if mongo_instance.db.quiz_questions.count_documents({}) == 0:
             mongo_instance.db.quiz_questions.insert_many(default_questions)
-            mongo_instance.db.quiz_questions.create_index("tag")
+        ensure_indexes(mongo_instance.db, app.logger)
+        ensure_signal_collection(mongo_instance.db, app.logger)
 
 
 def create_app():
@@ -54,6 +58,9 @@ def create_app():
     app.config["MONGO_URI"] = os.environ.get("MONGO_URI", "mongodb://db:27017/together")
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-key")
     app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "jwt-secret-key")
+    # "text" searches messages with the MongoDB text index, "memory" with an
+    # in-process index for databases without text search
+    app.config["MESSAGE_SEARCH"] = os.environ.get("MESSAGE_SEARCH", "text")
 
     # Initialize extensions
     mongo.init_app(app)
@@ -63,6 +70,7 @@ def create_app():
     from .routes import auth_bp, calendar_bp, messages_bp, daily_question_bp
     from .routes.settings import settings_bp
     from .routes.quiz import quiz_bp
+    from .message_store import messages_cli
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(calendar_bp, url_prefix="/api/calendar")
@@ -71,6 +79,9 @@ def create_app():
     app.register_blueprint(daily_question_bp, url_prefix="/api/daily-question")
     app.register_blueprint(quiz_bp, url_prefix="/api/quiz")
 
+    app.cli.add_command(indexes_cli)
+    app.cli.add_command(messages_cli)
+
     # Seed database
     initialize_database(app, mongo)
 
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from pymongo import ASCENDING, ReturnDocument
+
+# Jobs claimed per delivery pass; one SMTP connection serves the whole batch
+OUTBOX_BATCH_SIZE = 20
+# How long a claimed job stays with its worker before others may take it over
+CLAIM_LEASE = timedelta(minutes=5)
+# Delivery attempts before a job is given up as failed
+MAX_ATTEMPTS = 6
+RETRY_BASE_DELAY = timedelta(seconds=30)
+RETRY_MAX_DELAY = timedelta(hours=1)
+# Delivered jobs are deleted by a TTL index after this long
+SENT_RETENTION = timedelta(days=7)
+
+
+def outbox_job(subject, recipients, html_body, text_body=None, now=None):
+    """The email_outbox document for a new email, due immediately"""
+    now = now or datetime.utcnow()
+    return {
+        "subject": subject,
+        "recipients": list(recipients),
+        "html_body": html_body,
+        "text_body": text_body,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+    }
+
+
+def queue_email(db, subject, recipients, html_body, text_body=None, now=None):
+    """Write an email to the outbox for the delivery worker; returns its id"""
+    result = db.email_outbox.insert_one(
+        outbox_job(subject, recipients, html_body, text_body, now)
+    )
+    return result.inserted_id
+
+
+def queue_emails(db, emails, now=None):
+    """
+    Write several emails to the outbox with one insert_many. emails holds
+    (subject, recipients, html_body, text_body) tuples; returns their ids.
+    """
+    now = now or datetime.utcnow()
+    jobs = [outbox_job(*email, now=now) for email in emails]
+    if not jobs:
+        return []
+    return db.email_outbox.insert_many(jobs).inserted_ids
+
+
+def claim_emails(db, worker_id, limit=OUTBOX_BATCH_SIZE, now=None):
+    """
+    Claim up to limit due jobs for worker_id.
+
+    Each job is claimed with a single find_one_and_update, so two workers can
+    never claim the same job. A claimed job's next_attempt_at becomes the end
+    of its lease: if the worker dies mid-batch the job is due again once the
+    lease runs out, using the same (status, next_attempt_at) index.
+    """
+    now = now or datetime.utcnow()
+    jobs = []
+    while len(jobs) < limit:
+        job = db.email_outbox.find_one_and_update(
+            {
+                "status": {"$in": ["pending", "processing"]},
+                "next_attempt_at": {"$lte": now},
+            },
+            {
+                "$set": {
+                    "status": "processing",
+                    "locked_by": worker_id,
+                    "next_attempt_at": now + CLAIM_LEASE,
+                }
+            },
+            sort=[("next_attempt_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            break
+        jobs.append(job)
+    return jobs
+
+
+def retry_delay(attempts):
+    """Exponential backoff after the given number of failed attempts"""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def mark_sent(db, job, worker_id, now=None):
+    now = now or datetime.utcnow()
+    db.email_outbox.update_one(
+        {"_id": job["_id"], "locked_by": worker_id},
+        {
+            "$set": {
+                "status": "sent",
+                "sent_at": now,
+                "purge_at": now + SENT_RETENTION,
+            },
+            "$unset": {"locked_by": ""},
+        },
+    )
+
+
+def mark_failed(db, job, worker_id, error, now=None):
+    """Schedule a retry with backoff, or give the job up after MAX_ATTEMPTS"""
+    now = now or datetime.utcnow()
+    attempts = job.get("attempts", 0) + 1
+    update = {"attempts": attempts, "last_error": str(error)}
+    if attempts >= MAX_ATTEMPTS:
+        update["status"] = "failed"
+        update["failed_at"] = now
+    else:
+        update["status"] = "pending"
+        update["next_attempt_at"] = now + retry_delay(attempts)
+    db.email_outbox.update_one(
+        {"_id": job["_id"], "locked_by": worker_id},
+        {"$set": update, "$unset": {"locked_by": ""}},
+    )
+
+
+def outbox_message(job):
+    """flask_mail Message for an outbox job"""
+    msg = Message(job["subject"], recipients=job["recipients"])
+    msg.html = job["html_body"]
+    if job.get("text_body"):
+        msg.body = job["text_body"]
+    return msg
+
+
+def deliver_batch(db, jobs, send, worker_id):
+    """
+    Pass each claimed job to send(message), recording the outcome.
+    Returns (sent, failed) counts.
+    """
+    sent = failed = 0
+    for job in jobs:
+        try:
+            send(outbox_message(job))
+        except Exception as e:
+            mark_failed(db, job, worker_id, e)
+            failed += 1
+        else:
+            mark_sent(db, job, worker_id)
+            sent += 1
+    return sent, failed
@@ -1,6 +1,7 @@
-from flask import current_app, render_template_string
-from flask_mail import Mail, Message
-from threading import Thread
+from flask import render_template_string
+from flask_mail import Mail
+
+from .email_outbox import queue_email, queue_emails
 
 mail = Mail()
 
@@ -18,29 +19,41 @@ def init_mail(app):
     mail.init_app(app)
 
 
-def send_async_email(app, msg):
-    """Send email asynchronously"""
-    with app.app_context():
-        try:
-            mail.send(msg)
-        except Exception as e:
-            print(f"Error sending email: {e}")
+def send_email(subject, recipients, html_body, text_body=None, db=None):
+    """
+    Queue an email in the outbox; workers/email_worker.py delivers it.
+    Pass db when calling outside of a request, e.g. from a worker.
+    """
+    if db is None:
+        from . import mongo
 
+        db = mongo.db
+    queue_email(db, subject, recipients, html_body, text_body)
 
-def send_email(subject, recipients, html_body, text_body=None):
-    """Send an email"""
-    app = current_app._get_current_object()
-    msg = Message(subject, recipients=recipients)
-    msg.html = html_body
-    if text_body:
-        msg.body = text_body
 
-    # Send email in a background thread to not block the main thread
-    Thread(target=send_async_email, args=(app, msg)).start()
+def send_partner_message(recipient_email, sender_name, message_content, db=None):
+    """Send a notification email when a partner sends a message"""
+    send_email(
+        *partner_message_email(recipient_email, sender_name, message_content), db=db
+    )
 
 
-def send_partner_message(recipient_email, sender_name, message_content):
-    """Send a notification email when a partner sends a message"""
+def send_partner_messages(notifications, db=None):
+    """
+    Queue several partner message emails with one outbox write;
+    notifications holds (recipient_email, sender_name, message_content)
+    """
+    if db is None:
+        from . import mongo
+
+        db = mongo.db
+    queue_emails(
+        db, [partner_message_email(*notification) for notification in notifications]
+    )
+
+
+def partner_message_email(recipient_email, sender_name, message_content):
+    """(subject, recipients, html_body, text_body) of a partner message email"""
     subject = f"New message from {sender_name}"
     html_body = f"""
     <html>
@@ -58,10 +71,10 @@ def send_partner_message(recipient_email, sender_name, message_content):
     
     Login to Together to reply: http://together-app.com
     """
-    send_email(subject, [recipient_email], html_body, text_body)
+    return subject, [recipient_email], html_body, text_body
 
 
-def send_invitation_email(recipient_email, sender_name):
+def send_invitation_email(recipient_email, sender_name, db=None):
     """Send an invitation email to a partner"""
     subject = f"{sender_name} has invited you to join Together"
     html_body = f"""
@@ -80,4 +93,4 @@ def send_invitation_email(recipient_email, sender_name):
     
     Create your account here: http://together-app.com/register
     """
-    send_email(subject, [recipient_email], html_body, text_body)
+    send_email(subject, [recipient_email], html_body, text_body, db=db)
@@ -0,0 +1,294 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import PyMongoError
+
+# Indexes the API and the message worker rely on, keyed by collection.
+# Each entry is (keys, options) exactly as passed to create_index, and the
+# default generated names are kept so db-container/init-mongo.js and this
+# module describe the same index rather than two conflicting ones.
+INDEXES = {
+    "users": [
+        ([("email", ASCENDING)], {"unique": True}),
+    ],
+    "events": [
+        # Own and partner events, ordered by start time
+        ([("user_id", ASCENDING), ("start_time", ASCENDING)], {}),
+    ],
+    "messages": [
+        # A user's messages, newest first, as one range scan
+        (
+            [
+                ("participants", ASCENDING),
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            {},
+        ),
+        # Message search within one conversation. No language, so words are
+        # matched as written, the same way the in-process search index does
+        (
+            [("conversation", ASCENDING), ("content", TEXT)],
+            {"default_language": "none"},
+        ),
+        # At most one message per scheduled message, whichever worker sends it
+        (
+            [("scheduled_from", ASCENDING)],
+            {
+                "unique": True,
+                "partialFilterExpression": {"scheduled_from": {"$exists": True}},
+            },
+        ),
+        # Unread messages of a receiver, for mark-read and counter rebuilds
+        (
+            [("receiver_id", ASCENDING), ("created_at", ASCENDING)],
+            {"partialFilterExpression": {"is_read": False}},
+        ),
+    ],
+    "message_buckets": [
+        # A user's archived messages, nearest bucket first in either direction
+        ([("participants", ASCENDING), ("end", DESCENDING)], {}),
+        ([("participants", ASCENDING), ("start", ASCENDING)], {}),
+        # Buckets of a conversation and month, when archiving into them
+        ([("conversation", ASCENDING), ("month", ASCENDING)], {}),
+        # Buckets of a conversation holding a search match
+        (
+            [("conversation", ASCENDING), ("messages.content", TEXT)],
+            {"default_language": "none"},
+        ),
+    ],
+    "scheduled_messages": [
+        # Worker scan of the due backlog, in due order with a resume token.
+        # Only pending messages, so delivered and cancelled ones cost nothing
+        (
+            [
+                ("status", ASCENDING),
+                ("scheduled_time", ASCENDING),
+                ("_id", ASCENDING),
+            ],
+            {"partialFilterExpression": {"status": "pending"}},
+        ),
+        # Failed messages due for another attempt
+        (
+            [("status", ASCENDING), ("next_attempt_at", ASCENDING)],
+            {"partialFilterExpression": {"status": "retrying"}},
+        ),
+        # Reclaiming messages whose worker lease expired
+        (
+            [("status", ASCENDING), ("lease_expires_at", ASCENDING)],
+            {"partialFilterExpression": {"status": "processing"}},
+        ),
+        # A user's pending messages
+        (
+            [
+                ("sender_id", ASCENDING),
+                ("status", ASCENDING),
+                ("scheduled_time", ASCENDING),
+            ],
+            {},
+        ),
+    ],
+    "email_outbox": [
+        # Delivery worker claim of due jobs, including expired leases
+        ([("status", ASCENDING), ("next_attempt_at", ASCENDING)], {}),
+        # Deletes delivered emails once their retention has passed
+        ([("purge_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "daily_questions": [
+        ([("date", ASCENDING)], {"unique": True}),
+    ],
+    "quiz_questions": [
+        ([("tag", ASCENDING)], {}),
+    ],
+    "quiz_batches": [
+        # Active batch lookup for a pair
+        (
+            [
+                ("user1_id", ASCENDING),
+                ("user2_id", ASCENDING),
+                ("completed", ASCENDING),
+                ("expires_at", ASCENDING),
+            ],
+            {},
+        ),
+        # Expiry sweep over open batches
+        (
+            [("expires_at", ASCENDING)],
+            {"partialFilterExpression": {"completed": False}},
+        ),
+        # Deletes completed and expired batches once their retention has passed
+        ([("purge_at", ASCENDING)], {"expireAfterSeconds": 0}),
+        # Latest batch of a pair
+        (
+            [
+                ("user1_id", ASCENDING),
+                ("user2_id", ASCENDING),
+                ("created_at", DESCENDING),
+            ],
+            {},
+        ),
+    ],
+    "quiz_responses": [
+        # Answers within a batch, per user
+        (
+            [
+                ("batch_id", ASCENDING),
+                ("user_id", ASCENDING),
+                ("question_id", ASCENDING),
+            ],
+            {},
+        ),
+        # A user's answer history, used to rebuild pair stats
+        ([("user_id", ASCENDING), ("question_id", ASCENDING)], {}),
+    ],
+    "quiz_scores": [
+        ([("user1_id", ASCENDING), ("user2_id", ASCENDING)], {"unique": True}),
+    ],
+}
+
+
+# Indexes replaced by a declared one, dropped by ensure_indexes. Keyed by
+# collection, by index name.
+RETIRED_INDEXES = {
+    # Superseded by the partial index of pending messages
+    "scheduled_messages": ["status_1_scheduled_time_1"],
+}
+
+
+def index_key(keys):
+    """
+    Comparable form of an index key. The shell stores directions as doubles,
+    and the server reports the text fields of a text index as _fts/_ftsx.
+    """
+    key = []
+    for field, direction in keys:
+        if field == "_ftsx":
+            continue
+        if direction == TEXT:
+            if ("_fts", TEXT) not in key:
+                key += [("_fts", TEXT), ("_ftsx", 1)]
+            continue
+        key.append(
+            (field, int(direction) if isinstance(direction, float) else direction)
+        )
+    return tuple(key)
+
+
+def existing_indexes(collection):
+    """Map index key to index name for every index on a collection"""
+    return {
+        index_key(info["key"]): name
+        for name, info in collection.index_information().items()
+    }
+
+
+def ensure_indexes(db, logger=None):
+    """
+    Create every declared index that does not exist yet.
+
+    Safe to run repeatedly. An index that cannot be built (for example a
+    unique index over existing duplicates) is logged and skipped so the
+    remaining indexes are still applied. Retired indexes are dropped first.
+    Returns the (collection, index name) pairs that were created.
+    """
+    for collection_name, names in RETIRED_INDEXES.items():
+        collection = db[collection_name]
+        for name in names:
+            if name not in collection.index_information():
+                continue
+            try:
+                collection.drop_index(name)
+            except PyMongoError as e:
+                if logger:
+                    logger.error(
+                        "Could not drop index %s on %s: %s", name, collection_name, e
+                    )
+                continue
+            if logger:
+                logger.info("Dropped retired index %s on %s", name, collection_name)
+
+    created = []
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = existing_indexes(collection)
+        for keys, options in indexes:
+            if index_key(keys) in existing:
+                continue
+            try:
+                name = collection.create_index(keys, **options)
+            except PyMongoError as e:
+                if logger:
+                    logger.error(
+                        "Could not create index %s on %s: %s", keys, collection_name, e
+                    )
+                continue
+            created.append((collection_name, name))
+            if logger:
+                logger.info("Created index %s on %s", name, collection_name)
+    return created
+
+
+def index_report(db):
+    """
+    Compare the declared indexes with the database.
+
+    Returns a dict with:
+      missing:    (collection, keys) declared but not present
+      undeclared: (collection, name) present but not declared here
+      unused:     (collection, name, since) with no recorded use since the
+                  server last reset its index statistics
+    """
+    report = {"missing": [], "undeclared": [], "unused": []}
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = existing_indexes(collection)
+        declared = {index_key(keys) for keys, _ in indexes}
+
+        for keys, _ in indexes:
+            if index_key(keys) not in existing:
+                report["missing"].append((collection_name, keys))
+
+        for key, name in existing.items():
+            if name != "_id_" and key not in declared:
+                report["undeclared"].append((collection_name, name))
+
+        try:
+            stats = list(collection.aggregate([{"$indexStats": {}}]))
+        except (PyMongoError, NotImplementedError):
+            # $indexStats needs server support and the right privileges
+            continue
+        for stat in stats:
+            if stat["name"] != "_id_" and not stat["accesses"]["ops"]:
+                report["unused"].append(
+                    (collection_name, stat["name"], stat["accesses"].get("since"))
+                )
+    return report
+
+
+indexes_cli = AppGroup("indexes", help="Manage MongoDB indexes.")
+
+
+@indexes_cli.command("ensure")
+def ensure_indexes_command():
+    """Create any missing indexes."""
+    from . import mongo
+
+    created = ensure_indexes(mongo.db, current_app.logger)
+    click.echo(f"Created {len(created)} index(es)")
+
+
+@indexes_cli.command("report")
+def index_report_command():
+    """List missing, undeclared and unused indexes."""
+    from . import mongo
+
+    report = index_report(mongo.db)
+    for collection_name, keys in report["missing"]:
+        click.echo(f"missing     {collection_name} {keys}")
+    for collection_name, name in report["undeclared"]:
+        click.echo(f"undeclared  {collection_name} {name}")
+    for collection_name, name, since in report["unused"]:
+        click.echo(f"unused      {collection_name} {name} (since {since})")
+    if not any(report.values()):
+        click.echo("All declared indexes are present and in use")
@@ -0,0 +1,187 @@
+import heapq
+import re
+import threading
+from collections import defaultdict
+
+from flask import current_app
+from pymongo import ASCENDING, DESCENDING
+
+from . import mongo
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+# Deepest result offset served; relevance ranking is not meant for paging
+# through a whole history
+MAX_SEARCH_OFFSET = 1000
+# Words of a query beyond this are ignored
+MAX_SEARCH_TERMS = 10
+
+WORD = re.compile(r"\w+")
+
+
+def search_terms(query):
+    """Distinct lowercase words of a query, in order"""
+    terms = []
+    for word in WORD.findall(query.lower()):
+        if word not in terms:
+            terms.append(word)
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def term_count(content, terms):
+    """How many words of content match a term"""
+    wanted = set(terms)
+    return sum(1 for word in WORD.findall((content or "").lower()) if word in wanted)
+
+
+def archived_matches(db, conversation, terms):
+    """
+    Archived messages of a conversation matching any of terms, ranked like
+    the in-process index: by how often the terms occur, then newest first.
+
+    The bucket text index narrows the read to buckets holding a match; the
+    messages within them are then matched here.
+    """
+    matches = []
+    for bucket in db.message_buckets.find(
+        {"conversation": conversation, "$text": {"$search": " ".join(terms)}},
+        {"messages": 1},
+    ):
+        for message in bucket["messages"]:
+            count = term_count(message.get("content"), terms)
+            if count:
+                matches.append((count, dict(message, conversation=conversation)))
+    matches.sort(key=lambda match: (match[0], match[1]["created_at"]), reverse=True)
+    return [message for _, message in matches]
+
+
+def highlights(content, terms):
+    """[start, end) offsets of every word of content that matches a term"""
+    wanted = set(terms)
+    return [
+        [match.start(), match.end()]
+        for match in WORD.finditer(content or "")
+        if match.group().lower() in wanted
+    ]
+
+
+class TextIndexSearch:
+    """Search through the MongoDB text index on (conversation, content)"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def search(self, conversation, terms, offset=0, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Messages of a conversation matching any of terms, best match first and
+        newest first among equal scores. Returns (messages, has_more).
+
+        Archived matches follow every live one: text scores from two
+        collections are not comparable, and archived messages are the older
+        ones anyway. The buckets are only read once the live matches run out.
+        """
+        query = {"conversation": conversation, "$text": {"$search": " ".join(terms)}}
+        messages = list(
+            self.db.messages.find(query, {"score": {"$meta": "textScore"}})
+            .sort([("score", {"$meta": "textScore"}), ("created_at", DESCENDING)])
+            .skip(offset)
+            .limit(limit + 1)
+        )
+        if len(messages) > limit:
+            return messages[:limit], True
+
+        if messages or not offset:
+            live = offset + len(messages)
+        else:
+            live = self.db.messages.count_documents(query)
+        start = max(0, offset - live)
+        archived = archived_matches(self.db, conversation, terms)
+        messages += archived[start : start + limit + 1 - len(messages)]
+        return messages[:limit], len(messages) > limit
+
+
+class InvertedIndexSearch:
+    """
+    In-process inverted index with the same interface as TextIndexSearch, for
+    databases without text search such as mongomock.
+
+    Each conversation keeps its messages in insertion order with a postings
+    list per word of (position, occurrences). The first search indexes the
+    archived buckets, oldest first, and messages written since the last
+    search are pulled in by _id before every search; _id order is insert
+    order for a single writer, so this is a stand-in for development and
+    benchmarks rather than for several writing processes. Messages archived
+    after they were indexed stay in the index.
+    """
+
+    def __init__(self, db=None):
+        self.db = db
+        self._conversations = defaultdict(lambda: ([], defaultdict(list)))
+        self._last_id = None
+        self._lock = threading.Lock()
+
+    def add(self, message):
+        """Index one message; it must carry a conversation key"""
+        messages, postings = self._conversations[message["conversation"]]
+        position = len(messages)
+        messages.append(message)
+        counts = defaultdict(int)
+        for word in WORD.findall((message.get("content") or "").lower()):
+            counts[word] += 1
+        for word, count in counts.items():
+            postings[word].append((position, count))
+
+    def refresh(self):
+        """Index the messages written since the last refresh"""
+        if self.db is None:
+            return
+        query = {"conversation": {"$exists": True}}
+        if self._last_id is not None:
+            query["_id"] = {"$gt": self._last_id}
+        elif not self._conversations:
+            buckets = self.db.message_buckets.find().sort(
+                [("conversation", ASCENDING), ("start", ASCENDING)]
+            )
+            for bucket in buckets:
+                for message in bucket["messages"]:
+                    self.add(dict(message, conversation=bucket["conversation"]))
+        for message in self.db.messages.find(query).sort("_id", ASCENDING):
+            self.add(message)
+            self._last_id = message["_id"]
+
+    def search(self, conversation, terms, offset=0, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Messages of a conversation matching any of terms, ranked by how often
+        the terms occur and newest first among equal scores.
+        Returns (messages, has_more).
+        """
+        with self._lock:
+            self.refresh()
+            if conversation not in self._conversations:
+                return [], False
+            messages, postings = self._conversations[conversation]
+            scores = defaultdict(int)
+            for term in terms:
+                for position, count in postings.get(term, ()):
+                    scores[position] += count
+            # Later positions are newer messages
+            ranked = heapq.nlargest(
+                offset + limit + 1, scores.items(), key=lambda item: (item[1], item[0])
+            )
+            page = [messages[position] for position, _ in ranked[offset:]]
+        return page[:limit], len(page) > limit
+
+
+def message_search():
+    """
+    The configured search backend: the text index, or the in-process index
+    when MESSAGE_SEARCH is "memory". The in-process index lives on the app.
+    """
+    if current_app.config.get("MESSAGE_SEARCH") != "memory":
+        return TextIndexSearch(mongo.db)
+    backend = current_app.extensions.get("message_search")
+    if backend is None:
+        backend = current_app.extensions["message_search"] = InvertedIndexSearch(
+            mongo.db
+        )
+    return backend
@@ -0,0 +1,406 @@
+import base64
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import click
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from flask.cli import AppGroup
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from . import mongo
+from .change_versions import MESSAGES, bump_versions
+
+# Page size for message listings when the client does not ask for one
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Read messages older than this are moved into monthly buckets by
+# flask messages archive
+DEFAULT_ARCHIVE_AGE_DAYS = 180
+# Messages per bucket document; a busy month spills into further buckets
+MAX_BUCKET_MESSAGES = 1000
+# Fields kept for each archived message
+ARCHIVED_FIELDS = (
+    "_id",
+    "content",
+    "sender_id",
+    "receiver_id",
+    "created_at",
+    "is_read",
+    "scheduled_from",
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def participants_key(sender_id, receiver_id):
+    """
+    Value of a message's participants field. Indexed together with created_at
+    so a user's messages are one index-ordered range scan.
+    """
+    return sorted([str(sender_id), str(receiver_id)])
+
+
+def conversation_key(sender_id, receiver_id):
+    """
+    Value of a message's conversation field: the participants as one string.
+    The text index needs a scalar prefix, which the participants array is not.
+    """
+    return "|".join(participants_key(sender_id, receiver_id))
+
+
+def backfill_participants(db, batch_size=1000):
+    """
+    Add the participants and conversation fields to messages written before
+    they existed.
+
+    Works through the collection in batches of bulk updates so a large
+    history does not become one long-running write; an interrupted run simply
+    picks up the remaining messages next time. Returns the number updated.
+    """
+    updated = 0
+    while True:
+        batch = list(
+            db.messages.find(
+                {
+                    "$or": [
+                        {"participants": {"$exists": False}},
+                        {"conversation": {"$exists": False}},
+                    ]
+                },
+                {"sender_id": 1, "receiver_id": 1},
+            ).limit(batch_size)
+        )
+        if not batch:
+            return updated
+        result = db.messages.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": message["_id"]},
+                    {
+                        "$set": {
+                            "participants": participants_key(
+                                message.get("sender_id"), message.get("receiver_id")
+                            ),
+                            "conversation": conversation_key(
+                                message.get("sender_id"), message.get("receiver_id")
+                            ),
+                        }
+                    },
+                )
+                for message in batch
+            ],
+            ordered=False,
+        )
+        updated += result.modified_count
+
+
+def bump_unread(db, user_id, count=1):
+    """Add count newly delivered messages to a user's unread counter"""
+    db.users.update_one(
+        {"_id": ObjectId(user_id)}, {"$inc": {"unread_messages": count}}
+    )
+
+
+def bump_unread_counts(db, counts):
+    """
+    bump_unread for several users at once; counts maps user id to count.
+    IDs that are not ObjectIds are skipped.
+    """
+    updates = [
+        UpdateOne({"_id": ObjectId(user_id)}, {"$inc": {"unread_messages": n}})
+        for user_id, n in counts.items()
+        if ObjectId.is_valid(user_id)
+    ]
+    if updates:
+        db.users.bulk_write(updates, ordered=False)
+
+
+def rebuild_unread_counts(db):
+    """
+    Recompute every user's unread counter from the is_read flags.
+
+    Messages delivered while this runs can be counted twice or not at all,
+    so run it while the app is quiet. Returns the number of users with
+    unread messages.
+    """
+    db.users.update_many({}, {"$set": {"unread_messages": 0}})
+    counts = db.messages.aggregate(
+        [
+            {"$match": {"is_read": False}},
+            {"$group": {"_id": "$receiver_id", "count": {"$sum": 1}}},
+        ]
+    )
+    users = 0
+    for row in counts:
+        try:
+            user_id = ObjectId(row["_id"])
+        except (InvalidId, TypeError):
+            continue
+        db.users.update_one(
+            {"_id": user_id}, {"$set": {"unread_messages": row["count"]}}
+        )
+        users += 1
+    return users
+
+
+def month_start(when):
+    return when.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def archive_messages(db, older_than, now=None, batch_size=1000):
+    """
+    Move read messages created more than older_than ago into bucket
+    documents, one or more per conversation and calendar month.
+
+    Each bucket holds up to MAX_BUCKET_MESSAGES messages with the start and
+    end of the time range they cover. Messages are copied before they are
+    deleted and a copy is skipped when the bucket already holds it, so an
+    interrupted run can simply be repeated. Unread messages stay in
+    messages, where mark-read updates them. Returns the number archived.
+    """
+    cutoff = (now or datetime.utcnow()) - older_than
+    archived = 0
+    while True:
+        batch = list(
+            db.messages.find({"created_at": {"$lt": cutoff}, "is_read": True}).limit(
+                batch_size
+            )
+        )
+        if not batch:
+            return archived
+
+        groups = defaultdict(list)
+        for message in batch:
+            key = message.get("conversation") or conversation_key(
+                message.get("sender_id"), message.get("receiver_id")
+            )
+            groups[(key, month_start(message["created_at"]))].append(message)
+
+        for (key, month), messages in groups.items():
+            present = {
+                archived_message["_id"]
+                for bucket in db.message_buckets.find(
+                    {"conversation": key, "month": month}, {"messages._id": 1}
+                )
+                for archived_message in bucket["messages"]
+            }
+            new = sorted(
+                (
+                    {field: m[field] for field in ARCHIVED_FIELDS if field in m}
+                    for m in messages
+                    if m["_id"] not in present
+                ),
+                key=lambda m: (m["created_at"], m["_id"]),
+            )
+            for i in range(0, len(new), MAX_BUCKET_MESSAGES // 4):
+                add_to_bucket(db, key, month, new[i : i + MAX_BUCKET_MESSAGES // 4])
+
+        db.messages.delete_many({"_id": {"$in": [m["_id"] for m in batch]}})
+        archived += len(batch)
+
+
+def add_to_bucket(db, conversation, month, messages):
+    """Append messages to a bucket of the month with room, creating one if needed"""
+    db.message_buckets.update_one(
+        {
+            "conversation": conversation,
+            "month": month,
+            "count": {"$lte": MAX_BUCKET_MESSAGES - len(messages)},
+        },
+        {
+            "$setOnInsert": {"participants": conversation.split("|")},
+            "$push": {
+                "messages": {"$each": messages, "$sort": {"created_at": 1, "_id": 1}}
+            },
+            "$inc": {"count": len(messages)},
+            "$min": {"start": messages[0]["created_at"]},
+            "$max": {"end": messages[-1]["created_at"]},
+        },
+        upsert=True,
+    )
+
+
+messages_cli = AppGroup("messages", help="Message maintenance.")
+
+
+@messages_cli.command("backfill-participants")
+def backfill_participants_command():
+    """Add the participants and conversation keys to existing messages."""
+    count = backfill_participants(mongo.db)
+    click.echo(f"Added participants to {count} message(s)")
+
+
+@messages_cli.command("rebuild-unread")
+def rebuild_unread_command():
+    """Recompute unread message counters from the messages collection."""
+    users = rebuild_unread_counts(mongo.db)
+    click.echo(f"Rebuilt unread counters; {users} user(s) have unread messages")
+
+
+@messages_cli.command("archive")
+@click.option(
+    "--older-than-days",
+    type=int,
+    default=DEFAULT_ARCHIVE_AGE_DAYS,
+    show_default=True,
+    help="Archive read messages older than this.",
+)
+def archive_messages_command(older_than_days):
+    """Move old read messages into monthly bucket documents."""
+    count = archive_messages(mongo.db, timedelta(days=older_than_days))
+    click.echo(f"Archived {count} message(s)")
+
+
+def encode_cursor(message):
+    """Opaque keyset cursor for a message: its created_at and _id"""
+    raw = f"{message['created_at'].isoformat()}|{message['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (created_at, ObjectId) from a cursor, or raise InvalidCursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, message_id = (
+            base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(created_at), ObjectId(message_id)
+    except (ValueError, TypeError, InvalidId) as e:
+        raise InvalidCursor(str(cursor)) from e
+
+
+def keyset_filter(cursor, op, inclusive=False):
+    """
+    Messages before ($lt) or after ($gt) the cursor position, including the
+    cursor's own message when inclusive.
+    """
+    created_at, message_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {op: created_at}},
+            {
+                "created_at": created_at,
+                "_id": {op + "e" if inclusive else op: message_id},
+            },
+        ]
+    }
+
+
+def page_messages(user_id, before=None, after=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of a user's messages, newest first.
+
+    With before, returns the messages older than that cursor; with after, the
+    messages newer than it (the page closest to the cursor). Returns
+    (messages, has_more) where has_more says whether further messages exist
+    in the direction being paged.
+    """
+    query = {"participants": user_id}
+    direction = DESCENDING
+    if before:
+        query = {"$and": [query, keyset_filter(before, "$lt")]}
+    elif after:
+        query = {"$and": [query, keyset_filter(after, "$gt")]}
+        direction = ASCENDING
+
+    messages = list(
+        mongo.db.messages.find(query)
+        .sort([("created_at", direction), ("_id", direction)])
+        .limit(limit + 1)
+    )
+    messages = merge_archived(messages, user_id, before or after, direction, limit + 1)
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if direction == ASCENDING:
+        messages.reverse()
+    return messages, has_more
+
+
+def message_key(message):
+    return message["created_at"], message["_id"]
+
+
+def merge_archived(messages, user_id, cursor, direction, count):
+    """
+    Merge archived messages into one direction of a page of messages.
+
+    Only bucket headers (start and end) are queried, nearest first: by end
+    time going back and by start time going forward. When the hot messages
+    already fill the page the query only matches buckets reaching past its
+    last message, so a full page costs one empty indexed query. A bucket's
+    messages are loaded only while it can still hold something nearer than
+    the count-th message collected.
+    """
+    newest_first = direction == DESCENDING
+    query = {"participants": user_id}
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        if newest_first:
+            query["start"] = {"$lte": position[0]}
+        else:
+            query["end"] = {"$gte": position[0]}
+    if len(messages) >= count:
+        messages.sort(key=message_key, reverse=newest_first)
+        boundary = messages[count - 1]["created_at"]
+        if newest_first:
+            query["end"] = {"$gte": boundary}
+        else:
+            query["start"] = {"$lte": boundary}
+
+    headers = mongo.db.message_buckets.find(query, {"start": 1, "end": 1}).sort(
+        "end" if newest_first else "start", direction
+    )
+    for header in headers:
+        if len(messages) >= count:
+            messages.sort(key=message_key, reverse=newest_first)
+            boundary = messages[count - 1]["created_at"]
+            if newest_first and header["end"] < boundary:
+                break
+            if not newest_first and header["start"] > boundary:
+                break
+        bucket = mongo.db.message_buckets.find_one(
+            {"_id": header["_id"]}, {"messages": 1}
+        )
+        for message in (bucket or {}).get("messages", []):
+            if position is None:
+                messages.append(message)
+            elif newest_first and message_key(message) < position:
+                messages.append(message)
+            elif not newest_first and message_key(message) > position:
+                messages.append(message)
+
+    messages.sort(key=message_key, reverse=newest_first)
+    return messages[:count]
+
+
+def unread_count(user_id):
+    """A user's unread counter, read from their user document"""
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"unread_messages": 1})
+    return max(0, (user or {}).get("unread_messages", 0))
+
+
+def mark_read(user_id, up_to):
+    """
+    Mark every message the user received up to and including the cursor
+    position as read, and take them off the unread counter. Returns the
+    number of messages marked.
+    """
+    result = mongo.db.messages.update_many(
+        {
+            "$and": [
+                {"receiver_id": user_id, "is_read": False},
+                keyset_filter(up_to, "$lt", inclusive=True),
+            ]
+        },
+        {"$set": {"is_read": True}},
+    )
+    # Only messages that were still unread are modified, so concurrent calls
+    # never take the same message off the counter twice
+    if result.modified_count:
+        bump_unread(mongo.db, user_id, -result.modified_count)
+        bump_versions(mongo.db, [user_id], MESSAGES)
+    return result.modified_count
@@ -0,0 +1,64 @@
+import threading
+from contextlib import contextmanager
+
+
+class AnswerNotifier:
+    """
+    Wakes up long-poll requests that are waiting for a partner's quiz answer.
+
+    Waiters are keyed by (pair, question_id). Notifications only reach waiters
+    in the same API process, so waiters should still re-check the database on
+    a slow interval to pick up answers handled by another process.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._waiters = {}
+        self._versions = {}
+
+    @contextmanager
+    def listen(self, key):
+        """Register interest in a key for the duration of the block"""
+        with self._cond:
+            self._waiters[key] = self._waiters.get(key, 0) + 1
+            seen = self._versions.get(key, 0)
+
+        listener = _Listener(self, key, seen)
+        try:
+            yield listener
+        finally:
+            with self._cond:
+                self._waiters[key] -= 1
+                if not self._waiters[key]:
+                    del self._waiters[key]
+                    self._versions.pop(key, None)
+
+    def notify(self, key):
+        """Wake every waiter registered for the key"""
+        with self._cond:
+            # Nobody is listening, so there is nothing to remember
+            if key not in self._waiters:
+                return
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._cond.notify_all()
+
+
+class _Listener:
+    def __init__(self, notifier, key, seen):
+        self._notifier = notifier
+        self._key = key
+        self._seen = seen
+
+    def wait(self, timeout):
+        """Block until notified or timeout; returns True if notified"""
+        notifier = self._notifier
+        with notifier._cond:
+            notified = notifier._cond.wait_for(
+                lambda: notifier._versions.get(self._key, 0) != self._seen, timeout
+            )
+            self._seen = notifier._versions.get(self._key, 0)
+        return notified
+
+
+# Shared by all quiz requests handled by this process
+answer_notifier = AnswerNotifier()
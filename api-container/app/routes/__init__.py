@@ -7,7 +7,36 @@ import random
 import pytz
 
 from .. import mongo
+from ..change_versions import (
+    EVENTS,
+    MESSAGES,
+    PARTNER,
+    bump_versions,
+    conditional_get,
+    version_inc,
+)
 from ..email_utils import send_invitation_email, send_partner_message
+from ..message_search import (
+    DEFAULT_SEARCH_LIMIT,
+    MAX_SEARCH_LIMIT,
+    MAX_SEARCH_OFFSET,
+    highlights,
+    message_search,
+    search_terms,
+)
+from ..message_store import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    InvalidCursor,
+    bump_unread,
+    encode_cursor,
+    mark_read,
+    page_messages,
+    conversation_key,
+    participants_key,
+    unread_count,
+)
+from ..schedule_signals import signal_scheduled
 
 auth_bp = Blueprint("auth", __name__)
 calendar_bp = Blueprint("calendar", __name__)
@@ -60,13 +89,25 @@ def create_user(name, email, password, partner_email=None):
             # Update the new user with partner's ID and status
             mongo.db.users.update_one(
                 {"_id": ObjectId(user_id)},
-                {"$set": {"partner_id": partner_id, "partner_status": "pending_sent"}},
+                {
+                    "$set": {
+                        "partner_id": partner_id,
+                        "partner_status": "pending_sent",
+                    },
+                    "$inc": version_inc(PARTNER),
+                },
             )
 
             # Update the partner with the new user's ID and status
             mongo.db.users.update_one(
                 {"_id": ObjectId(partner_id)},
-                {"$set": {"partner_id": user_id, "partner_status": "pending_received"}},
+                {
+                    "$set": {
+                        "partner_id": user_id,
+                        "partner_status": "pending_received",
+                    },
+                    "$inc": version_inc(PARTNER),
+                },
             )
 
     return user
@@ -140,6 +181,7 @@ def update_email_notifications():
 # Calendar routes
 @calendar_bp.route("/events", methods=["GET"])
 @jwt_required()
+@conditional_get(EVENTS, PARTNER)
 def get_events():
     current_user_id = get_jwt_identity()
 
@@ -203,25 +245,149 @@ def create_event():
     result = mongo.db.events.insert_one(event)
     event["_id"] = str(result.inserted_id)
 
+    # The event also appears in the partner's calendar
+    user = mongo.db.users.find_one_and_update(
+        {"_id": ObjectId(current_user_id)},
+        {"$inc": version_inc(EVENTS)},
+        projection={"partner_id": 1},
+    )
+    if user and user.get("partner_id"):
+        bump_versions(mongo.db, [user["partner_id"]], EVENTS)
+
     return jsonify({"message": "Event created successfully", "event": event}), 201
 
 
 # Messages routes
 @messages_bp.route("/messages", methods=["GET"])
 @jwt_required()
+@conditional_get(MESSAGES)
 def get_messages():
     current_user_id = get_jwt_identity()
 
-    messages = list(
-        mongo.db.messages.find(
-            {"$or": [{"sender_id": current_user_id}, {"receiver_id": current_user_id}]}
-        ).sort("created_at", -1)
-    )
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"message": "limit must be an integer"}), 400
+    if limit < 1:
+        return jsonify({"message": "limit must be positive"}), 400
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    # Keyset pagination: "before" pages to older messages, "after" to newer
+    try:
+        messages, has_more = page_messages(
+            current_user_id,
+            before=request.args.get("before"),
+            after=request.args.get("after"),
+            limit=limit,
+        )
+    except InvalidCursor:
+        return jsonify({"message": "Invalid cursor"}), 400
+
+    next_cursor = encode_cursor(messages[-1]) if messages else None
+    prev_cursor = encode_cursor(messages[0]) if messages else None
 
     for message in messages:
         message["_id"] = str(message["_id"])
 
-    return jsonify({"messages": messages}), 200
+    return (
+        jsonify(
+            {
+                "messages": messages,
+                "has_more": has_more,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        ),
+        200,
+    )
+
+
+@messages_bp.route("/search", methods=["GET"])
+@jwt_required()
+@conditional_get(MESSAGES)
+def search_messages():
+    current_user_id = get_jwt_identity()
+
+    terms = search_terms(request.args.get("q", ""))
+    if not terms:
+        return jsonify({"message": "q is required"}), 400
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_SEARCH_LIMIT))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"message": "limit and offset must be integers"}), 400
+    if limit < 1:
+        return jsonify({"message": "limit must be positive"}), 400
+    if not 0 <= offset <= MAX_SEARCH_OFFSET:
+        return (
+            jsonify({"message": f"offset must be between 0 and {MAX_SEARCH_OFFSET}"}),
+            400,
+        )
+    limit = min(limit, MAX_SEARCH_LIMIT)
+
+    # Search the conversation with the partner unless another user is named
+    other_id = request.args.get("with")
+    if not other_id:
+        current_user = get_user_by_id(current_user_id)
+        other_id = current_user.get("partner_id") if current_user else None
+    if not other_id:
+        return jsonify({"message": "No conversation to search"}), 400
+
+    messages, has_more = message_search().search(
+        conversation_key(current_user_id, other_id), terms, offset, limit
+    )
+
+    results = [
+        {
+            "_id": str(message["_id"]),
+            "content": message.get("content"),
+            "sender_id": message.get("sender_id"),
+            "receiver_id": message.get("receiver_id"),
+            "created_at": message.get("created_at"),
+            "highlights": highlights(message.get("content"), terms),
+            # Opens the message list around this hit
+            "cursor": encode_cursor(message),
+        }
+        for message in messages
+    ]
+
+    return (
+        jsonify(
+            {
+                "results": results,
+                "has_more": has_more,
+                "next_offset": offset + len(results) if has_more else None,
+            }
+        ),
+        200,
+    )
+
+
+@messages_bp.route("/unread-count", methods=["GET"])
+@jwt_required()
+def get_unread_count():
+    current_user_id = get_jwt_identity()
+    return jsonify({"unread": unread_count(current_user_id)}), 200
+
+
+@messages_bp.route("/mark-read", methods=["POST"])
+@jwt_required()
+def mark_messages_read():
+    current_user_id = get_jwt_identity()
+    data = request.json or {}
+
+    # Cursor of the newest message the user has seen, as returned by /messages
+    up_to = data.get("up_to")
+    if not up_to:
+        return jsonify({"message": "up_to is required"}), 400
+
+    try:
+        marked = mark_read(current_user_id, up_to)
+    except InvalidCursor:
+        return jsonify({"message": "Invalid cursor"}), 400
+
+    return jsonify({"message": "Messages marked as read", "marked": marked}), 200
 
 
 @messages_bp.route("/send", methods=["POST"])
@@ -258,12 +424,16 @@ def send_message():
         "content": data["content"],
         "sender_id": current_user_id,
         "receiver_id": receiver_id,
+        "participants": participants_key(current_user_id, receiver_id),
+        "conversation": conversation_key(current_user_id, receiver_id),
         "created_at": datetime.utcnow(),
         "is_read": False,
     }
 
     result = mongo.db.messages.insert_one(message)
     message["_id"] = str(result.inserted_id)
+    bump_unread(mongo.db, receiver_id)
+    bump_versions(mongo.db, [current_user_id, receiver_id], MESSAGES)
 
     # Send email notification if the receiver has it enabled
     if receiver.get("email_notifications", True):
@@ -284,6 +454,9 @@ def schedule_message():
     current_user_id = get_jwt_identity()
     data = request.json
 
+    if not ObjectId.is_valid(data.get("receiverId")):
+        return jsonify({"message": "Invalid receiverId"}), 400
+
     try:
         local_tz = pytz.timezone("America/New_York")
         local_scheduled = datetime.fromisoformat(data["scheduledTime"])
@@ -302,6 +475,12 @@ def schedule_message():
 
     result = mongo.db.scheduled_messages.insert_one(scheduled_message)
     scheduled_message["_id"] = str(result.inserted_id)
+    # Wakes the message worker so it can shorten its sleep; without the
+    # signal it still finds the message on its next regular pass
+    try:
+        signal_scheduled(mongo.db, scheduled_time)
+    except Exception as e:
+        print(f"Error signalling scheduled message: {e}")
 
     return (
         jsonify(
@@ -319,7 +498,8 @@ def get_scheduled_messages():
     # Get all scheduled messages for the current user
     scheduled_messages = list(
         mongo.db.scheduled_messages.find(
-            {"sender_id": current_user_id, "status": "pending"}
+            # Messages waiting to be retried are still on their way
+            {"sender_id": current_user_id, "status": {"$in": ["pending", "retrying"]}}
         ).sort("scheduled_time", 1)
     )
 
@@ -343,7 +523,7 @@ def cancel_scheduled_message(message_id):
             {
                 "_id": ObjectId(message_id),
                 "sender_id": current_user_id,
-                "status": "pending",
+                "status": {"$in": ["pending", "retrying"]},
             },
             {"$set": {"status": "cancelled"}},
         )
@@ -396,7 +576,13 @@ def invite_partner():
         # Update current user with pending partnership
         mongo.db.users.update_one(
             {"_id": ObjectId(current_user_id)},
-            {"$set": {"partner_id": partner["_id"], "partner_status": "pending_sent"}},
+            {
+                "$set": {
+                    "partner_id": partner["_id"],
+                    "partner_status": "pending_sent",
+                },
+                "$inc": version_inc(PARTNER),
+            },
         )
 
         # Update partner with pending invitation
@@ -406,7 +592,8 @@ def invite_partner():
                 "$set": {
                     "partner_id": current_user_id,
                     "partner_status": "pending_received",
-                }
+                },
+                "$inc": version_inc(PARTNER),
             },
         )
 
@@ -428,7 +615,13 @@ def invite_partner():
             # Update current user with pending partnership
             mongo.db.users.update_one(
                 {"_id": ObjectId(current_user_id)},
-                {"$set": {"partner_email": partner_email, "partner_status": "invited"}},
+                {
+                    "$set": {
+                        "partner_email": partner_email,
+                        "partner_status": "invited",
+                    },
+                    "$inc": version_inc(PARTNER),
+                },
             )
         except Exception as e:
             print(f"Error sending invitation email: {e}")
@@ -455,11 +648,13 @@ def accept_partner():
 
     # Update both users to connected status
     mongo.db.users.update_one(
-        {"_id": ObjectId(current_user_id)}, {"$set": {"partner_status": "connected"}}
+        {"_id": ObjectId(current_user_id)},
+        {"$set": {"partner_status": "connected"}, "$inc": version_inc(PARTNER)},
     )
 
     mongo.db.users.update_one(
-        {"_id": ObjectId(partner_id)}, {"$set": {"partner_status": "connected"}}
+        {"_id": ObjectId(partner_id)},
+        {"$set": {"partner_status": "connected"}, "$inc": version_inc(PARTNER)},
     )
 
     # Send notification email to partner about acceptance
@@ -492,12 +687,18 @@ def reject_partner():
     # Remove partnership data from both users
     mongo.db.users.update_one(
         {"_id": ObjectId(current_user_id)},
-        {"$unset": {"partner_id": "", "partner_status": ""}},
+        {
+            "$unset": {"partner_id": "", "partner_status": ""},
+            "$inc": version_inc(PARTNER),
+        },
     )
 
     mongo.db.users.update_one(
         {"_id": ObjectId(partner_id)},
-        {"$unset": {"partner_id": "", "partner_status": ""}},
+        {
+            "$unset": {"partner_id": "", "partner_status": ""},
+            "$inc": version_inc(PARTNER),
+        },
     )
 
     # Notify partner about rejection (optional)
@@ -516,6 +717,7 @@ def reject_partner():
 
 @auth_bp.route("/partner/status", methods=["GET"])
 @jwt_required()
+@conditional_get(PARTNER)
 def get_partner_status():
     current_user_id = get_jwt_identity()
 
@@ -564,6 +766,11 @@ def update_profile():
     if result.modified_count == 0:
         return jsonify({"message": "No changes made"}), 200
 
+    # The partner's status view shows this name
+    user = get_user_by_id(current_user_id)
+    if user and user.get("partner_id"):
+        bump_versions(mongo.db, [user["partner_id"]], PARTNER)
+
     return jsonify({"message": "Profile updated successfully"}), 200
 
 
@@ -1,1489 +1,412 @@
-import random
+import time
 from datetime import datetime, timedelta
+import click
 from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
+from pymongo import ReturnDocument
 from .. import mongo
+from ..quiz_catalog import CATALOG
+from ..quiz_events import answer_notifier
 
 quiz_bp = Blueprint("quiz", __name__)
 
-QUIZ_QUESTIONS = [
-    {
-        "text": "Would you rather have a cat or a dog?",
-        "options": ["Cat", "Dog"],
-        "tag": "pets",
-    },
-    {
-        "text": "Would you rather Morning person or Night owl?",
-        "options": ["Morning person", "Night owl"],
-        "tag": "lifestyle",
-    },
-    {
-        "text": "Would you rather Jurassic Park or Avatar?",
-        "options": ["Jurassic Park", "Avatar"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Fortnite or Minecraft?",
-        "options": ["Fortnite", "Minecraft"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Summer or Autumn?",
-        "options": ["Summer", "Autumn"],
-        "tag": "season",
-    },
-    {
-        "text": "Would you rather Football or Basketball?",
-        "options": ["Football", "Basketball"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Basketball or Swimming?",
-        "options": ["Basketball", "Swimming"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather The Godfather or The Dark Knight?",
-        "options": ["The Godfather", "The Dark Knight"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Handshake or High-five?",
-        "options": ["Handshake", "High-five"],
-        "tag": "greeting",
-    },
-    {
-        "text": "Would you rather Hip-hop or Blues?",
-        "options": ["Hip-hop", "Blues"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather White or Green?",
-        "options": ["White", "Green"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Star Wars or The Matrix?",
-        "options": ["Star Wars", "The Matrix"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Call of Duty or Animal Crossing?",
-        "options": ["Call of Duty", "Animal Crossing"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Jurassic Park or The Matrix?",
-        "options": ["Jurassic Park", "The Matrix"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Red or Yellow?",
-        "options": ["Red", "Yellow"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Green or Orange?",
-        "options": ["Green", "Orange"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather The Godfather or Jurassic Park?",
-        "options": ["The Godfather", "Jurassic Park"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Inception or Avatar?",
-        "options": ["Inception", "Avatar"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Stranger Things or The Simpsons?",
-        "options": ["Stranger Things", "The Simpsons"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Train or Bus?",
-        "options": ["Train", "Bus"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Purple or Gray?",
-        "options": ["Purple", "Gray"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Black or Brown?",
-        "options": ["Black", "Brown"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Blue or Teal?",
-        "options": ["Blue", "Teal"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Water or Milk?",
-        "options": ["Water", "Milk"],
-        "tag": "drinks",
-    },
-    {
-        "text": "Would you rather Pink or Teal?",
-        "options": ["Pink", "Teal"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Eggs or Oatmeal?",
-        "options": ["Eggs", "Oatmeal"],
-        "tag": "breakfast",
-    },
-    {
-        "text": "Would you rather Basketball or Cricket?",
-        "options": ["Basketball", "Cricket"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather The Dark Knight or Forrest Gump?",
-        "options": ["The Dark Knight", "Forrest Gump"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather The Office or Friends?",
-        "options": ["The Office", "Friends"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Tennis or Baseball?",
-        "options": ["Tennis", "Baseball"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Tea or Water?",
-        "options": ["Tea", "Water"],
-        "tag": "drinks",
-    },
-    {
-        "text": "Would you rather Settlers of Catan or Scrabble?",
-        "options": ["Settlers of Catan", "Scrabble"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Game of Thrones or Friends?",
-        "options": ["Game of Thrones", "Friends"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Golf or Swimming?",
-        "options": ["Golf", "Swimming"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Fish or Rabbit?",
-        "options": ["Fish", "Rabbit"],
-        "tag": "pets",
-    },
-    {
-        "text": "Would you rather The Godfather or Titanic?",
-        "options": ["The Godfather", "Titanic"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Minecraft or Overwatch?",
-        "options": ["Minecraft", "Overwatch"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Coffee or Juice?",
-        "options": ["Coffee", "Juice"],
-        "tag": "drinks",
-    },
-    {
-        "text": "Would you rather Scrabble or Risk?",
-        "options": ["Scrabble", "Risk"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Football or Boxing?",
-        "options": ["Football", "Boxing"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Taylor Swift or Ariana Grande?",
-        "options": ["Taylor Swift", "Ariana Grande"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Settlers of Catan or Clue?",
-        "options": ["Settlers of Catan", "Clue"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Rugby or Golf?",
-        "options": ["Rugby", "Golf"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Drake or Bruno Mars?",
-        "options": ["Drake", "Bruno Mars"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Salty or Umami?",
-        "options": ["Salty", "Umami"],
-        "tag": "taste",
-    },
-    {
-        "text": "Would you rather Taylor Swift or Beyonc\u00e9?",
-        "options": ["Taylor Swift", "Beyonc\u00e9"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather The Mandalorian or The Simpsons?",
-        "options": ["The Mandalorian", "The Simpsons"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Netflix or Hulu?",
-        "options": ["Netflix", "Hulu"],
-        "tag": "streaming",
-    },
-    {
-        "text": "Would you rather Tennis or Swimming?",
-        "options": ["Tennis", "Swimming"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Cricket or Swimming?",
-        "options": ["Cricket", "Swimming"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Billie Eilish or Bruno Mars?",
-        "options": ["Billie Eilish", "Bruno Mars"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Clue or Pandemic?",
-        "options": ["Clue", "Pandemic"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Blue or Pink?",
-        "options": ["Blue", "Pink"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Jazz or Reggae?",
-        "options": ["Jazz", "Reggae"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Ed Sheeran or Bruno Mars?",
-        "options": ["Ed Sheeran", "Bruno Mars"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather White or Yellow?",
-        "options": ["White", "Yellow"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Orange or Pink?",
-        "options": ["Orange", "Pink"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Ticket to Ride or Pandemic?",
-        "options": ["Ticket to Ride", "Pandemic"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Fortnite or Overwatch?",
-        "options": ["Fortnite", "Overwatch"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Basketball or Tennis?",
-        "options": ["Basketball", "Tennis"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Purple or Pink?",
-        "options": ["Purple", "Pink"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Blue or Purple?",
-        "options": ["Blue", "Purple"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Minecraft or Call of Duty?",
-        "options": ["Minecraft", "Call of Duty"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Boat or Bus?",
-        "options": ["Boat", "Bus"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Blues or Folk?",
-        "options": ["Blues", "Folk"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Taylor Swift or The Weeknd?",
-        "options": ["Taylor Swift", "The Weeknd"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Avatar or The Dark Knight?",
-        "options": ["Avatar", "The Dark Knight"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Pop or Country?",
-        "options": ["Pop", "Country"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Overwatch or Cyberpunk 2077?",
-        "options": ["Overwatch", "Cyberpunk 2077"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Train or Motorcycle?",
-        "options": ["Train", "Motorcycle"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Train or Scooter?",
-        "options": ["Train", "Scooter"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Friends or Sherlock?",
-        "options": ["Friends", "Sherlock"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Scrabble or Carcassonne?",
-        "options": ["Scrabble", "Carcassonne"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Fortnite or Among Us?",
-        "options": ["Fortnite", "Among Us"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather The Crown or The Simpsons?",
-        "options": ["The Crown", "The Simpsons"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Titanic or Jurassic Park?",
-        "options": ["Titanic", "Jurassic Park"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Plane or Motorcycle?",
-        "options": ["Plane", "Motorcycle"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Mountains or Hotel?",
-        "options": ["Mountains", "Hotel"],
-        "tag": "travel",
-    },
-    {
-        "text": "Would you rather Handshake or Bow?",
-        "options": ["Handshake", "Bow"],
-        "tag": "greeting",
-    },
-    {
-        "text": "Would you rather Bus or Scooter?",
-        "options": ["Bus", "Scooter"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather The Office or The Simpsons?",
-        "options": ["The Office", "The Simpsons"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Jurassic Park or Pulp Fiction?",
-        "options": ["Jurassic Park", "Pulp Fiction"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Friends or Westworld?",
-        "options": ["Friends", "Westworld"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Hand wash or Bath & Shower?",
-        "options": ["Hand wash", "Bath & Shower"],
-        "tag": "hygiene",
-    },
-    {
-        "text": "Would you rather Football or Golf?",
-        "options": ["Football", "Golf"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather The Office or Westworld?",
-        "options": ["The Office", "Westworld"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Pop or Hip-hop?",
-        "options": ["Pop", "Hip-hop"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Jurassic Park or Forrest Gump?",
-        "options": ["Jurassic Park", "Forrest Gump"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Country or Blues?",
-        "options": ["Country", "Blues"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Overwatch or Elden Ring?",
-        "options": ["Overwatch", "Elden Ring"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Purple or Brown?",
-        "options": ["Purple", "Brown"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Baseball or Rugby?",
-        "options": ["Baseball", "Rugby"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Netflix or Disney+?",
-        "options": ["Netflix", "Disney+"],
-        "tag": "streaming",
-    },
-    {
-        "text": "Would you rather Game of Thrones or The Crown?",
-        "options": ["Game of Thrones", "The Crown"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather City or Hotel?",
-        "options": ["City", "Hotel"],
-        "tag": "travel",
-    },
-    {
-        "text": "Would you rather Phone or Tablet?",
-        "options": ["Phone", "Tablet"],
-        "tag": "device",
-    },
-    {
-        "text": "Would you rather Online Shopping or In-store Shopping?",
-        "options": ["Online Shopping", "In-store Shopping"],
-        "tag": "shopping",
-    },
-    {
-        "text": "Would you rather League of Legends or Overwatch?",
-        "options": ["League of Legends", "Overwatch"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Billie Eilish or Rihanna?",
-        "options": ["Billie Eilish", "Rihanna"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Black or Red?",
-        "options": ["Black", "Red"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Blue or Yellow?",
-        "options": ["Blue", "Yellow"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Baseball or Cricket?",
-        "options": ["Baseball", "Cricket"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Carcassonne or Pandemic?",
-        "options": ["Carcassonne", "Pandemic"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather White or Teal?",
-        "options": ["White", "Teal"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Pulp Fiction or The Matrix?",
-        "options": ["Pulp Fiction", "The Matrix"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather iOS or Mac?",
-        "options": ["iOS", "Mac"],
-        "tag": "technology",
-    },
-    {
-        "text": "Would you rather The Mandalorian or The Crown?",
-        "options": ["The Mandalorian", "The Crown"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Pancakes or Oatmeal?",
-        "options": ["Pancakes", "Oatmeal"],
-        "tag": "breakfast",
-    },
-    {
-        "text": "Would you rather Pop or Electronic?",
-        "options": ["Pop", "Electronic"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Hotel or Camping?",
-        "options": ["Hotel", "Camping"],
-        "tag": "travel",
-    },
-    {
-        "text": "Would you rather Risk or Carcassonne?",
-        "options": ["Risk", "Carcassonne"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Books or Movies?",
-        "options": ["Books", "Movies"],
-        "tag": "entertainment",
-    },
-    {
-        "text": "Would you rather Breaking Bad or Westworld?",
-        "options": ["Breaking Bad", "Westworld"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Chess or Monopoly?",
-        "options": ["Chess", "Monopoly"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Chrome or Safari?",
-        "options": ["Chrome", "Safari"],
-        "tag": "browser",
-    },
-    {
-        "text": "Would you rather Classical or Hip-hop?",
-        "options": ["Classical", "Hip-hop"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Yoga or Swimming?",
-        "options": ["Yoga", "Swimming"],
-        "tag": "exercise",
-    },
-    {
-        "text": "Would you rather Avatar or The Matrix?",
-        "options": ["Avatar", "The Matrix"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Avatar or Pulp Fiction?",
-        "options": ["Avatar", "Pulp Fiction"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Yellow or Purple?",
-        "options": ["Yellow", "Purple"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Beach or Camping?",
-        "options": ["Beach", "Camping"],
-        "tag": "travel",
-    },
-    {
-        "text": "Would you rather E-book or Printed Book?",
-        "options": ["E-book", "Printed Book"],
-        "tag": "reading",
-    },
-    {
-        "text": "Would you rather Inception or The Dark Knight?",
-        "options": ["Inception", "The Dark Knight"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Stranger Things or Sherlock?",
-        "options": ["Stranger Things", "Sherlock"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Purple or Teal?",
-        "options": ["Purple", "Teal"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather The Godfather or Star Wars?",
-        "options": ["The Godfather", "Star Wars"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather White or Purple?",
-        "options": ["White", "Purple"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Bronze or Copper?",
-        "options": ["Bronze", "Copper"],
-        "tag": "metal",
-    },
-    {
-        "text": "Would you rather Gold or Bronze?",
-        "options": ["Gold", "Bronze"],
-        "tag": "metal",
-    },
-    {
-        "text": "Would you rather Monopoly or Carcassonne?",
-        "options": ["Monopoly", "Carcassonne"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Black or Yellow?",
-        "options": ["Black", "Yellow"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Android or Mac?",
-        "options": ["Android", "Mac"],
-        "tag": "technology",
-    },
-    {
-        "text": "Would you rather Rugby or Swimming?",
-        "options": ["Rugby", "Swimming"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather League of Legends or Animal Crossing?",
-        "options": ["League of Legends", "Animal Crossing"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Beyonc\u00e9 or Bruno Mars?",
-        "options": ["Beyonc\u00e9", "Bruno Mars"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Call or Text?",
-        "options": ["Call", "Text"],
-        "tag": "communication",
-    },
-    {
-        "text": "Would you rather Electronic or Folk?",
-        "options": ["Electronic", "Folk"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Sweet or Bitter?",
-        "options": ["Sweet", "Bitter"],
-        "tag": "taste",
-    },
-    {
-        "text": "Would you rather Cricket or Golf?",
-        "options": ["Cricket", "Golf"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Inception or The Matrix?",
-        "options": ["Inception", "The Matrix"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Chess or Codenames?",
-        "options": ["Chess", "Codenames"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Train or Boat?",
-        "options": ["Train", "Boat"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Billie Eilish or The Weeknd?",
-        "options": ["Billie Eilish", "The Weeknd"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Red or Pink?",
-        "options": ["Red", "Pink"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Cat or Rabbit?",
-        "options": ["Cat", "Rabbit"],
-        "tag": "pets",
-    },
-    {
-        "text": "Would you rather Motorcycle or Scooter?",
-        "options": ["Motorcycle", "Scooter"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Football or Rugby?",
-        "options": ["Football", "Rugby"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather PC or Mac?",
-        "options": ["PC", "Mac"],
-        "tag": "technology",
-    },
-    {
-        "text": "Would you rather Beyonc\u00e9 or The Weeknd?",
-        "options": ["Beyonc\u00e9", "The Weeknd"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Country or Folk?",
-        "options": ["Country", "Folk"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Shower or Bath & Shower?",
-        "options": ["Shower", "Bath & Shower"],
-        "tag": "hygiene",
-    },
-    {
-        "text": "Would you rather Clue or Codenames?",
-        "options": ["Clue", "Codenames"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Drake or Ed Sheeran?",
-        "options": ["Drake", "Ed Sheeran"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Risk or Ticket to Ride?",
-        "options": ["Risk", "Ticket to Ride"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Mountains or City?",
-        "options": ["Mountains", "City"],
-        "tag": "travel",
-    },
-    {
-        "text": "Would you rather Basketball or Hockey?",
-        "options": ["Basketball", "Hockey"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Titanic or Forrest Gump?",
-        "options": ["Titanic", "Forrest Gump"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Salty or Sour?",
-        "options": ["Salty", "Sour"],
-        "tag": "taste",
-    },
-    {
-        "text": "Would you rather Green or Teal?",
-        "options": ["Green", "Teal"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Inception or Forrest Gump?",
-        "options": ["Inception", "Forrest Gump"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Stranger Things or The Mandalorian?",
-        "options": ["Stranger Things", "The Mandalorian"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Red or Blue?",
-        "options": ["Red", "Blue"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Hulu or Disney+?",
-        "options": ["Hulu", "Disney+"],
-        "tag": "streaming",
-    },
-    {
-        "text": "Would you rather Beyonc\u00e9 or Ariana Grande?",
-        "options": ["Beyonc\u00e9", "Ariana Grande"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Eggs or Cereal?",
-        "options": ["Eggs", "Cereal"],
-        "tag": "breakfast",
-    },
-    {
-        "text": "Would you rather Coffee or Milk?",
-        "options": ["Coffee", "Milk"],
-        "tag": "drinks",
-    },
-    {
-        "text": "Would you rather Car or Boat?",
-        "options": ["Car", "Boat"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Game of Thrones or Sherlock?",
-        "options": ["Game of Thrones", "Sherlock"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Fortnite or Call of Duty?",
-        "options": ["Fortnite", "Call of Duty"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Hug or Handshake?",
-        "options": ["Hug", "Handshake"],
-        "tag": "greeting",
-    },
-    {
-        "text": "Would you rather Orange or Gray?",
-        "options": ["Orange", "Gray"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Tablet or Desktop?",
-        "options": ["Tablet", "Desktop"],
-        "tag": "device",
-    },
-    {
-        "text": "Would you rather Tea or Juice?",
-        "options": ["Tea", "Juice"],
-        "tag": "drinks",
-    },
-    {
-        "text": "Would you rather Pop or Folk?",
-        "options": ["Pop", "Folk"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Hockey or Golf?",
-        "options": ["Hockey", "Golf"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Yellow or Pink?",
-        "options": ["Yellow", "Pink"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Chess or Clue?",
-        "options": ["Chess", "Clue"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Bruno Mars or Rihanna?",
-        "options": ["Bruno Mars", "Rihanna"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather White or Gray?",
-        "options": ["White", "Gray"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Waffles or Eggs?",
-        "options": ["Waffles", "Eggs"],
-        "tag": "breakfast",
-    },
-    {
-        "text": "Would you rather Hockey or Boxing?",
-        "options": ["Hockey", "Boxing"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Football or Hockey?",
-        "options": ["Football", "Hockey"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Among Us or Elden Ring?",
-        "options": ["Among Us", "Elden Ring"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Call of Duty or League of Legends?",
-        "options": ["Call of Duty", "League of Legends"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Clue or Ticket to Ride?",
-        "options": ["Clue", "Ticket to Ride"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Hockey or Swimming?",
-        "options": ["Hockey", "Swimming"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Cricket or Rugby?",
-        "options": ["Cricket", "Rugby"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Chess or Scrabble?",
-        "options": ["Chess", "Scrabble"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Beach or City?",
-        "options": ["Beach", "City"],
-        "tag": "travel",
-    },
-    {
-        "text": "Would you rather Dog or Bird?",
-        "options": ["Dog", "Bird"],
-        "tag": "pets",
-    },
-    {
-        "text": "Would you rather Juice or Water?",
-        "options": ["Juice", "Water"],
-        "tag": "drinks",
-    },
-    {
-        "text": "Would you rather Titanic or Avatar?",
-        "options": ["Titanic", "Avatar"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Jurassic Park or The Dark Knight?",
-        "options": ["Jurassic Park", "The Dark Knight"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Bruno Mars or Adele?",
-        "options": ["Bruno Mars", "Adele"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Breaking Bad or The Crown?",
-        "options": ["Breaking Bad", "The Crown"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Blue or Orange?",
-        "options": ["Blue", "Orange"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Bitter or Sour?",
-        "options": ["Bitter", "Sour"],
-        "tag": "taste",
-    },
-    {
-        "text": "Would you rather Ariana Grande or Adele?",
-        "options": ["Ariana Grande", "Adele"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Monopoly or Clue?",
-        "options": ["Monopoly", "Clue"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Stranger Things or Westworld?",
-        "options": ["Stranger Things", "Westworld"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Fortnite or League of Legends?",
-        "options": ["Fortnite", "League of Legends"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Blue or Brown?",
-        "options": ["Blue", "Brown"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Baseball or Swimming?",
-        "options": ["Baseball", "Swimming"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Bitter or Umami?",
-        "options": ["Bitter", "Umami"],
-        "tag": "taste",
-    },
-    {
-        "text": "Would you rather Elden Ring or Valorant?",
-        "options": ["Elden Ring", "Valorant"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Jazz or Hip-hop?",
-        "options": ["Jazz", "Hip-hop"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Avatar or Star Wars?",
-        "options": ["Avatar", "Star Wars"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather The Mandalorian or Sherlock?",
-        "options": ["The Mandalorian", "Sherlock"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Rock or Hip-hop?",
-        "options": ["Rock", "Hip-hop"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Bath or Hand wash?",
-        "options": ["Bath", "Hand wash"],
-        "tag": "hygiene",
-    },
-    {
-        "text": "Would you rather Movies or Video Games?",
-        "options": ["Movies", "Video Games"],
-        "tag": "entertainment",
-    },
-    {
-        "text": "Would you rather Coffee or Water?",
-        "options": ["Coffee", "Water"],
-        "tag": "drinks",
-    },
-    {
-        "text": "Would you rather Swimming or Boxing?",
-        "options": ["Swimming", "Boxing"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Safari or Edge?",
-        "options": ["Safari", "Edge"],
-        "tag": "browser",
-    },
-    {
-        "text": "Would you rather Pop or Classical?",
-        "options": ["Pop", "Classical"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Pulp Fiction or Star Wars?",
-        "options": ["Pulp Fiction", "Star Wars"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Plane or Scooter?",
-        "options": ["Plane", "Scooter"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Pancakes or Eggs?",
-        "options": ["Pancakes", "Eggs"],
-        "tag": "breakfast",
-    },
-    {
-        "text": "Would you rather Titanic or Star Wars?",
-        "options": ["Titanic", "Star Wars"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather Game of Thrones or Westworld?",
-        "options": ["Game of Thrones", "Westworld"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather YouTube or Hulu?",
-        "options": ["YouTube", "Hulu"],
-        "tag": "streaming",
-    },
-    {
-        "text": "Would you rather Basketball or Boxing?",
-        "options": ["Basketball", "Boxing"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Fortnite or Animal Crossing?",
-        "options": ["Fortnite", "Animal Crossing"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Game of Thrones or Stranger Things?",
-        "options": ["Game of Thrones", "Stranger Things"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Rock or Country?",
-        "options": ["Rock", "Country"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Hug or High-five?",
-        "options": ["Hug", "High-five"],
-        "tag": "greeting",
-    },
-    {
-        "text": "Would you rather Call of Duty or Valorant?",
-        "options": ["Call of Duty", "Valorant"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather iOS or PC?",
-        "options": ["iOS", "PC"],
-        "tag": "technology",
-    },
-    {
-        "text": "Would you rather Classical or Electronic?",
-        "options": ["Classical", "Electronic"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Chess or Ticket to Ride?",
-        "options": ["Chess", "Ticket to Ride"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Jazz or Country?",
-        "options": ["Jazz", "Country"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather Taylor Swift or Ed Sheeran?",
-        "options": ["Taylor Swift", "Ed Sheeran"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather White or Red?",
-        "options": ["White", "Red"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Board Games or Video Games?",
-        "options": ["Board Games", "Video Games"],
-        "tag": "entertainment",
-    },
-    {
-        "text": "Would you rather Swimming or Cycling?",
-        "options": ["Swimming", "Cycling"],
-        "tag": "exercise",
-    },
-    {
-        "text": "Would you rather Car or Plane?",
-        "options": ["Car", "Plane"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather Call or Email?",
-        "options": ["Call", "Email"],
-        "tag": "communication",
-    },
-    {
-        "text": "Would you rather Ariana Grande or Rihanna?",
-        "options": ["Ariana Grande", "Rihanna"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Black or Purple?",
-        "options": ["Black", "Purple"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Pilates or Swimming?",
-        "options": ["Pilates", "Swimming"],
-        "tag": "exercise",
-    },
-    {
-        "text": "Would you rather Cereal or Oatmeal?",
-        "options": ["Cereal", "Oatmeal"],
-        "tag": "breakfast",
-    },
-    {
-        "text": "Would you rather League of Legends or Valorant?",
-        "options": ["League of Legends", "Valorant"],
-        "tag": "video_game",
-    },
-    {
-        "text": "Would you rather Westworld or Sherlock?",
-        "options": ["Westworld", "Sherlock"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Would you rather Ariana Grande or Billie Eilish?",
-        "options": ["Ariana Grande", "Billie Eilish"],
-        "tag": "singer",
-    },
-    {
-        "text": "Would you rather Tennis or Rugby?",
-        "options": ["Tennis", "Rugby"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Orange or Brown?",
-        "options": ["Orange", "Brown"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather Football or Cricket?",
-        "options": ["Football", "Cricket"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Monopoly or Codenames?",
-        "options": ["Monopoly", "Codenames"],
-        "tag": "board_game",
-    },
-    {
-        "text": "Would you rather Soda or Milk?",
-        "options": ["Soda", "Milk"],
-        "tag": "drinks",
-    },
-    {
-        "text": "Would you rather Football or Baseball?",
-        "options": ["Football", "Baseball"],
-        "tag": "sport",
-    },
-    {
-        "text": "Would you rather Breaking Bad or The Simpsons?",
-        "options": ["Breaking Bad", "The Simpsons"],
-        "tag": "tv_show",
-    },
-    {
-        "text": "Sweet or savory breakfast?",
-        "options": ["Sweet", "Savory"],
-        "tag": "food",
-    },
-    {
-        "text": "Morning person or night owl?",
-        "options": ["Morning", "Night"],
-        "tag": "lifestyle",
-    },
-    {"text": "Beach or mountains?", "options": ["Beach", "Mountains"], "tag": "travel"},
-    {
-        "text": "Would you rather summer or winter?",
-        "options": ["Summer", "Winter"],
-        "tag": "season",
-    },
-    {
-        "text": "Would you rather pizza or burgers?",
-        "options": ["Pizza", "Burgers"],
-        "tag": "food",
-    },
-    {
-        "text": "Would you rather books or movies?",
-        "options": ["Books", "Movies"],
-        "tag": "entertainment",
-    },
-    {
-        "text": "Would you rather train or plane?",
-        "options": ["Train", "Plane"],
-        "tag": "travel",
-    },
-    {
-        "text": "Would you rather car or bicycle?",
-        "options": ["Car", "Bicycle"],
-        "tag": "transport",
-    },
-    {
-        "text": "Would you rather android or ios?",
-        "options": ["Android", "iOS"],
-        "tag": "technology",
-    },
-    {
-        "text": "Would you rather pc or mac?",
-        "options": ["PC", "Mac"],
-        "tag": "technology",
-    },
-    {
-        "text": "Would you rather chrome or firefox?",
-        "options": ["Chrome", "Firefox"],
-        "tag": "browser",
-    },
-    {
-        "text": "Would you rather call or text?",
-        "options": ["Call", "Text"],
-        "tag": "communication",
-    },
-    {
-        "text": "Would you rather hug or handshake?",
-        "options": ["Hug", "Handshake"],
-        "tag": "greeting",
-    },
-    {
-        "text": "Would you rather board games or video games?",
-        "options": ["Board Games", "Video Games"],
-        "tag": "games",
-    },
-    {
-        "text": "Would you rather science or arts?",
-        "options": ["Science", "Arts"],
-        "tag": "subject",
-    },
-    {
-        "text": "Would you rather sneakers or sandals?",
-        "options": ["Sneakers", "Sandals"],
-        "tag": "footwear",
-    },
-    {
-        "text": "Would you rather black or white?",
-        "options": ["Black", "White"],
-        "tag": "color",
-    },
-    {
-        "text": "Would you rather netflix or youtube?",
-        "options": ["Netflix", "YouTube"],
-        "tag": "streaming",
-    },
-    {
-        "text": "Would you rather stairs or elevator?",
-        "options": ["Stairs", "Elevator"],
-        "tag": "facility",
-    },
-    {
-        "text": "Would you rather bath or shower?",
-        "options": ["Bath", "Shower"],
-        "tag": "hygiene",
-    },
-    {
-        "text": "Would you rather pancakes or waffles?",
-        "options": ["Pancakes", "Waffles"],
-        "tag": "breakfast",
-    },
-    {
-        "text": "Would you rather tea or juice?",
-        "options": ["Tea", "Juice"],
-        "tag": "drink",
-    },
-    {
-        "text": "Would you rather salty or sweet?",
-        "options": ["Salty", "Sweet"],
-        "tag": "taste",
-    },
-    {
-        "text": "Would you rather gold or silver?",
-        "options": ["Gold", "Silver"],
-        "tag": "metal",
-    },
-    {
-        "text": "Would you rather comedy or drama?",
-        "options": ["Comedy", "Drama"],
-        "tag": "movie",
-    },
-    {
-        "text": "Would you rather football or basketball?",
-        "options": ["Football", "Basketball"],
-        "tag": "sports",
-    },
-    {
-        "text": "Would you rather pen or pencil?",
-        "options": ["Pen", "Pencil"],
-        "tag": "stationery",
-    },
-    {
-        "text": "Would you rather chocolate or vanilla?",
-        "options": ["Chocolate", "Vanilla"],
-        "tag": "flavor",
-    },
-    {
-        "text": "Would you rather pool or beach?",
-        "options": ["Pool", "Beach"],
-        "tag": "location",
-    },
-    {
-        "text": "Would you rather phone or laptop?",
-        "options": ["Phone", "Laptop"],
-        "tag": "device",
-    },
-    {
-        "text": "Would you rather twitter or instagram?",
-        "options": ["Twitter", "Instagram"],
-        "tag": "social",
-    },
-    {
-        "text": "Would you rather morning gym or evening gym?",
-        "options": ["Morning Gym", "Evening Gym"],
-        "tag": "exercise",
-    },
-    {
-        "text": "Would you rather yoga or pilates?",
-        "options": ["Yoga", "Pilates"],
-        "tag": "exercise",
-    },
-    {
-        "text": "Would you rather city or countryside?",
-        "options": ["City", "Countryside"],
-        "tag": "travel",
-    },
-    {
-        "text": "Would you rather camping or hotel?",
-        "options": ["Camping", "Hotel"],
-        "tag": "accommodation",
-    },
-    {
-        "text": "Would you rather museum or zoo?",
-        "options": ["Museum", "Zoo"],
-        "tag": "place",
-    },
-    {
-        "text": "Would you rather sushi or tacos?",
-        "options": ["Sushi", "Tacos"],
-        "tag": "food",
-    },
-    {
-        "text": "Would you rather hotdog or burger?",
-        "options": ["Hotdog", "Burger"],
-        "tag": "food",
-    },
-    {
-        "text": "Would you rather rain or snow?",
-        "options": ["Rain", "Snow"],
-        "tag": "weather",
-    },
-    {
-        "text": "Would you rather sunrise or sunset?",
-        "options": ["Sunrise", "Sunset"],
-        "tag": "time",
-    },
-    {
-        "text": "Would you rather rock or pop?",
-        "options": ["Rock", "Pop"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather classical or hip-hop?",
-        "options": ["Classical", "Hip-hop"],
-        "tag": "music",
-    },
-    {
-        "text": "Would you rather e-book or printed book?",
-        "options": ["E-book", "Printed Book"],
-        "tag": "reading",
-    },
-    {
-        "text": "Would you rather online shopping or in-store shopping?",
-        "options": ["Online Shopping", "In-store Shopping"],
-        "tag": "shopping",
-    },
-]
-
-# Assign unique IDs to each question
-for i, q in enumerate(QUIZ_QUESTIONS):
-    q["id"] = i + 1
+# Longest time (seconds) a wait-partner-response request is held open
+LONG_POLL_TIMEOUT = 25
+# How often a held request re-checks the database for answers from other processes
+LONG_POLL_RECHECK = 10
+
+# Number of questions drawn into each batch
+BATCH_SIZE = 5
+# How long a batch stays playable after it is created
+BATCH_TTL = timedelta(days=7)
+# How long a finished batch, completed or expired, is kept for its results
+# before the TTL index deletes it
+BATCH_RETENTION = timedelta(days=30)
+
+
+# Points applied to the compatibility score when both partners have answered
+MATCH_DELTA = 5
+MISMATCH_DELTA = -2
+
+
+def pair_slot(pair, user_id):
+    """Return the per-pair field prefix ("user1"/"user2") for a user"""
+    return "user1" if pair[0] == str(user_id) else "user2"
+
+
+def update_pair_stats(
+    pair, user_id, is_match=None, question_id=None, batch=None, session=None
+):
+    """
+    Atomically apply one answer to the pair's aggregate document in quiz_scores.
+
+    The answering user's counter is always bumped and question_id, if given, is
+    added to their answered id set. When the partner has already answered
+    (is_match is not None) the both-answered/matched counters and the clamped
+    score are updated in the same write. Given the answered batch as it is
+    after the answer, the status snapshot follows its progress in that write
+    too. Returns the updated document.
+    """
+    answered_field = f"{pair_slot(pair, user_id)}_answered"
+    both = 0 if is_match is None else 1
+    matched = 1 if is_match else 0
+    delta = 0
+    if is_match is not None:
+        delta = MATCH_DELTA if is_match else MISMATCH_DELTA
+
+    fields = {
+        "score": {"$max": [0, {"$add": [{"$ifNull": ["$score", 0]}, delta]}]},
+        answered_field: {"$add": [{"$ifNull": [f"${answered_field}", 0]}, 1]},
+        "both_answered": {"$add": [{"$ifNull": ["$both_answered", 0]}, both]},
+        "matched": {"$add": [{"$ifNull": ["$matched", 0]}, matched]},
+        "updated_at": datetime.utcnow(),
+    }
+    if question_id is not None:
+        ids_field = f"{answered_field}_ids"
+        fields[ids_field] = {
+            "$setUnion": [{"$ifNull": [f"${ids_field}", []]}, [question_id]]
+        }
+
+    if batch is not None:
+        batch_id = str(batch["_id"])
+        progress = None
+        if not batch.get("completed"):
+            progress = {
+                "id": {"$literal": batch_id},
+                "current_index": {
+                    "$max": [
+                        "$active_batch.current_index",
+                        batch.get("current_index", 0),
+                    ]
+                },
+                "total": len(batch_question_ids(batch)),
+                "expires_at": {"$literal": batch["expires_at"]},
+            }
+        fields["active_batch"] = {
+            "$cond": [
+                {"$eq": ["$active_batch.id", batch_id]},
+                progress,
+                "$active_batch",
+            ]
+        }
+
+    return mongo.db.quiz_scores.find_one_and_update(
+        {"user1_id": pair[0], "user2_id": pair[1]},
+        [{"$set": fields}],
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+
+
+def compute_pair_stats(pair, responses):
+    """
+    Rebuild a pair's aggregate from its raw quiz_responses documents.
+
+    Answers are counted per batch and question, the way they were scored
+    live: a question served again once a pair has answered the whole catalog
+    counts and scores again. The score is replayed in the order the questions
+    were resolved (the later of the two answers) so the zero clamp behaves the
+    same as it did live.
+    """
+    answers = {pair[0]: {}, pair[1]: {}}
+    resolved_at = {pair[0]: {}, pair[1]: {}}
+    for resp in sorted(responses, key=lambda r: r.get("created_at") or datetime.min):
+        # Keep the first answer per batch and question, which is the one that
+        # was scored; responses from before batch_id count once per question
+        key = (resp.get("batch_id"), resp["question_id"])
+        if key not in answers[resp["user_id"]]:
+            answers[resp["user_id"]][key] = resp["answer"]
+            resolved_at[resp["user_id"]][key] = resp.get("created_at") or datetime.min
+
+    shared = set(answers[pair[0]]) & set(answers[pair[1]])
+    score = 0
+    matched = 0
+    for key in sorted(
+        shared,
+        key=lambda k: max(resolved_at[pair[0]][k], resolved_at[pair[1]][k]),
+    ):
+        is_match = answers[pair[0]][key] == answers[pair[1]][key]
+        matched += 1 if is_match else 0
+        score = max(0, score + (MATCH_DELTA if is_match else MISMATCH_DELTA))
+
+    return {
+        "score": score,
+        "user1_answered": len(answers[pair[0]]),
+        "user2_answered": len(answers[pair[1]]),
+        "both_answered": len(shared),
+        "matched": matched,
+        "user1_answered_ids": sorted({q for _, q in answers[pair[0]]}),
+        "user2_answered_ids": sorted({q for _, q in answers[pair[1]]}),
+    }
+
+
+def rebuild_pair_stats(user_id, partner_id):
+    """Recompute and store the aggregate document for one pair"""
+    pair = sorted([str(user_id), str(partner_id)])
+    responses = mongo.db.quiz_responses.find(
+        {"user_id": {"$in": pair}},
+        {"user_id": 1, "question_id": 1, "answer": 1, "created_at": 1, "batch_id": 1},
+    )
+    stats = compute_pair_stats(pair, responses)
+    stats["updated_at"] = datetime.utcnow()
+    mongo.db.quiz_scores.update_one(
+        {"user1_id": pair[0], "user2_id": pair[1]}, {"$set": stats}, upsert=True
+    )
+    return stats
+
+
+@quiz_bp.cli.command("backfill-stats")
+def backfill_stats_command():
+    """Rebuild every pair's quiz_scores aggregate from quiz_responses."""
+    seen = set()
+    for user in mongo.db.users.find(
+        {"partner_id": {"$nin": [None, ""]}}, {"partner_id": 1}
+    ):
+        pair = tuple(sorted([str(user["_id"]), str(user["partner_id"])]))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        stats = rebuild_pair_stats(*pair)
+        click.echo(
+            f"{pair[0]}/{pair[1]}: score={stats['score']} "
+            f"matched={stats['matched']}/{stats['both_answered']}"
+        )
+    click.echo(f"Rebuilt quiz stats for {len(seen)} pair(s)")
+
+
+def active_batch_filter(pair, now=None):
+    """
+    The one definition of a pair's active batch: not completed and not past
+    expires_at. Served by the (user1_id, user2_id, completed, expires_at) index.
+    """
+    return {
+        "user1_id": pair[0],
+        "user2_id": pair[1],
+        "completed": False,
+        "expires_at": {"$gt": now or datetime.utcnow()},
+    }
+
+
+def expire_batches(db, now=None):
+    """
+    Archive every batch that expired without being completed.
+
+    Expired batches are closed (completed, expired) and given a purge_at date
+    for the TTL index on quiz_batches to delete them after BATCH_RETENTION.
+    Returns the number of batches archived.
+    """
+    now = now or datetime.utcnow()
+    result = db.quiz_batches.update_many(
+        {"completed": False, "expires_at": {"$lte": now}},
+        {
+            "$set": {
+                "completed": True,
+                "expired": True,
+                "purge_at": now + BATCH_RETENTION,
+            }
+        },
+    )
+    return result.modified_count
+
+
+@quiz_bp.cli.command("expire-batches")
+def expire_batches_command():
+    """Archive quiz batches that expired without being completed."""
+    count = expire_batches(mongo.db)
+    click.echo(f"Archived {count} expired batch(es)")
+
+
+def completed_fields(now=None):
+    """
+    $set fields closing a batch; its purge_at lets the TTL index on
+    quiz_batches delete it after BATCH_RETENTION
+    """
+    return {"completed": True, "purge_at": (now or datetime.utcnow()) + BATCH_RETENTION}
+
+
+def batch_question_ids(batch):
+    """Question ids of a batch; older batches embedded full question dicts"""
+    if "question_ids" in batch:
+        return batch["question_ids"]
+    return [q["id"] for q in batch.get("questions", [])]
+
+
+_transactions_supported = None
+
+
+def transactions_supported():
+    """True when connected to a replica set or sharded cluster"""
+    global _transactions_supported
+    if _transactions_supported is None:
+        try:
+            topology = mongo.cx.topology_description.topology_type_name
+        except Exception:
+            return False
+        if topology == "Unknown":
+            # Not connected yet, decide on a later call
+            return False
+        _transactions_supported = topology in ("ReplicaSetWithPrimary", "Sharded")
+    return _transactions_supported
+
+
+def run_atomically(callback):
+    """
+    Run callback(session) inside a multi-document transaction when the server
+    supports it. On a standalone server callback(None) runs directly and relies
+    on the single-document atomicity of each write.
+    """
+    if not transactions_supported():
+        return callback(None)
+    with mongo.cx.start_session() as session:
+        return session.with_transaction(callback)
+
+
+def answered_index(batch, pair, answered=None):
+    """
+    Index of the first question at or after current_index that not both
+    partners have answered. answered maps str(question_id) to the ids of the
+    users who answered it and defaults to the answers recorded on the batch.
+    """
+    question_ids = batch_question_ids(batch)
+    if answered is None:
+        answered = batch.get("answers", {})
+    index = batch.get("current_index", 0)
+    while index < len(question_ids) and all(
+        user_id in answered.get(str(question_ids[index]), ()) for user_id in pair
+    ):
+        index += 1
+    return index
+
+
+def advance_batch(batch, pair, answered=None, session=None):
+    """
+    Move current_index past every leading question both partners have answered.
+
+    answered is passed to answered_index. The update only ever moves the
+    index forward, so concurrent callers cannot undo each other's progress.
+    Returns True if the batch is now complete.
+    """
+    question_ids = batch_question_ids(batch)
+    start = batch.get("current_index", 0)
+    index = answered_index(batch, pair, answered)
+
+    complete = index >= len(question_ids)
+    if index > start:
+        update = {"current_index": index, "completed": complete}
+        if complete:
+            update.update(completed_fields())
+        mongo.db.quiz_batches.update_one(
+            {"_id": batch["_id"], "current_index": {"$lt": index}},
+            {"$set": update},
+            session=session,
+        )
+        if complete:
+            clear_active_batch(pair, batch["_id"], session=session)
+        else:
+            mongo.db.quiz_scores.update_one(
+                {
+                    "user1_id": pair[0],
+                    "user2_id": pair[1],
+                    "active_batch.id": str(batch["_id"]),
+                },
+                {"$max": {"active_batch.current_index": index}},
+                session=session,
+            )
+    return complete
+
+
+def set_active_batch(pair, batch):
+    """Record a new batch as the active one in the pair's status snapshot"""
+    mongo.db.quiz_scores.update_one(
+        {"user1_id": pair[0], "user2_id": pair[1]},
+        {
+            "$set": {
+                "active_batch": {
+                    "id": str(batch["_id"]),
+                    "current_index": batch.get("current_index", 0),
+                    "total": len(batch_question_ids(batch)),
+                    "expires_at": batch["expires_at"],
+                }
+            }
+        },
+        upsert=True,
+    )
+
+
+def clear_active_batch(pair, batch_id, session=None):
+    """Drop a finished batch from the pair's status snapshot"""
+    mongo.db.quiz_scores.update_one(
+        {"user1_id": pair[0], "user2_id": pair[1], "active_batch.id": str(batch_id)},
+        {"$set": {"active_batch": None}},
+        session=session,
+    )
+
+
+def batch_answered_by(batch, pair):
+    """
+    Map str(question_id) to the set of pair members who answered it in the
+    batch, loaded with a single query.
+    """
+    answered = {}
+    responses = mongo.db.quiz_responses.find(
+        {"batch_id": str(batch["_id"]), "user_id": {"$in": list(pair)}},
+        {"question_id": 1, "user_id": 1, "_id": 0},
+    )
+    for response in responses:
+        answered.setdefault(str(response["question_id"]), set()).add(
+            response["user_id"]
+        )
+    return answered
+
+
+def adopt_legacy_answers(batch, session=None):
+    """
+    Give a batch started before answers were kept on it the answers map,
+    built from its quiz_responses. Returns the batch with its answers.
+    """
+    if "answers" in batch:
+        return batch
+    answers = {}
+    responses = mongo.db.quiz_responses.find(
+        {"batch_id": str(batch["_id"])},
+        {"question_id": 1, "user_id": 1, "answer": 1, "_id": 0},
+        session=session,
+    )
+    for response in responses:
+        answers.setdefault(str(response["question_id"]), {})[
+            str(response["user_id"])
+        ] = response["answer"]
+    mongo.db.quiz_batches.update_one(
+        {"_id": batch["_id"], "answers": {"$exists": False}},
+        {"$set": {"answers": answers}},
+        session=session,
+    )
+    return {**batch, "answers": answers}
+
+
+def answered_ids_by_slot(pair, snapshot):
+    """
+    Map "user1"/"user2" to the set of question ids that partner has answered,
+    read from the per-user id sets on the pair's quiz_scores document.
+    Aggregates from before those sets are filled in by backfill-stats.
+    """
+    snapshot = snapshot or {}
+    return {
+        slot: set(snapshot.get(f"{slot}_answered_ids", []))
+        for slot in ("user1", "user2")
+    }
+
+
+def pair_answered_ids(pair):
+    """Ids of every question either partner has answered"""
+    snapshot = mongo.db.quiz_scores.find_one(
+        {"user1_id": pair[0], "user2_id": pair[1]},
+        {"user1_answered_ids": 1, "user2_answered_ids": 1},
+    )
+    answered = answered_ids_by_slot(pair, snapshot)
+    return answered["user1"] | answered["user2"]
 
 
 # Get or create an active batch for a user pair
@@ -1492,32 +415,27 @@ def get_or_create_batch(user_id, partner_id):
     pair = sorted([str(user_id), str(partner_id)])
 
     # Check for existing active batch
-    batch = mongo.db.quiz_batches.find_one(
-        {
-            "user1_id": pair[0],
-            "user2_id": pair[1],
-            "completed": False,
-            "expires_at": {"$gt": datetime.utcnow()},
-        }
-    )
+    batch = mongo.db.quiz_batches.find_one(active_batch_filter(pair))
 
     if batch:
-        return batch
-
-    # Create a new batch with 5 random questions
-    questions = random.sample(QUIZ_QUESTIONS, 5)
+        return adopt_legacy_answers(batch)
 
+    # Create a new batch of random questions the pair has not answered yet,
+    # stored by id only. Once the catalog is exhausted previously answered
+    # questions are mixed back in.
     batch = {
         "user1_id": pair[0],
         "user2_id": pair[1],
-        "questions": questions,
+        "question_ids": CATALOG.sample_ids(BATCH_SIZE, exclude=pair_answered_ids(pair)),
         "created_at": datetime.utcnow(),
-        "expires_at": datetime.utcnow() + timedelta(days=7),
+        "expires_at": datetime.utcnow() + BATCH_TTL,
         "completed": False,
         "current_index": 0,
+        "answers": {},
     }
 
     result = mongo.db.quiz_batches.insert_one(batch)
+    set_active_batch(pair, {**batch, "_id": result.inserted_id})
     # Retrieve the inserted document to return
     return mongo.db.quiz_batches.find_one({"_id": result.inserted_id})
 
@@ -1536,44 +454,26 @@ def get_score():
         if not partner_id:
             return jsonify({"score": 0, "message": "No partner connected"}), 200
 
-        # Get score from database
+        # Single read of the pair's aggregate document
         pair = sorted([str(uid), str(partner_id)])
-        score_doc = mongo.db.quiz_scores.find_one(
-            {"user1_id": pair[0], "user2_id": pair[1]}
+        score_doc = (
+            mongo.db.quiz_scores.find_one({"user1_id": pair[0], "user2_id": pair[1]})
+            or {}
         )
 
-        # Count total responses and matches
-        total_questions = mongo.db.quiz_responses.count_documents({"user_id": uid})
-
-        # Count matches
-        matches = 0
-        user_responses = list(mongo.db.quiz_responses.find({"user_id": uid}))
+        total_questions = score_doc.get(f"{pair_slot(pair, uid)}_answered", 0)
+        matches = score_doc.get("matched", 0)
+        both_answered = score_doc.get("both_answered", 0)
 
-        for resp in user_responses:
-            partner_resp = mongo.db.quiz_responses.find_one(
-                {"user_id": partner_id, "question_id": resp["question_id"]}
-            )
-
-            if partner_resp and partner_resp["answer"] == resp["answer"]:
-                matches += 1
-
-        # Calculate match percentage
+        # Calculate match percentage over questions both partners answered
         match_percent = 0
-        if total_questions > 0:
-            partner_responses = mongo.db.quiz_responses.count_documents(
-                {
-                    "user_id": partner_id,
-                    "question_id": {"$in": [r["question_id"] for r in user_responses]},
-                }
-            )
-
-            if partner_responses > 0:
-                match_percent = round((matches / partner_responses) * 100)
+        if both_answered > 0:
+            match_percent = round((matches / both_answered) * 100)
 
         return (
             jsonify(
                 {
-                    "score": score_doc["score"] if score_doc else 0,
+                    "score": score_doc.get("score", 0),
                     "total_answered": total_questions,
                     "matches": matches,
                     "match_percent": match_percent,
@@ -1594,7 +494,9 @@ def get_status():
 
     try:
         # Get user info
-        user = mongo.db.users.find_one({"_id": ObjectId(uid)})
+        user = mongo.db.users.find_one(
+            {"_id": ObjectId(uid)}, {"partner_id": 1, "partner_name": 1}
+        )
         partner_id = user.get("partner_id", "")
 
         if not partner_id:
@@ -1603,47 +505,49 @@ def get_status():
                 200,
             )
 
-        # Get active batch
         pair = sorted([str(uid), str(partner_id)])
-        batch = mongo.db.quiz_batches.find_one(
-            {"user1_id": pair[0], "user2_id": pair[1], "completed": False}
+        slot = pair_slot(pair, uid)
+        partner_slot = "user2" if slot == "user1" else "user1"
+
+        # Score, answered question ids and active batch all live on the pair's
+        # snapshot document, kept current by answer submission and batch creation
+        snapshot = (
+            mongo.db.quiz_scores.find_one({"user1_id": pair[0], "user2_id": pair[1]})
+            or {}
         )
 
-        # Check for questions answered by partner but not user
-        user_answered = list(
-            mongo.db.quiz_responses.distinct("question_id", {"user_id": uid})
-        )
-
-        partner_answered = list(
-            mongo.db.quiz_responses.distinct("question_id", {"user_id": partner_id})
-        )
-
-        pending_questions = [q for q in partner_answered if q not in user_answered]
-
-        # Get compatibility score
-        score_doc = mongo.db.quiz_scores.find_one(
-            {"user1_id": pair[0], "user2_id": pair[1]}
-        )
+        # Questions answered by partner but not user
+        answered = answered_ids_by_slot(pair, snapshot)
+        pending_questions = answered[partner_slot] - answered[slot]
+
+        if "active_batch" in snapshot:
+            active = snapshot["active_batch"]
+            if active and active["expires_at"] <= datetime.utcnow():
+                active = None
+        else:
+            # Snapshot written before the active batch was tracked
+            batch = mongo.db.quiz_batches.find_one(active_batch_filter(pair))
+            active = batch and {
+                "id": str(batch["_id"]),
+                "current_index": batch["current_index"],
+                "total": len(batch_question_ids(batch)),
+            }
 
         return (
             jsonify(
                 {
                     "has_partner": True,
                     "partner_name": user.get("partner_name", "Partner"),
-                    "current_score": score_doc["score"] if score_doc else 0,
-                    "has_active_batch": batch is not None,
+                    "current_score": snapshot.get("score", 0),
+                    "has_active_batch": active is not None,
                     "pending_questions": len(pending_questions),
                     "batch_info": (
                         {
-                            "id": str(batch["_id"]) if batch else None,
-                            "progress": (
-                                f"{batch['current_index']}/{len(batch['questions'])}"
-                                if batch
-                                else "0/0"
-                            ),
-                            "completed": batch["completed"] if batch else False,
+                            "id": active["id"],
+                            "progress": f"{active['current_index']}/{active['total']}",
+                            "completed": False,
                         }
-                        if batch
+                        if active
                         else None
                     ),
                 }
@@ -1675,7 +579,7 @@ def get_batch():
             jsonify(
                 {
                     "batch_id": str(batch["_id"]),
-                    "total_questions": len(batch["questions"]),
+                    "total_questions": len(batch_question_ids(batch)),
                     "current_index": batch["current_index"],
                     "completed": batch["completed"],
                     "expires_at": batch["expires_at"].isoformat(),
@@ -1704,8 +608,7 @@ def create_new_batch():
         # Mark existing batches as completed
         pair = sorted([str(uid), str(partner_id)])
         mongo.db.quiz_batches.update_many(
-            {"user1_id": pair[0], "user2_id": pair[1], "completed": False},
-            {"$set": {"completed": True}},
+            active_batch_filter(pair), {"$set": completed_fields()}
         )
 
         # Create new batch
@@ -1716,7 +619,7 @@ def create_new_batch():
                 {
                     "message": "New batch created",
                     "batch_id": str(batch["_id"]),
-                    "total_questions": len(batch["questions"]),
+                    "total_questions": len(batch_question_ids(batch)),
                 }
             ),
             200,
@@ -1733,48 +636,63 @@ def get_question():
 
     try:
         # Get user info
-        user = mongo.db.users.find_one({"_id": ObjectId(uid)})
+        user = mongo.db.users.find_one({"_id": ObjectId(uid)}, {"partner_id": 1})
         partner_id = user.get("partner_id", "")
 
         if not partner_id:
             return jsonify({"error": "No partner connected"}), 400
 
+        pair = sorted([str(uid), str(partner_id)])
+
         # Get active batch
         batch = get_or_create_batch(uid, partner_id)
 
+        question_ids = batch_question_ids(batch)
+
         # Check if batch is complete
-        if batch["current_index"] >= len(batch["questions"]):
+        if batch["current_index"] >= len(question_ids):
             mongo.db.quiz_batches.update_one(
-                {"_id": batch["_id"]}, {"$set": {"completed": True}}
+                {"_id": batch["_id"]}, {"$set": completed_fields()}
             )
+            clear_active_batch(pair, batch["_id"])
             return jsonify({"message": "Batch completed", "completed": True}), 200
 
-        # Get current question
-        current_q = batch["questions"][batch["current_index"]]
+        # Skip questions this user has already answered, then move the shared
+        # index past the ones both partners have answered
+        answered = batch_answered_by(batch, pair)
+        advance_batch(batch, pair, answered)
 
-        # Check if user has already answered this question
-        existing_answer = mongo.db.quiz_responses.find_one(
-            {"user_id": uid, "question_id": current_q["id"]}
-        )
+        index = batch["current_index"]
+        while index < len(question_ids) and uid in answered.get(
+            str(question_ids[index]), ()
+        ):
+            index += 1
 
-        if existing_answer:
-            # Move to next question if already answered
-            mongo.db.quiz_batches.update_one(
-                {"_id": batch["_id"]}, {"$inc": {"current_index": 1}}
+        if index >= len(question_ids):
+            # This user is done; the batch completes once the partner catches up
+            return (
+                jsonify(
+                    {
+                        "message": "Batch completed",
+                        "completed": True,
+                        "waiting_for_partner": True,
+                    }
+                ),
+                200,
             )
-            # Recursive call to get next question
-            return get_question()
+
+        current_q = CATALOG.get(question_ids[index])
 
         # Return the current question
         return (
             jsonify(
                 {
-                    "id": current_q["id"],
-                    "question": current_q["text"],
-                    "options": current_q["options"],
+                    "id": current_q.id,
+                    "question": current_q.text,
+                    "options": list(current_q.options),
                     "batch_progress": {
-                        "current": batch["current_index"] + 1,
-                        "total": len(batch["questions"]),
+                        "current": index + 1,
+                        "total": len(question_ids),
                     },
                 }
             ),
@@ -1798,38 +716,147 @@ def submit_answer():
     if not question_id or answer is None:
         return jsonify({"message": "question_id and answer required"}), 400
 
+    try:
+        question_id = int(question_id)
+    except (TypeError, ValueError):
+        return jsonify({"message": "question_id must be an integer"}), 400
+
     try:
         # Get user info
-        user = mongo.db.users.find_one({"_id": ObjectId(uid)})
+        user = mongo.db.users.find_one({"_id": ObjectId(uid)}, {"partner_id": 1})
         partner_id = user.get("partner_id", "")
 
         if not partner_id:
             return jsonify({"error": "No partner connected"}), 400
 
-        # Get active batch
         pair = sorted([str(uid), str(partner_id)])
-        batch = mongo.db.quiz_batches.find_one(
-            {"user1_id": pair[0], "user2_id": pair[1], "completed": False}
-        )
+        answer_field = f"answers.{question_id}.{uid}"
+        in_batch = {
+            "$or": [{"question_ids": question_id}, {"questions.id": question_id}]
+        }
 
-        if not batch:
-            return jsonify({"error": "No active question batch"}), 400
-
-        # Save response
-        mongo.db.quiz_responses.insert_one(
-            {
-                "user_id": uid,
-                "question_id": question_id,
-                "answer": answer,
-                "created_at": datetime.utcnow(),
-                "batch_id": str(batch["_id"]),
-            }
-        )
+        # When this is the current question and the partner already answered
+        # it, the same write moves the batch on to the next question
+        current_index = {"$ifNull": ["$current_index", 0]}
+        next_index = {"$add": [current_index, 1]}
+        advance = {
+            "$and": [
+                {
+                    "$ne": [
+                        {"$ifNull": [f"$answers.{question_id}.{partner_id}", None]},
+                        None,
+                    ]
+                },
+                {
+                    "$eq": [
+                        {"$arrayElemAt": ["$question_ids", current_index]},
+                        question_id,
+                    ]
+                },
+            ]
+        }
+        record = {
+            answer_field: {"$literal": answer},
+            "current_index": {"$cond": [advance, next_index, current_index]},
+            "completed": {
+                "$cond": [
+                    advance,
+                    {
+                        "$gte": [
+                            next_index,
+                            {"$size": {"$ifNull": ["$question_ids", []]}},
+                        ]
+                    },
+                    "$completed",
+                ]
+            },
+        }
 
-        # Check if partner has answered
-        partner_resp = mongo.db.quiz_responses.find_one(
-            {"user_id": partner_id, "question_id": question_id}
-        )
+        def record_answer(session):
+            # Record the answer on the active batch. The returned document shows
+            # whether the partner had already answered, so exactly one of two
+            # concurrent submissions sees both answers and applies the score.
+            batch = mongo.db.quiz_batches.find_one_and_update(
+                {
+                    **active_batch_filter(pair),
+                    **in_batch,
+                    "answers": {"$exists": True},
+                    answer_field: {"$exists": False},
+                },
+                [{"$set": record}],
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+            if not batch:
+                return None
+
+            mongo.db.quiz_responses.insert_one(
+                {
+                    "user_id": uid,
+                    "question_id": question_id,
+                    "answer": answer,
+                    "created_at": datetime.utcnow(),
+                    "batch_id": str(batch["_id"]),
+                },
+                session=session,
+            )
+
+            partner_answer = batch["answers"][str(question_id)].get(str(partner_id))
+            is_match = None if partner_answer is None else partner_answer == answer
+
+            if is_match is not None:
+                index = answered_index(batch, pair)
+                if index > batch.get("current_index", 0):
+                    # Answered out of order, or a batch from before
+                    # question_ids: the write above only passes the current one
+                    complete = index >= len(batch_question_ids(batch))
+                    mongo.db.quiz_batches.update_one(
+                        {"_id": batch["_id"], "current_index": {"$lt": index}},
+                        {"$set": {"current_index": index, "completed": complete}},
+                        session=session,
+                    )
+                    batch = {**batch, "current_index": index, "completed": complete}
+
+            if batch.get("completed") and "purge_at" not in batch:
+                # This answer completed the batch
+                mongo.db.quiz_batches.update_one(
+                    {"_id": batch["_id"]},
+                    {"$set": completed_fields()},
+                    session=session,
+                )
+
+            stats = update_pair_stats(
+                pair,
+                uid,
+                is_match,
+                question_id=question_id,
+                batch=batch,
+                session=session,
+            )
+            return is_match, stats, bool(batch.get("completed"))
+
+        result = run_atomically(record_answer)
+
+        if result is None:
+            # Either there is no active batch, the question is not in it, this
+            # answer was already recorded, or the batch was started before
+            # answers were kept on it
+            batch = mongo.db.quiz_batches.find_one(
+                active_batch_filter(pair),
+                {"question_ids": 1, "questions.id": 1, "answers": 1},
+            )
+            if batch and "answers" not in batch:
+                adopt_legacy_answers(batch)
+                result = run_atomically(record_answer)
+
+        if result is None:
+            if not batch:
+                return jsonify({"error": "No active question batch"}), 400
+            if question_id not in batch_question_ids(batch):
+                return jsonify({"error": "Question is not in the active batch"}), 400
+            return jsonify({"error": "Answer already submitted"}), 409
+
+        is_match, stats, batch_complete = result
 
         # Initialize response data
         response_data = {
@@ -1842,46 +869,15 @@ def submit_answer():
         }
 
         # If partner has answered this question
-        if partner_resp:
-            is_match = partner_resp["answer"] == answer
-            delta = 5 if is_match else -2
-
-            # Update response data
+        if is_match is not None:
             response_data["waiting_for_partner"] = False
             response_data["is_match"] = is_match
-            response_data["delta"] = delta
+            response_data["delta"] = MATCH_DELTA if is_match else MISMATCH_DELTA
+            response_data["new_score"] = stats["score"]
+            response_data["batch_complete"] = batch_complete
 
-            # Update compatibility score
-            score_doc = mongo.db.quiz_scores.find_one(
-                {"user1_id": pair[0], "user2_id": pair[1]}
-            )
-
-            if score_doc:
-                new_score = max(0, score_doc["score"] + delta)
-                mongo.db.quiz_scores.update_one(
-                    {"user1_id": pair[0], "user2_id": pair[1]},
-                    {"$set": {"score": new_score}},
-                )
-            else:
-                new_score = max(0, delta)
-                mongo.db.quiz_scores.insert_one(
-                    {"user1_id": pair[0], "user2_id": pair[1], "score": new_score}
-                )
-
-            response_data["new_score"] = new_score
-
-            # Move to next question in batch
-            mongo.db.quiz_batches.update_one(
-                {"_id": batch["_id"]}, {"$inc": {"current_index": 1}}
-            )
-
-            # Check if batch is complete
-            updated_batch = mongo.db.quiz_batches.find_one({"_id": batch["_id"]})
-            if updated_batch["current_index"] >= len(batch["questions"]):
-                mongo.db.quiz_batches.update_one(
-                    {"_id": batch["_id"]}, {"$set": {"completed": True}}
-                )
-                response_data["batch_complete"] = True
+        # Wake up the partner if they are waiting on this question
+        answer_notifier.notify((tuple(pair), question_id))
 
         return jsonify(response_data), 200
     except Exception as e:
@@ -1918,23 +914,21 @@ def get_batch_results(batch_id):
             mongo.db.quiz_responses.find({"user_id": partner_id, "batch_id": batch_id})
         )
 
-        # Format results
+        user_answers = {r["question_id"]: r["answer"] for r in user_responses}
+        partner_answers = {r["question_id"]: r["answer"] for r in partner_responses}
+
+        # Format results, taking the question text from the catalog
         results = []
 
-        for q in batch["questions"]:
-            user_answer = next(
-                (r["answer"] for r in user_responses if r["question_id"] == q["id"]),
-                None,
-            )
-            partner_answer = next(
-                (r["answer"] for r in partner_responses if r["question_id"] == q["id"]),
-                None,
-            )
+        for question_id in batch_question_ids(batch):
+            q = CATALOG.get(question_id)
+            user_answer = user_answers.get(question_id)
+            partner_answer = partner_answers.get(question_id)
 
-            if user_answer is not None and partner_answer is not None:
+            if q and user_answer is not None and partner_answer is not None:
                 results.append(
                     {
-                        "question": q["text"],
+                        "question": q.text,
                         "your_answer": user_answer,
                         "partner_answer": partner_answer,
                         "match": user_answer == partner_answer,
@@ -1951,15 +945,66 @@ def get_batch_results(batch_id):
 @quiz_bp.route("/question/<int:question_id>", methods=["GET"])
 @jwt_required()
 def get_question_by_id(question_id):
-    # Return a random question for compatibility
-    q = random.choice(QUIZ_QUESTIONS)
+    q = CATALOG.get(question_id)
+    if not q:
+        return jsonify({"error": "Question not found"}), 404
     return (
-        jsonify({"id": question_id, "question": q["text"], "options": q["options"]}),
+        jsonify({"id": q.id, "question": q.text, "options": list(q.options)}),
         200,
     )
 
 
-# Add this endpoint to your quiz.py file
+def partner_response_payload(uid, partner_id, question_id):
+    """Build the check-partner-response payload for one question"""
+    pair = sorted([str(uid), str(partner_id)])
+
+    # The latest batch in which the user answered this question
+    batch = mongo.db.quiz_batches.find_one(
+        {
+            "user1_id": pair[0],
+            "user2_id": pair[1],
+            f"answers.{question_id}.{uid}": {"$exists": True},
+        },
+        sort=[("created_at", -1)],
+    )
+    if batch is None:
+        # The answer may sit in quiz_responses of a batch started before
+        # answers were kept on it
+        legacy = mongo.db.quiz_batches.find_one(
+            {**active_batch_filter(pair), "answers": {"$exists": False}}
+        )
+        if legacy:
+            legacy = adopt_legacy_answers(legacy)
+            if str(uid) in legacy["answers"].get(str(question_id), {}):
+                batch = legacy
+    answers = batch["answers"][str(question_id)] if batch else {}
+
+    if str(partner_id) not in answers:
+        # Partner hasn't answered yet
+        return {"has_answered": False}
+
+    # Both have answered, check for match
+    is_match = answers[str(partner_id)] == answers[str(uid)]
+    delta = MATCH_DELTA if is_match else MISMATCH_DELTA
+
+    # Get current score
+    score_doc = mongo.db.quiz_scores.find_one(
+        {"user1_id": pair[0], "user2_id": pair[1]}
+    )
+    new_score = score_doc["score"] if score_doc else None
+
+    # Check if batch is complete
+    batch_complete = batch.get("completed", False) or batch.get(
+        "current_index", 0
+    ) >= len(batch_question_ids(batch))
+
+    return {
+        "has_answered": True,
+        "is_match": is_match,
+        "delta": delta,
+        "new_score": new_score,
+        "batch_complete": batch_complete,
+    }
 
 
 @quiz_bp.route("/check-partner-response", methods=["GET"])
@@ -1979,63 +1024,56 @@ def check_partner_response():
         if not partner_id:
             return jsonify({"error": "No partner connected"}), 400
 
-        # Check if partner has answered this question
-        partner_resp = mongo.db.quiz_responses.find_one(
-            {"user_id": partner_id, "question_id": int(question_id)}
-        )
+        payload = partner_response_payload(uid, partner_id, int(question_id))
+        return jsonify(payload), 200
 
-        if not partner_resp:
-            # Partner hasn't answered yet
-            return jsonify({"has_answered": False}), 200
+    except Exception as e:
+        current_app.logger.exception("Error checking partner response: %s", str(e))
+        return jsonify({"error": str(e)}), 500
 
-        # Partner has answered, check if user has answered too
-        user_resp = mongo.db.quiz_responses.find_one(
-            {"user_id": uid, "question_id": int(question_id)}
-        )
 
-        if not user_resp:
-            # User hasn't answered yet (unusual case)
-            return jsonify({"has_answered": False}), 200
+# Long-poll variant of check-partner-response: the request is held open until the
+# partner's answer lands (or the timeout passes) instead of being polled
+@quiz_bp.route("/wait-partner-response", methods=["GET"])
+@jwt_required()
+def wait_partner_response():
+    uid = get_jwt_identity()
+    question_id = request.args.get("question_id")
+
+    if not question_id:
+        return jsonify({"error": "question_id is required"}), 400
 
-        # Both have answered, check for match
-        is_match = partner_resp["answer"] == user_resp["answer"]
-        delta = 5 if is_match else -2
+    try:
+        timeout = float(request.args.get("timeout", LONG_POLL_TIMEOUT))
+    except ValueError:
+        return jsonify({"error": "timeout must be a number"}), 400
+    timeout = max(0.0, min(timeout, LONG_POLL_TIMEOUT))
 
-        # Get active batch
-        pair = sorted([str(uid), str(partner_id)])
-        batch = mongo.db.quiz_batches.find_one(
-            {"user1_id": pair[0], "user2_id": pair[1], "completed": False}
-        )
+    try:
+        # Get user info
+        user = mongo.db.users.find_one({"_id": ObjectId(uid)})
+        partner_id = user.get("partner_id", "")
 
-        # Get or update score
-        score_doc = mongo.db.quiz_scores.find_one(
-            {"user1_id": pair[0], "user2_id": pair[1]}
-        )
-        new_score = None
+        if not partner_id:
+            return jsonify({"error": "No partner connected"}), 400
 
-        if score_doc:
-            new_score = score_doc["score"]
+        question_id = int(question_id)
+        pair = sorted([str(uid), str(partner_id)])
+        deadline = time.monotonic() + timeout
 
-        # Check if batch is complete
-        batch_complete = False
-        if batch:
-            current_index = batch.get("current_index", 0)
-            total_questions = len(batch.get("questions", []))
-            batch_complete = current_index >= total_questions
+        # Listen before the first check so an answer landing in between is not missed
+        with answer_notifier.listen((tuple(pair), question_id)) as listener:
+            payload = partner_response_payload(uid, partner_id, question_id)
+            while not payload["has_answered"]:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                # Re-check on a slow interval for answers handled by other processes
+                listener.wait(min(remaining, LONG_POLL_RECHECK))
+                payload = partner_response_payload(uid, partner_id, question_id)
 
-        return (
-            jsonify(
-                {
-                    "has_answered": True,
-                    "is_match": is_match,
-                    "delta": delta,
-                    "new_score": new_score,
-                    "batch_complete": batch_complete,
-                }
-            ),
-            200,
-        )
+        return jsonify(payload), 200
 
     except Exception as e:
-        current_app.logger.exception("Error checking partner response: %s", str(e))
+        current_app.logger.exception("Error waiting for partner response: %s", str(e))
         return jsonify({"error": str(e)}), 500
@@ -0,0 +1,95 @@
+import time
+from datetime import datetime
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+# Capped collection the API writes to whenever a message is scheduled. The
+# message worker tails it, so it can sleep until its next due message and
+# still wake at once for an earlier one. A tailable cursor works on a
+# standalone mongod, where change streams are not available.
+SIGNALS = "schedule_signals"
+SIGNALS_SIZE_BYTES = 1024 * 1024
+# Longest a read of the signal cursor blocks, and so how far past its timeout
+# a wait can run. The cursor's await time is fixed once it is open, so this
+# stays well under a second to keep due messages from being sent late.
+AWAIT_MS = 200
+
+
+def ensure_signal_collection(db, logger=None):
+    """Create the capped signal collection if it does not exist yet"""
+    try:
+        db.create_collection(SIGNALS, capped=True, size=SIGNALS_SIZE_BYTES)
+        # A tailable cursor on an empty capped collection dies immediately
+        db[SIGNALS].insert_one({"created_at": datetime.utcnow()})
+    except CollectionInvalid:
+        pass
+    except (PyMongoError, NotImplementedError) as e:
+        if logger:
+            logger.error("Could not create %s: %s", SIGNALS, e)
+
+
+def signal_scheduled(db, scheduled_time):
+    """Tell waiting workers a message was scheduled for scheduled_time"""
+    db[SIGNALS].insert_one(
+        {"scheduled_time": scheduled_time, "created_at": datetime.utcnow()}
+    )
+
+
+class ScheduleListener:
+    """
+    Waits for schedule signals written after the listener was created.
+    Signals arriving while nobody waits are picked up by the next wait().
+
+    One tailable cursor follows the collection in natural (insertion) order
+    for the listener's lifetime. Filtering on _id instead would miss signals:
+    ObjectIds from different API processes are not ordered by insertion.
+
+    Without a usable signal collection (mongomock, or a collection dropped
+    while running) wait() degrades to a plain sleep.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._cursor = None
+        try:
+            self._open()
+        except (PyMongoError, NotImplementedError, AttributeError):
+            pass
+
+    def _open(self):
+        """Tail the signal collection from its end, past the signals in it"""
+        self._cursor = (
+            self.db[SIGNALS]
+            .find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+            .max_await_time_ms(AWAIT_MS)
+        )
+        while self._cursor.alive and self._cursor.try_next() is not None:
+            pass
+
+    def wait(self, timeout):
+        """
+        Block for up to timeout seconds; returns True as soon as a message is
+        scheduled, False when the time ran out.
+        """
+        deadline = time.monotonic() + timeout
+        try:
+            # A cursor dies when its position is overwritten in the capped
+            # collection or the collection is dropped. Signals may have been
+            # missed meanwhile, so a reopened cursor counts as one.
+            missed = self._cursor is not None and not self._cursor.alive
+            if self._cursor is None or missed:
+                self._open()
+            if missed and self._cursor.alive:
+                return True
+            while self._cursor.alive and time.monotonic() < deadline:
+                if self._cursor.try_next() is not None:
+                    return True
+        except (PyMongoError, NotImplementedError, AttributeError):
+            # AttributeError: stand-ins such as mongomock lack awaitable cursors
+            self._cursor = None
+
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        return False
@@ -0,0 +1,327 @@
+"""
+Quiz throughput benchmark.
+
+Seeds synthetic couples and drives the quiz cycle (batch -> question -> answer
+-> check-partner-response) through the Flask test client from several threads,
+then reports latency percentiles and MongoDB operations per request for each
+endpoint.
+
+    python benchmarks/quiz_benchmark.py --couples 50 --threads 8 --batches 2
+    python benchmarks/quiz_benchmark.py --mongo-uri mongodb://localhost:27017
+
+Without --mongo-uri the benchmark runs against an in-process mongomock
+database. mongomock is not thread-safe, so its operations are serialized and
+latencies under contention are pessimistic; use a local mongod to size
+hardware. With --mongo-uri the benchmark drops and reseeds the --database
+database (quiz_benchmark by default), so never point it at real data.
+"""
+
+import argparse
+import importlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from bson.objectid import ObjectId
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class OperationCounter:
+    """Counts database operations issued by the current thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.count = 0
+
+    def add(self):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    @property
+    def count(self):
+        return getattr(self._local, "count", 0)
+
+
+class CountingCollection:
+    """Collection proxy that counts every call, optionally one at a time"""
+
+    def __init__(self, collection, counter, lock=None):
+        self._collection = collection
+        self._counter = counter
+        self._lock = lock
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._counter.add()
+            if self._lock is None:
+                return attr(*args, **kwargs)
+            with self._lock:
+                result = attr(*args, **kwargs)
+                # Drain cursors while holding the lock
+                if name in ("find", "aggregate"):
+                    result = list(result)
+                return result
+
+        return call
+
+
+class CountingDatabase:
+    def __init__(self, db, counter, lock=None):
+        self._db = db
+        self._counter = counter
+        self._lock = lock
+
+    def __getattr__(self, name):
+        return CountingCollection(getattr(self._db, name), self._counter, self._lock)
+
+    def __getitem__(self, name):
+        return self.__getattr__(name)
+
+
+def import_app_modules(*names):
+    """
+    Import modules of the app package, e.g. "app.routes.quiz". Importing the
+    package creates the Flask app, which would connect to MONGO_URI and seed
+    it on import, so PyMongo is stubbed the same way tests/test_api.py does
+    it on every backend. The benchmarks hand their own client to the code
+    they measure.
+    """
+    with patch("flask_pymongo.PyMongo"):
+        return [importlib.import_module(name) for name in names]
+
+
+def connect(mongo_uri, database):
+    """Return (raw db, client-like object, lock) for the chosen backend"""
+    if mongo_uri:
+        from pymongo import MongoClient
+
+        client = MongoClient(mongo_uri)
+        client.drop_database(database)
+        return client[database], client, None
+
+    import mongomock
+
+    client = mongomock.MongoClient()
+    cx = SimpleNamespace(
+        topology_description=SimpleNamespace(topology_type_name="Single")
+    )
+    return client[database], cx, threading.RLock()
+
+
+def seed_couples(db, count):
+    """Insert count connected couples, returning [(user_id, partner_id), ...]"""
+    couples = []
+    users = []
+    for i in range(count):
+        user_id, partner_id = ObjectId(), ObjectId()
+        users.append(
+            {
+                "_id": user_id,
+                "name": f"User {i}a",
+                "email": f"user{i}a@benchmark.local",
+                "partner_id": str(partner_id),
+                "partner_name": f"User {i}b",
+            }
+        )
+        users.append(
+            {
+                "_id": partner_id,
+                "name": f"User {i}b",
+                "email": f"user{i}b@benchmark.local",
+                "partner_id": str(user_id),
+                "partner_name": f"User {i}a",
+            }
+        )
+        couples.append((str(user_id), str(partner_id)))
+    db.users.insert_many(users)
+    return couples
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Recorder:
+    """Collects (latency, operations) samples per endpoint"""
+
+    def __init__(self, counter):
+        self._counter = counter
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, label, request, *args, **kwargs):
+        self._counter.reset()
+        started = time.perf_counter()
+        response = request(*args, **kwargs)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.samples[label].append((elapsed, self._counter.count))
+            if response.status_code >= 400:
+                self.errors[label] += 1
+        return response
+
+    def report(self):
+        rows = {}
+        for label, samples in sorted(self.samples.items()):
+            latencies = [s[0] * 1000 for s in samples]
+            rows[label] = {
+                "requests": len(samples),
+                "errors": self.errors[label],
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "ops_per_request": round(sum(s[1] for s in samples) / len(samples), 2),
+            }
+        return rows
+
+
+def play_couple(app, recorder, tokens, batches):
+    """Play batches full quiz batches for one couple, partners taking turns"""
+    client = app.test_client()
+    headers = [{"Authorization": f"Bearer {token}"} for token in tokens]
+
+    for _ in range(batches):
+        batch = recorder.call(
+            "GET /batch", client.get, "/api/quiz/batch", headers=headers[0]
+        ).get_json()
+        # Once a batch completes the next /question call starts a new one, so
+        # play exactly the questions of this batch
+        for _ in range(batch["total_questions"]):
+            question = None
+            for h in headers:
+                question = recorder.call(
+                    "GET /question", client.get, "/api/quiz/question", headers=h
+                ).get_json()
+                recorder.call(
+                    "POST /answer",
+                    client.post,
+                    "/api/quiz/answer",
+                    json={
+                        "question_id": question["id"],
+                        "answer": question["options"][0],
+                    },
+                    headers=h,
+                )
+            recorder.call(
+                "GET /check-partner-response",
+                client.get,
+                f"/api/quiz/check-partner-response?question_id={question['id']}",
+                headers=headers[0],
+            )
+
+
+def run_benchmark(couples=20, threads=4, batches=1, mongo_uri=None, database=None):
+    """Run the benchmark and return the per-endpoint report"""
+    quiz, indexes = import_app_modules("app.routes.quiz", "app.indexes")
+
+    raw_db, cx, lock = connect(mongo_uri, database or "quiz_benchmark")
+    indexes.ensure_indexes(raw_db)
+    pairs = seed_couples(raw_db, couples)
+
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = "quiz-benchmark-signing-key-0123456789"
+    app.register_blueprint(quiz.quiz_bp, url_prefix="/api/quiz")
+    JWTManager(app)
+    with app.app_context():
+        tokens = [
+            (create_access_token(identity=a), create_access_token(identity=b))
+            for a, b in pairs
+        ]
+
+    counter = OperationCounter()
+    recorder = Recorder(counter)
+    fake_mongo = SimpleNamespace(db=CountingDatabase(raw_db, counter, lock), cx=cx)
+    pending = list(tokens)
+    pending_lock = threading.Lock()
+
+    def worker():
+        while True:
+            with pending_lock:
+                if not pending:
+                    return
+                couple = pending.pop()
+            play_couple(app, recorder, couple, batches)
+
+    with patch.object(quiz, "mongo", fake_mongo), patch.object(
+        quiz, "_transactions_supported", None
+    ):
+        started = time.perf_counter()
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(s) for s in recorder.samples.values())
+    return {
+        "backend": "mongod" if mongo_uri else "mongomock",
+        "couples": couples,
+        "threads": threads,
+        "batches": batches,
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(total / elapsed, 1) if elapsed else None,
+        "endpoints": recorder.report(),
+    }
+
+
+def print_report(result):
+    print(
+        f"{result['backend']}: {result['couples']} couples, {result['threads']} "
+        f"threads, {result['batches']} batch(es) each, {result['seconds']}s, "
+        f"{result['requests_per_second']} req/s"
+    )
+    header = f"{'endpoint':<30}{'requests':>9}{'errors':>8}"
+    header += f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'ops/req':>9}"
+    print(header)
+    for label, row in result["endpoints"].items():
+        print(
+            f"{label:<30}{row['requests']:>9}{row['errors']:>8}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+            f"{row['ops_per_request']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--couples", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--batches", type=int, default=1, help="batches per couple")
+    parser.add_argument("--mongo-uri", help="benchmark a mongod instead of mongomock")
+    parser.add_argument("--database", default="quiz_benchmark")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        couples=args.couples,
+        threads=args.threads,
+        batches=args.batches,
+        mongo_uri=args.mongo_uri,
+        database=args.database,
+    )
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Message search benchmark.
+
+Seeds a synthetic message corpus spread over many couples, with words drawn
+from a Zipf distribution so a few words are very common, then times
+conversation-scoped searches (search plus highlighting of the returned page)
+and reports latency percentiles against a target.
+
+    python benchmarks/search_benchmark.py --messages 1000000 --couples 500
+    python benchmarks/search_benchmark.py --mongo-uri mongodb://localhost:27017
+
+Without --mongo-uri the corpus goes straight into the in-process inverted
+index (the MESSAGE_SEARCH=memory backend). With --mongo-uri it is inserted
+into the --database database (search_benchmark by default), which is dropped
+and reseeded, and searched through the text index.
+"""
+
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.quiz_benchmark import import_app_modules, percentile
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "be", "da", "fu", "go"]
+
+
+def make_vocabulary(size, rng):
+    """size distinct made-up words of two to four syllables"""
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+class ZipfSampler:
+    """Draws words with probability proportional to 1 / rank"""
+
+    def __init__(self, words, rng):
+        self.words = words
+        self.rng = rng
+        self.cumulative = list(
+            itertools.accumulate(1 / rank for rank in range(1, len(words) + 1))
+        )
+
+    def sample(self):
+        point = self.rng.random() * self.cumulative[-1]
+        return self.words[bisect.bisect(self.cumulative, point)]
+
+
+def generate_messages(count, couples, sampler, conversation_key, rng):
+    """Yield count messages spread evenly over couples conversations"""
+    pairs = [(str(ObjectId()), str(ObjectId())) for _ in range(couples)]
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        sender, receiver = pairs[i % couples]
+        if rng.random() < 0.5:
+            sender, receiver = receiver, sender
+        yield {
+            "_id": ObjectId(),
+            "content": " ".join(sampler.sample() for _ in range(rng.randint(3, 15))),
+            "sender_id": sender,
+            "receiver_id": receiver,
+            "conversation": conversation_key(sender, receiver),
+            "created_at": start + timedelta(seconds=i),
+            "is_read": True,
+        }
+
+
+def build_backend(messages, search_module, mongo_uri, database):
+    """Load the corpus into the chosen backend and return it"""
+    if not mongo_uri:
+        backend = search_module.InvertedIndexSearch()
+        for message in messages:
+            backend.add(message)
+        return backend
+
+    from pymongo import MongoClient
+
+    [indexes] = import_app_modules("app.indexes")
+
+    client = MongoClient(mongo_uri)
+    client.drop_database(database)
+    db = client[database]
+    batch = []
+    for message in messages:
+        batch.append(message)
+        if len(batch) == 10000:
+            db.messages.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.messages.insert_many(batch, ordered=False)
+    indexes.ensure_indexes(db)
+    return search_module.TextIndexSearch(db)
+
+
+def run_benchmark(
+    messages=200000,
+    couples=200,
+    queries=500,
+    limit=20,
+    target_ms=50,
+    mongo_uri=None,
+    database=None,
+    seed=1,
+):
+    """Run the benchmark and return the report"""
+    search_module, store_module = import_app_modules(
+        "app.message_search", "app.message_store"
+    )
+    rng = random.Random(seed)
+    sampler = ZipfSampler(make_vocabulary(5000, rng), rng)
+
+    started = time.perf_counter()
+    corpus = generate_messages(
+        messages, couples, sampler, store_module.conversation_key, rng
+    )
+    conversations = set()
+
+    def tracked(corpus):
+        for message in corpus:
+            conversations.add(message["conversation"])
+            yield message
+
+    backend = build_backend(
+        tracked(corpus), search_module, mongo_uri, database or "search_benchmark"
+    )
+    load_seconds = time.perf_counter() - started
+    conversations = sorted(conversations)
+
+    latencies = []
+    hits = []
+    for _ in range(queries):
+        conversation = rng.choice(conversations)
+        terms = [sampler.sample() for _ in range(rng.randint(1, 2))]
+        started = time.perf_counter()
+        page, _ = backend.search(conversation, terms, 0, limit)
+        for message in page:
+            search_module.highlights(message["content"], terms)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits.append(len(page))
+
+    p95 = percentile(latencies, 95)
+    return {
+        "backend": "text index" if mongo_uri else "in-process index",
+        "messages": messages,
+        "couples": couples,
+        "messages_per_conversation": messages // couples,
+        "load_seconds": round(load_seconds, 1),
+        "queries": queries,
+        "mean_hits": round(sum(hits) / len(hits), 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "target_ms": target_ms,
+        "within_target": p95 <= target_ms,
+    }
+
+
+def print_report(result):
+    print(
+        f"{result['backend']}: {result['messages']} messages in {result['couples']} "
+        f"conversations (~{result['messages_per_conversation']} each), "
+        f"loaded in {result['load_seconds']}s"
+    )
+    print(
+        f"{result['queries']} queries, {result['mean_hits']} hits on average: "
+        f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+        f"p99 {result['p99_ms']} ms"
+    )
+    verdict = "within" if result["within_target"] else "OVER"
+    print(f"p95 is {verdict} the {result['target_ms']} ms target")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--couples", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20, help="results per search")
+    parser.add_argument("--target-ms", type=float, default=50)
+    parser.add_argument("--mongo-uri", help="benchmark a mongod text index")
+    parser.add_argument("--database", default="search_benchmark")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        messages=args.messages,
+        couples=args.couples,
+        queries=args.queries,
+        limit=args.limit,
+        target_ms=args.target_ms,
+        mongo_uri=args.mongo_uri,
+        database=args.database,
+    )
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    sys.exit(0 if result["within_target"] else 1)
+
+
+if __name__ == "__main__":
+    main()
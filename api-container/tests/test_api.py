@@ -67,6 +67,7 @@ with patch("flask_pymongo.PyMongo") as mock_pymongo:
     # Now it's safe to import the app modules
     from app import create_app, mongo, initialize_database
     from app.routes import get_user_by_email, get_user_by_id
+    from app.quiz_catalog import CATALOG
 
     # Replace the mongo instance with our mock
     mongo.db = mock_db
@@ -471,8 +472,11 @@ def test_get_events(client, auth_token):
 def test_create_event(client, auth_token):
     """Test creating a calendar event"""
     # Setup mocks
-    with patch("app.mongo.db.events.insert_one") as mock_insert:
+    with patch("app.mongo.db.events.insert_one") as mock_insert, patch(
+        "app.mongo.db.users.find_one_and_update"
+    ) as mock_user_update, patch("app.mongo.db.users.update_many") as mock_bump:
         mock_insert.return_value = MagicMock(inserted_id="new_event_id")
+        mock_user_update.return_value = {"partner_id": TEST_PARTNER["_id"]}
 
         # Event data
         event_data = {
@@ -495,22 +499,29 @@ def test_create_event(client, auth_token):
         assert data["message"] == "Event created successfully"
         assert "event" in data
 
+        # Both calendars changed
+        assert mock_user_update.call_args[0][1] == {"$inc": {"versions.events": 1}}
+        assert mock_bump.call_args[0] == (
+            {"_id": {"$in": [ObjectId(TEST_PARTNER["_id"])]}},
+            {"$inc": {"versions.events": 1}},
+        )
+
 
 # Message Tests
 def test_get_messages(client, auth_token):
     """Test retrieving messages"""
     # Setup mocks
     with patch("app.mongo.db.messages.find") as mock_find:
-        mock_find.return_value.sort.return_value = [
+        mock_find.return_value.sort.return_value.limit.return_value = [
             {
-                "_id": "msg1",
+                "_id": ObjectId("60d21b4667d1d8992e89f401"),
                 "content": "Test message 1",
                 "sender_id": TEST_USER["_id"],
                 "receiver_id": TEST_PARTNER["_id"],
                 "created_at": datetime.now(),
             },
             {
-                "_id": "msg2",
+                "_id": ObjectId("60d21b4667d1d8992e89f402"),
                 "content": "Test message 2",
                 "sender_id": TEST_PARTNER["_id"],
                 "receiver_id": TEST_USER["_id"],
@@ -528,6 +539,155 @@ def test_get_messages(client, auth_token):
         data = json.loads(response.data)
         assert "messages" in data
         assert len(data["messages"]) == 2
+        assert data["has_more"] is False
+        assert data["next_cursor"]
+        # One extra message is requested to detect further pages
+        mock_find.return_value.sort.return_value.limit.assert_called_once_with(51)
+
+
+def test_get_messages_not_modified(client, auth_token):
+    """Test a matching If-None-Match is answered without querying messages"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    with patch("app.mongo.db.users.find_one") as mock_find_one, patch(
+        "app.mongo.db.messages.find"
+    ) as mock_find:
+        mock_find_one.return_value = {"versions": {"messages": 3}}
+        mock_find.return_value.sort.return_value.limit.return_value = []
+
+        response = client.get("/api/messages/messages", headers=headers)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        mock_find.reset_mock()
+        response = client.get(
+            "/api/messages/messages", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        mock_find.assert_not_called()
+
+        # A new message bumps the version and changes the tag
+        mock_find_one.return_value = {"versions": {"messages": 4}}
+        response = client.get(
+            "/api/messages/messages", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+        # Each page has its own tag
+        response = client.get("/api/messages/messages?limit=10", headers=headers)
+        assert response.headers["ETag"] != etag
+
+
+def test_search_messages(client, auth_token):
+    """Test searching the conversation with the partner"""
+    from app.message_search import InvertedIndexSearch
+    from app.message_store import conversation_key
+
+    index = InvertedIndexSearch()
+    index.add(
+        {
+            "_id": ObjectId("60d21b4667d1d8992e89f401"),
+            "content": "Dinner at 8?",
+            "sender_id": TEST_PARTNER["_id"],
+            "receiver_id": TEST_USER["_id"],
+            "conversation": conversation_key(TEST_USER["_id"], TEST_PARTNER["_id"]),
+            "created_at": datetime(2025, 4, 1, 12, 0),
+        }
+    )
+    connected_user = dict(TEST_USER, partner_id=TEST_PARTNER["_id"])
+
+    with patch("app.routes.message_search", return_value=index), patch(
+        "app.routes.get_user_by_id", return_value=connected_user
+    ):
+        response = client.get(
+            "/api/messages/search?q=dinner",
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["has_more"] is False
+    assert data["next_offset"] is None
+    assert data["results"][0]["content"] == "Dinner at 8?"
+    assert data["results"][0]["highlights"] == [[0, 6]]
+    assert data["results"][0]["cursor"]
+
+
+def test_search_messages_invalid_params(client, auth_token):
+    """Test search parameter validation"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get("/api/messages/search?q=%20", headers=headers)
+    assert response.status_code == 400
+    assert json.loads(response.data)["message"] == "q is required"
+
+    response = client.get("/api/messages/search?q=a&offset=5000", headers=headers)
+    assert response.status_code == 400
+
+    with patch("app.routes.get_user_by_id", return_value=dict(TEST_USER)):
+        response = client.get("/api/messages/search?q=dinner", headers=headers)
+    assert response.status_code == 400
+    assert json.loads(response.data)["message"] == "No conversation to search"
+
+
+def test_get_messages_invalid_params(client, auth_token):
+    """Test message pagination parameter validation"""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get("/api/messages/messages?limit=abc", headers=headers)
+    assert response.status_code == 400
+
+    response = client.get("/api/messages/messages?before=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+    assert json.loads(response.data)["message"] == "Invalid cursor"
+
+
+def test_get_unread_count(client, auth_token):
+    """Test reading the unread counter"""
+    with patch("app.mongo.db.users.find_one") as mock_find_one:
+        mock_find_one.return_value = {"unread_messages": 4}
+
+        response = client.get(
+            "/api/messages/unread-count",
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+
+        assert response.status_code == 200
+        assert json.loads(response.data) == {"unread": 4}
+
+
+def test_mark_read(client, auth_token):
+    """Test marking messages read up to a cursor"""
+    from app.message_store import encode_cursor
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    cursor = encode_cursor(
+        {"_id": ObjectId("60d21b4667d1d8992e89f401"), "created_at": datetime.now()}
+    )
+
+    with patch("app.mongo.db.messages.update_many") as mock_update, patch(
+        "app.mongo.db.users.update_one"
+    ) as mock_user_update:
+        mock_update.return_value = MagicMock(modified_count=2)
+
+        response = client.post(
+            "/api/messages/mark-read", json={"up_to": cursor}, headers=headers
+        )
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["marked"] == 2
+        assert mock_user_update.call_args[0][1] == {"$inc": {"unread_messages": -2}}
+
+    response = client.post("/api/messages/mark-read", json={}, headers=headers)
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/messages/mark-read", json={"up_to": "not-a-cursor"}, headers=headers
+    )
+    assert response.status_code == 400
+    assert json.loads(response.data)["message"] == "Invalid cursor"
 
 
 def test_send_message(client, auth_token):
@@ -556,6 +716,11 @@ def test_send_message(client, auth_token):
             data = json.loads(response.data)
             assert data["message"] == "Message sent successfully"
             assert "data" in data
+            inserted = mock_insert.call_args[0][0]
+            assert inserted["participants"] == sorted(
+                [TEST_USER["_id"], TEST_PARTNER["_id"]]
+            )
+            assert inserted["conversation"] == "|".join(inserted["participants"])
 
 
 def test_send_message_no_partner(client, auth_token):
@@ -609,6 +774,45 @@ def test_schedule_message(client, auth_token):
         assert "data" in data
 
 
+def test_schedule_message_survives_signal_failure(client, auth_token):
+    """The message is stored, so a failed wake-up signal is not an error"""
+    with patch("app.mongo.db.scheduled_messages.insert_one") as mock_insert, patch(
+        "app.routes.signal_scheduled", side_effect=Exception("capped write failed")
+    ) as mock_signal:
+        mock_insert.return_value = MagicMock(inserted_id="new_scheduled_id")
+
+        response = client.post(
+            "/api/messages/schedule",
+            json={
+                "content": "Scheduled test message",
+                "receiverId": TEST_PARTNER["_id"],
+                "scheduledTime": (datetime.now() + timedelta(days=1)).isoformat(),
+            },
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+
+        assert response.status_code == 201
+        mock_signal.assert_called_once()
+
+
+def test_schedule_message_rejects_invalid_receiver(client, auth_token):
+    """A receiverId the worker could never deliver to is refused up front"""
+    with patch("app.mongo.db.scheduled_messages.insert_one") as mock_insert:
+        response = client.post(
+            "/api/messages/schedule",
+            json={
+                "content": "Scheduled test message",
+                "receiverId": "not-an-id",
+                "scheduledTime": (datetime.now() + timedelta(days=1)).isoformat(),
+            },
+            headers={"Authorization": f"Bearer {auth_token}"},
+        )
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["message"] == "Invalid receiverId"
+        mock_insert.assert_not_called()
+
+
 def test_get_scheduled_messages(client, auth_token):
     """Test retrieving scheduled messages"""
     # Setup mocks
@@ -688,7 +892,7 @@ def test_get_daily_question_create_if_missing(client, auth_token):
 
 # Quiz Tests
 def test_get_quiz_score(client, auth_token):
-    """Test retrieving quiz compatibility score"""
+    """Test retrieving quiz compatibility score from the pair aggregate"""
     # Setup mocks
     with patch("app.routes.get_user_by_id") as mock_get_user:
         connected_user = dict(TEST_USER)
@@ -696,59 +900,33 @@ def test_get_quiz_score(client, auth_token):
         mock_get_user.return_value = connected_user
 
         with patch("app.mongo.db.quiz_scores.find_one") as mock_find_score:
-            mock_find_score.return_value = {"score": 65}
-
-            with patch("app.mongo.db.quiz_responses.count_documents") as mock_count:
-                mock_count.side_effect = [3, 3]  # Total questions, partner responses
-
-                with patch("app.mongo.db.quiz_responses.find") as mock_find_responses:
-                    mock_find_responses.return_value = [
-                        {
-                            "question_id": 1,
-                            "answer": "Option A",
-                            "user_id": TEST_USER["_id"],
-                        },
-                        {
-                            "question_id": 2,
-                            "answer": "Option B",
-                            "user_id": TEST_USER["_id"],
-                        },
-                        {
-                            "question_id": 3,
-                            "answer": "Option C",
-                            "user_id": TEST_USER["_id"],
-                        },
-                    ]
+            mock_find_score.return_value = {
+                "score": 65,
+                "user1_answered": 3,
+                "user2_answered": 3,
+                "both_answered": 3,
+                "matched": 2,
+            }
 
-                    with patch(
-                        "app.mongo.db.quiz_responses.find_one"
-                    ) as mock_find_one_response:
-                        # Mock responses for partner's answers
-                        def find_one_side_effect(query):
-                            question_id = query.get("question_id")
-                            if question_id == 1:
-                                return {"answer": "Option A"}  # Match
-                            elif question_id == 2:
-                                return {"answer": "Option X"}  # No match
-                            elif question_id == 3:
-                                return {"answer": "Option C"}  # Match
-                            return None
-
-                        mock_find_one_response.side_effect = find_one_side_effect
+            with patch("app.mongo.db.quiz_responses.find") as mock_find_responses:
+                # Make request
+                response = client.get(
+                    "/api/quiz/score",
+                    headers={"Authorization": f"Bearer {auth_token}"},
+                )
 
-                        # Make request
-                        response = client.get(
-                            "/api/quiz/score",
-                            headers={"Authorization": f"Bearer {auth_token}"},
-                        )
+                # The score is served from the aggregate, not from responses
+                mock_find_responses.assert_not_called()
 
-                        # Verify response
-                        assert response.status_code == 200
-                        data = json.loads(response.data)
-                        assert "score" in data
-                        assert data["score"] == 65
-                        assert "matches" in data
-                        assert data["matches"] == 2  # Two matching answers out of three
+                # Verify response
+                assert response.status_code == 200
+                data = json.loads(response.data)
+                assert "score" in data
+                assert data["score"] == 65
+                assert "matches" in data
+                assert data["matches"] == 2  # Two matching answers out of three
+                assert data["total_answered"] == 3
+                assert data["match_percent"] == 67
 
 
 def test_get_quiz_batch(client, auth_token):
@@ -837,21 +1015,16 @@ def test_get_quiz_question(client, auth_token):
             "user1_id": TEST_USER["_id"],
             "user2_id": TEST_PARTNER["_id"],
             "current_index": 2,
-            "questions": [
-                {"id": 1, "text": "Question 1", "options": ["A", "B"]},
-                {"id": 2, "text": "Question 2", "options": ["C", "D"]},
-                {"id": 3, "text": "Question 3", "options": ["E", "F"]},
-                {"id": 4, "text": "Question 4", "options": ["G", "H"]},
-                {"id": 5, "text": "Question 5", "options": ["I", "J"]},
-            ],
+            "question_ids": [1, 2, 3, 4, 5],
             "completed": False,
+            "answers": {},
         }
 
         mock_find_batch.return_value = test_batch
 
-        with patch("app.mongo.db.quiz_responses.find_one") as mock_find_response:
-            # User hasn't answered current question
-            mock_find_response.return_value = None
+        with patch("app.mongo.db.quiz_responses.find") as mock_find_responses:
+            # Nobody has answered anything in this batch yet
+            mock_find_responses.return_value = []
 
             # Make request
             response = client.get(
@@ -862,42 +1035,34 @@ def test_get_quiz_question(client, auth_token):
             assert response.status_code == 200
             data = json.loads(response.data)
             assert data["id"] == 3
-            assert data["question"] == "Question 3"
-            assert "options" in data
-            assert len(data["options"]) == 2
+            # Question text and options come from the catalog, not the batch
+            assert data["question"] == CATALOG.get(3).text
+            assert data["options"] == list(CATALOG.get(3).options)
             assert "batch_progress" in data
 
 
 def test_get_quiz_question_already_answered(client, auth_token):
     """Test retrieving quiz question - when current one is already answered"""
     # Setup mocks
-    with patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
+    users = patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one)
+    with users, patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
         test_batch = {
             "_id": "batch1",
             "user1_id": TEST_USER["_id"],
             "user2_id": TEST_PARTNER["_id"],
             "current_index": 2,
-            "questions": [
-                {"id": 1, "text": "Question 1", "options": ["A", "B"]},
-                {"id": 2, "text": "Question 2", "options": ["C", "D"]},
-                {"id": 3, "text": "Question 3", "options": ["E", "F"]},
-                {"id": 4, "text": "Question 4", "options": ["G", "H"]},
-                {"id": 5, "text": "Question 5", "options": ["I", "J"]},
-            ],
+            "question_ids": [1, 2, 3, 4, 5],
             "completed": False,
+            "answers": {},
         }
+        mock_find_batch.return_value = test_batch
 
-        # First call gets original batch, second call gets updated batch
-        updated_batch = test_batch.copy()
-        updated_batch["current_index"] = 3
-        mock_find_batch.side_effect = [test_batch, updated_batch]
-
-        with patch("app.mongo.db.quiz_responses.find_one") as mock_find_response:
-            # First find_one indicates user has already answered this question
-            # Second find_one returns None as they haven't answered the next one
-            mock_find_response.side_effect = [
-                {"question_id": 3, "answer": "E"},  # Already answered Q3
-                None,  # Haven't answered Q4 yet
+        with patch("app.mongo.db.quiz_responses.find") as mock_find_responses:
+            # The user answered Q3 and Q4, the partner only Q3
+            mock_find_responses.return_value = [
+                {"question_id": 3, "user_id": TEST_USER["_id"]},
+                {"question_id": 3, "user_id": TEST_PARTNER["_id"]},
+                {"question_id": 4, "user_id": TEST_USER["_id"]},
             ]
 
             with patch("app.mongo.db.quiz_batches.update_one") as mock_update:
@@ -912,113 +1077,206 @@ def test_get_quiz_question_already_answered(client, auth_token):
                 # Verify response
                 assert response.status_code == 200
                 data = json.loads(response.data)
-                assert data["id"] == 4  # Should get question 4, not 3
-                assert data["question"] == "Question 4"
+                assert data["id"] == 5  # Skips Q3 and Q4 without recursing
+                assert data["question"] == CATALOG.get(5).text
+                assert data["batch_progress"]["current"] == 5
+
+                # Answered ids come from a single query
+                mock_find_responses.assert_called_once()
+                # The shared index only moves past Q3, which both answered
+                mock_update.assert_called_once_with(
+                    {"_id": "batch1", "current_index": {"$lt": 3}},
+                    {"$set": {"current_index": 3, "completed": False}},
+                    session=None,
+                )
+
+
+def test_get_quiz_question_waiting_for_partner(client, auth_token):
+    """Test retrieving quiz question - user answered the rest of the batch"""
+    users = patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one)
+    with users, patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
+        mock_find_batch.return_value = {
+            "_id": "batch1",
+            "user1_id": TEST_USER["_id"],
+            "user2_id": TEST_PARTNER["_id"],
+            "current_index": 3,
+            "question_ids": [1, 2, 3, 4, 5],
+            "completed": False,
+            "answers": {},
+        }
+
+        with patch("app.mongo.db.quiz_responses.find") as mock_find_responses:
+            mock_find_responses.return_value = [
+                {"question_id": 4, "user_id": TEST_USER["_id"]},
+                {"question_id": 5, "user_id": TEST_USER["_id"]},
+            ]
+
+            with patch("app.mongo.db.quiz_batches.update_one") as mock_update:
+                response = client.get(
+                    "/api/quiz/question",
+                    headers={"Authorization": f"Bearer {auth_token}"},
+                )
+
+                assert response.status_code == 200
+                data = json.loads(response.data)
+                assert data["completed"] == True
+                assert data["waiting_for_partner"] == True
+                # The batch stays open until the partner catches up
+                mock_update.assert_not_called()
+
+
+def quiz_users_find_one(query, projection=None):
+    """users.find_one stand-in returning the test user connected to the partner"""
+    return {"_id": ObjectId(TEST_USER["_id"]), "partner_id": TEST_PARTNER["_id"]}
 
 
 def test_submit_quiz_answer(client, auth_token):
-    """Test submitting a quiz answer"""
+    """Test submitting a quiz answer after the partner answered"""
     # Setup mocks
-    with patch("app.routes.get_user_by_id") as mock_get_user:
-        connected_user = dict(TEST_USER)
-        connected_user["partner_id"] = TEST_PARTNER["_id"]
-        mock_get_user.return_value = connected_user
-
-        with patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
-            test_batch = {
+    with patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one):
+        with patch(
+            "app.mongo.db.quiz_batches.find_one_and_update"
+        ) as mock_record_answer:
+            # The batch after recording the answer shows the partner's answer
+            # too, and has moved on to the next question in the same write
+            mock_record_answer.return_value = {
                 "_id": "batch1",
-                "user1_id": TEST_USER["_id"],
-                "user2_id": TEST_PARTNER["_id"],
-                "current_index": 2,
-                "questions": [
-                    {"id": 1, "text": "Question 1", "options": ["A", "B"]},
-                    {"id": 2, "text": "Question 2", "options": ["C", "D"]},
-                    {"id": 3, "text": "Question 3", "options": ["E", "F"]},
-                    {"id": 4, "text": "Question 4", "options": ["G", "H"]},
-                    {"id": 5, "text": "Question 5", "options": ["I", "J"]},
-                ],
+                "current_index": 3,
+                "question_ids": [1, 2, 3, 4, 5],
+                "answers": {
+                    "1": {TEST_USER["_id"]: "A", TEST_PARTNER["_id"]: "A"},
+                    "2": {TEST_USER["_id"]: "C", TEST_PARTNER["_id"]: "D"},
+                    "3": {TEST_USER["_id"]: "E", TEST_PARTNER["_id"]: "E"},
+                },
                 "completed": False,
+                "expires_at": datetime(2030, 1, 1),
             }
 
-            # Mock finding the batch before and after increment
-            updated_batch = test_batch.copy()
-            updated_batch["current_index"] = 3
-            mock_find_batch.side_effect = [test_batch, updated_batch]
+            with patch(
+                "app.mongo.db.quiz_scores.find_one_and_update"
+            ) as mock_update_stats:
+                mock_update_stats.return_value = {"score": 75}
 
-            with patch("app.mongo.db.quiz_responses.find_one") as mock_find_response:
-                # Partner's response
-                mock_find_response.return_value = {
-                    "user_id": TEST_PARTNER["_id"],
-                    "question_id": 3,
-                    "answer": "E",  # Same answer as user will submit
-                }
+                with patch("app.mongo.db.quiz_responses.insert_one") as mock_insert:
+                    with patch(
+                        "app.mongo.db.quiz_batches.update_one"
+                    ) as mock_update_batch:
+                        # Make request
+                        response = client.post(
+                            "/api/quiz/answer",
+                            json={"question_id": 3, "answer": "E"},
+                            headers={"Authorization": f"Bearer {auth_token}"},
+                        )
 
-                with patch("app.mongo.db.quiz_scores.find_one") as mock_find_score:
-                    mock_find_score.return_value = {"score": 70}
+                        # Verify response
+                        assert response.status_code == 200
+                        data = json.loads(response.data)
+                        assert data["message"] == "Answer submitted"
+                        assert data["waiting_for_partner"] == False
+                        assert data["is_match"] == True
+                        assert data["delta"] == 5  # Points for a match
+                        assert data["new_score"] == 75
+                        assert data["batch_complete"] == False
+
+                        # The answer is recorded once in the response history
+                        mock_insert.assert_called_once()
+                        # Only answers for the batch's questions are accepted
+                        query = mock_record_answer.call_args[0][0]
+                        assert {"question_ids": 3} in query["$or"]
+                        # No separate write advances the batch or its snapshot
+                        mock_update_batch.assert_not_called()
+                        stats_update = mock_update_stats.call_args[0][1][0]["$set"]
+                        assert "active_batch" in stats_update
+
+
+def test_submit_quiz_answer_out_of_order(client, auth_token):
+    """Answers that resolve later questions move the batch past all of them"""
+    with patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one):
+        with patch(
+            "app.mongo.db.quiz_batches.find_one_and_update"
+        ) as mock_record_answer:
+            # Question 3 resolved while question 2 was still current
+            mock_record_answer.return_value = {
+                "_id": "batch1",
+                "current_index": 1,
+                "question_ids": [1, 2, 3, 4, 5],
+                "answers": {
+                    "1": {TEST_USER["_id"]: "A", TEST_PARTNER["_id"]: "A"},
+                    "2": {TEST_USER["_id"]: "C", TEST_PARTNER["_id"]: "D"},
+                    "3": {TEST_USER["_id"]: "E", TEST_PARTNER["_id"]: "E"},
+                },
+                "completed": False,
+                "expires_at": datetime(2030, 1, 1),
+            }
+
+            with patch(
+                "app.mongo.db.quiz_scores.find_one_and_update"
+            ) as mock_update_stats:
+                mock_update_stats.return_value = {"score": 75}
 
+                with patch("app.mongo.db.quiz_responses.insert_one"):
                     with patch(
-                        "app.mongo.db.quiz_scores.update_one"
-                    ) as mock_update_score:
-                        mock_update_score.return_value = MagicMock(modified_count=1)
-
-                        with patch(
-                            "app.mongo.db.quiz_responses.insert_one"
-                        ) as mock_insert:
-                            mock_insert.return_value = MagicMock(
-                                inserted_id="new_response_id"
-                            )
-
-                            with patch(
-                                "app.mongo.db.quiz_batches.update_one"
-                            ) as mock_update_batch:
-                                mock_update_batch.return_value = MagicMock(
-                                    modified_count=1
-                                )
-
-                                # Make request
-                                response = client.post(
-                                    "/api/quiz/answer",
-                                    json={"question_id": 3, "answer": "E"},
-                                    headers={"Authorization": f"Bearer {auth_token}"},
-                                )
-
-                                # Verify response
-                                assert response.status_code == 200
-                                data = json.loads(response.data)
-                                assert data["message"] == "Answer submitted"
-                                assert data["waiting_for_partner"] == False
-                                assert data["is_match"] == True
-                                assert data["delta"] == 5  # Points for a match
-                                assert "new_score" in data
+                        "app.mongo.db.quiz_batches.update_one"
+                    ) as mock_update_batch:
+                        response = client.post(
+                            "/api/quiz/answer",
+                            json={"question_id": 2, "answer": "C"},
+                            headers={"Authorization": f"Bearer {auth_token}"},
+                        )
+
+                        assert response.status_code == 200
+                        # Only one conditional write advances the batch
+                        mock_update_batch.assert_called_once()
+                        query, update = mock_update_batch.call_args[0]
+                        assert query["current_index"] == {"$lt": 3}
+                        assert update["$set"] == {
+                            "current_index": 3,
+                            "completed": False,
+                        }
+
+
+def test_submit_quiz_answer_question_not_in_batch(client, auth_token):
+    """Questions outside the active batch cannot be answered or scored"""
+    with patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one):
+        with patch(
+            "app.mongo.db.quiz_batches.find_one_and_update", return_value=None
+        ), patch(
+            "app.mongo.db.quiz_batches.find_one",
+            return_value={"_id": "batch1", "question_ids": [1, 2, 3, 4, 5]},
+        ), patch(
+            "app.mongo.db.quiz_scores.find_one_and_update"
+        ) as mock_update_stats:
+            response = client.post(
+                "/api/quiz/answer",
+                json={"question_id": 42, "answer": "E"},
+                headers={"Authorization": f"Bearer {auth_token}"},
+            )
+
+            assert response.status_code == 400
+            assert response.get_json()["error"] == "Question is not in the active batch"
+            mock_update_stats.assert_not_called()
 
 
 def test_submit_quiz_answer_no_partner_response(client, auth_token):
     """Test submitting a quiz answer when partner hasn't answered yet"""
     # Setup mocks
-    with patch("app.routes.get_user_by_id") as mock_get_user:
-        connected_user = dict(TEST_USER)
-        connected_user["partner_id"] = TEST_PARTNER["_id"]
-        mock_get_user.return_value = connected_user
-
-        with patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
-            test_batch = {
+    with patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one):
+        with patch(
+            "app.mongo.db.quiz_batches.find_one_and_update"
+        ) as mock_record_answer:
+            mock_record_answer.return_value = {
                 "_id": "batch1",
-                "user1_id": TEST_USER["_id"],
-                "user2_id": TEST_PARTNER["_id"],
                 "current_index": 2,
-                "questions": [{"id": 3, "text": "Question 3", "options": ["E", "F"]}],
+                "question_ids": [1, 2, 3, 4, 5],
+                "answers": {"3": {TEST_USER["_id"]: "E"}},
                 "completed": False,
+                "expires_at": datetime(2030, 1, 1),
             }
 
-            mock_find_batch.return_value = test_batch
-
-            with patch("app.mongo.db.quiz_responses.find_one") as mock_find_response:
-                # Partner hasn't answered yet
-                mock_find_response.return_value = None
-
-                with patch("app.mongo.db.quiz_responses.insert_one") as mock_insert:
-                    mock_insert.return_value = MagicMock(inserted_id="new_response_id")
+            with patch("app.mongo.db.quiz_responses.insert_one") as mock_insert:
+                mock_insert.return_value = MagicMock(inserted_id="new_response_id")
 
+                with patch("app.mongo.db.quiz_batches.update_one") as mock_update_batch:
                     # Make request
                     response = client.post(
                         "/api/quiz/answer",
@@ -1035,77 +1293,81 @@ def test_submit_quiz_answer_no_partner_response(client, auth_token):
                     # Shouldn't update score yet
                     assert "is_match" not in data or data["is_match"] == False
                     assert "delta" not in data or data["delta"] == 0
+                    mock_update_batch.assert_not_called()
 
 
-def test_check_partner_response(client, auth_token):
-    """Test checking if partner has responded to a quiz question"""
-    # Setup mocks
-    with patch("app.routes.get_user_by_id") as mock_get_user:
-        connected_user = dict(TEST_USER)
-        connected_user["partner_id"] = TEST_PARTNER["_id"]
-        mock_get_user.return_value = connected_user
-
-        with patch("app.mongo.db.quiz_responses.find_one") as mock_find_response:
-            # Partner's response
-            mock_find_response.return_value = {
-                "user_id": TEST_PARTNER["_id"],
-                "question_id": 3,
-                "answer": "E",
-            }
-
-            # User's response (same answer)
-            mock_find_response.return_value = {
-                "user_id": TEST_USER["_id"],
-                "question_id": 3,
-                "answer": "E",  # Same answer as partner
-            }
+def test_submit_quiz_answer_already_submitted(client, auth_token):
+    """Test that a repeated answer is rejected instead of scored twice"""
+    with patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one):
+        with patch(
+            "app.mongo.db.quiz_batches.find_one_and_update"
+        ) as mock_record_answer:
+            # The guard on the answer field did not match
+            mock_record_answer.return_value = None
 
             with patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
-                # Batch info
-                pair = sorted([TEST_USER["_id"], TEST_PARTNER["_id"]])
                 mock_find_batch.return_value = {
-                    "user1_id": pair[0],
-                    "user2_id": pair[1],
-                    "current_index": 3,
-                    "questions": [
-                        {"id": 1},
-                        {"id": 2},
-                        {"id": 3},
-                        {"id": 4},
-                        {"id": 5},
-                    ],
-                    "completed": False,
+                    "_id": "batch1",
+                    "question_ids": [1, 2, 3, 4, 5],
                 }
 
-                with patch("app.mongo.db.quiz_scores.find_one") as mock_find_score:
-                    mock_find_score.return_value = {"score": 75}
-
-                    # Make request
-                    response = client.get(
-                        "/api/quiz/check-partner-response?question_id=3",
+                with patch(
+                    "app.mongo.db.quiz_scores.find_one_and_update"
+                ) as mock_update_stats:
+                    response = client.post(
+                        "/api/quiz/answer",
+                        json={"question_id": 3, "answer": "E"},
                         headers={"Authorization": f"Bearer {auth_token}"},
                     )
 
-                    # Verify response
-                    assert response.status_code == 200
-                    data = json.loads(response.data)
-                    assert data["has_answered"] == True
-                    assert data["is_match"] == True
-                    assert "new_score" in data
-                    assert data["batch_complete"] == False
+                    assert response.status_code == 409
+                    mock_update_stats.assert_not_called()
+
+
+def test_check_partner_response(client, auth_token):
+    """Test checking if partner has responded to a quiz question"""
+    # Setup mocks
+    with patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one):
+        with patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
+            # Batch holding both answers (same answer)
+            pair = sorted([TEST_USER["_id"], TEST_PARTNER["_id"]])
+            mock_find_batch.return_value = {
+                "user1_id": pair[0],
+                "user2_id": pair[1],
+                "current_index": 3,
+                "question_ids": [1, 2, 3, 4, 5],
+                "answers": {"3": {TEST_USER["_id"]: "E", TEST_PARTNER["_id"]: "E"}},
+                "completed": False,
+            }
+
+            with patch("app.mongo.db.quiz_scores.find_one") as mock_find_score:
+                mock_find_score.return_value = {"score": 75}
+
+                # Make request
+                response = client.get(
+                    "/api/quiz/check-partner-response?question_id=3",
+                    headers={"Authorization": f"Bearer {auth_token}"},
+                )
+
+                # Verify response
+                assert response.status_code == 200
+                data = json.loads(response.data)
+                assert data["has_answered"] == True
+                assert data["is_match"] == True
+                assert data["new_score"] == 75
+                assert data["batch_complete"] == False
 
 
 def test_quiz_check_partner_no_answer(client, auth_token):
     """Test checking for partner response when they haven't answered"""
     # Setup mocks
-    with patch("app.routes.get_user_by_id") as mock_get_user:
-        connected_user = dict(TEST_USER)
-        connected_user["partner_id"] = TEST_PARTNER["_id"]
-        mock_get_user.return_value = connected_user
-
-        with patch("app.mongo.db.quiz_responses.find_one") as mock_find_response:
-            # Partner hasn't answered yet
-            mock_find_response.return_value = None
+    with patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one):
+        with patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
+            # Only the user's own answer is recorded
+            mock_find_batch.return_value = {
+                "question_ids": [1, 2, 3, 4, 5],
+                "answers": {"3": {TEST_USER["_id"]: "E"}},
+            }
 
             # Make request
             response = client.get(
@@ -1182,74 +1444,45 @@ def test_quiz_question_by_id(client, auth_token):
 def test_submit_quiz_answer_batch_complete(client, auth_token):
     """Test submitting the last quiz answer in a batch"""
     # Setup mocks
-    with patch("app.routes.get_user_by_id") as mock_get_user:
-        connected_user = dict(TEST_USER)
-        connected_user["partner_id"] = TEST_PARTNER["_id"]
-        mock_get_user.return_value = connected_user
-
-        with patch("app.mongo.db.quiz_batches.find_one") as mock_find_batch:
-            # Last question in batch
-            test_batch = {
+    with patch("app.mongo.db.users.find_one", side_effect=quiz_users_find_one):
+        with patch(
+            "app.mongo.db.quiz_batches.find_one_and_update"
+        ) as mock_record_answer:
+            # Last question in batch, every other question already resolved
+            both = lambda answer: {
+                TEST_USER["_id"]: answer,
+                TEST_PARTNER["_id"]: answer,
+            }
+            mock_record_answer.return_value = {
                 "_id": "batch1",
-                "user1_id": TEST_USER["_id"],
-                "user2_id": TEST_PARTNER["_id"],
                 "current_index": 4,  # Last question (0-indexed)
-                "questions": [
-                    {"id": 1, "text": "Question 1", "options": ["A", "B"]},
-                    {"id": 2, "text": "Question 2", "options": ["C", "D"]},
-                    {"id": 3, "text": "Question 3", "options": ["E", "F"]},
-                    {"id": 4, "text": "Question 4", "options": ["G", "H"]},
-                    {"id": 5, "text": "Question 5", "options": ["I", "J"]},
-                ],
+                "question_ids": [1, 2, 3, 4, 5],
+                "answers": {str(i): both("A") for i in range(1, 6)},
                 "completed": False,
             }
 
-            # After incrementing, current_index will be 5 (beyond array bounds)
-            updated_batch = test_batch.copy()
-            updated_batch["current_index"] = 5
-            mock_find_batch.side_effect = [test_batch, updated_batch]
-
-            with patch("app.mongo.db.quiz_responses.find_one") as mock_find_response:
-                # Partner's response
-                mock_find_response.return_value = {
-                    "user_id": TEST_PARTNER["_id"],
-                    "question_id": 5,
-                    "answer": "I",  # Same answer as user will submit
-                }
-
-                with patch("app.mongo.db.quiz_scores.find_one") as mock_find_score:
-                    mock_find_score.return_value = {"score": 70}
+            with patch(
+                "app.mongo.db.quiz_scores.find_one_and_update"
+            ) as mock_update_stats:
+                mock_update_stats.return_value = {"score": 75}
 
+                with patch("app.mongo.db.quiz_responses.insert_one"):
                     with patch(
-                        "app.mongo.db.quiz_scores.update_one"
-                    ) as mock_update_score:
-                        mock_update_score.return_value = MagicMock(modified_count=1)
-
-                        with patch(
-                            "app.mongo.db.quiz_responses.insert_one"
-                        ) as mock_insert:
-                            mock_insert.return_value = MagicMock(
-                                inserted_id="new_response_id"
-                            )
-
-                            with patch(
-                                "app.mongo.db.quiz_batches.update_one"
-                            ) as mock_update_batch:
-                                mock_update_batch.return_value = MagicMock(
-                                    modified_count=1
-                                )
-
-                                # Make request
-                                response = client.post(
-                                    "/api/quiz/answer",
-                                    json={"question_id": 5, "answer": "I"},
-                                    headers={"Authorization": f"Bearer {auth_token}"},
-                                )
-
-                                # Verify response
-                                assert response.status_code == 200
-                                data = json.loads(response.data)
-                                assert data["batch_complete"] == True
+                        "app.mongo.db.quiz_batches.update_one"
+                    ) as mock_update_batch:
+                        # Make request
+                        response = client.post(
+                            "/api/quiz/answer",
+                            json={"question_id": 5, "answer": "A"},
+                            headers={"Authorization": f"Bearer {auth_token}"},
+                        )
+
+                        # Verify response
+                        assert response.status_code == 200
+                        data = json.loads(response.data)
+                        assert data["batch_complete"] == True
+                        update = mock_update_batch.call_args[0][1]
+                        assert update["$set"]["completed"] == True
 
 
 def test_email_notification_toggle(client, auth_token):
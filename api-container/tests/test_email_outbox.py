@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from flask import Flask
+
+from app.email_outbox import (
+    CLAIM_LEASE,
+    MAX_ATTEMPTS,
+    claim_emails,
+    deliver_batch,
+    queue_email,
+    queue_emails,
+    retry_delay,
+)
+from app.email_utils import mail
+
+
+@pytest.fixture
+def outbox_db():
+    db = mongomock.MongoClient().db
+    for i in range(3):
+        queue_email(db, f"Subject {i}", [f"user{i}@example.com"], f"<p>{i}</p>")
+    return db
+
+
+@pytest.fixture
+def mail_app():
+    app = Flask(__name__)
+    app.config["MAIL_DEFAULT_SENDER"] = "together@example.com"
+    mail.init_app(app)
+    with app.app_context():
+        yield app
+
+
+def test_queue_emails_writes_pending_jobs():
+    """Several emails are queued with one write and claimed like single ones"""
+    db = mongomock.MongoClient().db
+    ids = queue_emails(
+        db,
+        [
+            (f"Subject {i}", [f"user{i}@example.com"], f"<p>{i}</p>", None)
+            for i in range(2)
+        ],
+    )
+
+    assert len(ids) == 2
+    assert queue_emails(db, []) == []
+    assert [job["subject"] for job in claim_emails(db, "worker-1")] == [
+        "Subject 0",
+        "Subject 1",
+    ]
+
+
+def test_claims_are_exclusive(outbox_db):
+    """A job claimed by one worker is not handed to another"""
+    first = claim_emails(outbox_db, "worker-1", limit=2)
+    second = claim_emails(outbox_db, "worker-2", limit=2)
+
+    assert len(first) == 2
+    assert len(second) == 1
+    assert {job["_id"] for job in first}.isdisjoint(job["_id"] for job in second)
+    assert claim_emails(outbox_db, "worker-3") == []
+
+
+def test_expired_lease_is_reclaimed(outbox_db):
+    """Jobs of a worker that died mid-batch are due again after the lease"""
+    claimed = claim_emails(outbox_db, "worker-1")
+    later = datetime.utcnow() + CLAIM_LEASE + timedelta(seconds=1)
+
+    reclaimed = claim_emails(outbox_db, "worker-2", now=later)
+
+    assert len(reclaimed) == len(claimed) == 3
+    assert all(job["locked_by"] == "worker-2" for job in reclaimed)
+
+
+def test_deliver_batch_records_outcomes(outbox_db, mail_app):
+    """Sent jobs are finished; failed ones retry with backoff until given up"""
+    jobs = claim_emails(outbox_db, "worker-1")
+    sent_to = []
+
+    def send(message):
+        if message.recipients == ["user1@example.com"]:
+            raise ConnectionError("mailbox unavailable")
+        sent_to.extend(message.recipients)
+
+    assert deliver_batch(outbox_db, jobs, send, "worker-1") == (2, 1)
+    assert sorted(sent_to) == ["user0@example.com", "user2@example.com"]
+    assert outbox_db.email_outbox.count_documents({"status": "sent"}) == 2
+
+    failed = outbox_db.email_outbox.find_one({"status": "pending"})
+    assert failed["attempts"] == 1
+    assert failed["last_error"] == "mailbox unavailable"
+    assert failed["next_attempt_at"] > datetime.utcnow()
+    assert "locked_by" not in failed
+
+    # Not due until the backoff has passed
+    assert claim_emails(outbox_db, "worker-1") == []
+
+    outbox_db.email_outbox.update_one(
+        {"_id": failed["_id"]}, {"$set": {"attempts": MAX_ATTEMPTS - 1}}
+    )
+    later = datetime.utcnow() + retry_delay(MAX_ATTEMPTS)
+    jobs = claim_emails(outbox_db, "worker-1", now=later)
+    assert deliver_batch(outbox_db, jobs, send, "worker-1") == (0, 1)
+    assert outbox_db.email_outbox.find_one({"_id": failed["_id"]})["status"] == (
+        "failed"
+    )
+
+
+def test_retry_delay_is_capped():
+    assert retry_delay(1) == timedelta(seconds=30)
+    assert retry_delay(3) == timedelta(minutes=2)
+    assert retry_delay(20) == timedelta(hours=1)
@@ -1,11 +1,9 @@
+import mongomock
 import pytest
 from unittest.mock import patch, MagicMock, call
 from flask import Flask
-from flask_mail import Message
-import threading
 from app.email_utils import (
     init_mail,
-    send_async_email,
     send_email,
     send_partner_message,
     send_invitation_email,
@@ -76,89 +74,43 @@ def test_init_mail_custom_config():
     assert custom_app.config["MAIL_DEFAULT_SENDER"] == "custom@example.com"
 
 
-def test_send_async_email_success(app):
-    """Test successful asynchronous email sending."""
-    mock_msg = MagicMock(spec=Message)
-
-    with patch("app.email_utils.mail.send") as mock_send:
-        with app.app_context():
-            send_async_email(app, mock_msg)
-            mock_send.assert_called_once_with(mock_msg)
-
-
-def test_send_async_email_exception(app):
-    """Test exception handling in asynchronous email sending."""
-    mock_msg = MagicMock(spec=Message)
-
-    with patch(
-        "app.email_utils.mail.send", side_effect=Exception("Test exception")
-    ), patch("builtins.print") as mock_print:
-        with app.app_context():
-            send_async_email(app, mock_msg)
-            mock_print.assert_called_once()
-            assert "Error sending email: Test exception" in mock_print.call_args[0][0]
-
-
 def test_send_email(app):
-    """Test email sending with thread creation."""
-    with app.app_context():
-        with patch("app.email_utils.Thread") as mock_thread, patch(
-            "app.email_utils.current_app._get_current_object", return_value=app
-        ):
-            mock_thread_instance = MagicMock()
-            mock_thread.return_value = mock_thread_instance
-
-            # Test with both HTML and text body
-            send_email(
-                "Test Subject",
-                ["recipient@example.com"],
-                "<p>HTML Content</p>",
-                "Text Content",
-            )
-
-            # Verify Message object was created correctly
-            mock_thread.assert_called_once()
-            args = mock_thread.call_args[1]["args"]
-            assert args[0] == app
-
-            # Verify the message properties
-            msg = args[1]
-            assert msg.subject == "Test Subject"
-            assert msg.recipients == ["recipient@example.com"]
-            assert msg.html == "<p>HTML Content</p>"
-            assert msg.body == "Text Content"
-
-            # Verify thread was started
-            mock_thread_instance.start.assert_called_once()
-
-
-def test_send_email_html_only(app):
-    """Test email sending with HTML body only."""
-    with app.app_context():
-        with patch("app.email_utils.Thread") as mock_thread, patch(
-            "app.email_utils.current_app._get_current_object", return_value=app
-        ):
-            mock_thread_instance = MagicMock()
-            mock_thread.return_value = mock_thread_instance
-
-            # Test with HTML body only
-            send_email(
-                "HTML Only Subject", ["recipient@example.com"], "<p>HTML Content</p>"
-            )
-
-            # Verify Message object was created correctly
-            mock_thread.assert_called_once()
-            args = mock_thread.call_args[1]["args"]
-
-            # Verify the message properties
-            msg = args[1]
-            assert msg.subject == "HTML Only Subject"
-            assert msg.recipients == ["recipient@example.com"]
-            assert msg.html == "<p>HTML Content</p>"
-            assert not hasattr(msg, "body") or msg.body is None
-
-            # Verify thread was started
-            mock_thread_instance.start.assert_called_once()
+    """Test email is queued in the outbox instead of sent."""
+    db = mongomock.MongoClient().db
+
+    send_email(
+        "Test Subject",
+        ["recipient@example.com"],
+        "<p>HTML Content</p>",
+        "Text Content",
+        db=db,
+    )
+
+    job = db.email_outbox.find_one()
+    assert job["subject"] == "Test Subject"
+    assert job["recipients"] == ["recipient@example.com"]
+    assert job["html_body"] == "<p>HTML Content</p>"
+    assert job["text_body"] == "Text Content"
+    assert job["status"] == "pending"
+    assert job["attempts"] == 0
+
+
+def test_send_email_uses_app_database(app):
+    """Test email sending without a db queues into the app database."""
+    with patch("app.mongo") as mock_mongo, patch(
+        "app.email_utils.queue_email"
+    ) as mock_queue:
+        send_email(
+            "HTML Only Subject", ["recipient@example.com"], "<p>HTML Content</p>"
+        )
+
+        mock_queue.assert_called_once_with(
+            mock_mongo.db,
+            "HTML Only Subject",
+            ["recipient@example.com"],
+            "<p>HTML Content</p>",
+            None,
+        )
 
 
 def test_send_partner_message(app):
@@ -0,0 +1,180 @@
+import socketserver
+import threading
+import time
+from unittest.mock import patch
+
+import mongomock
+import pytest
+
+from app.email_outbox import queue_email
+from workers import email_worker
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """
+    Just enough of an SMTP server for smtplib: accepts every message and
+    records it, along with how many connections were open at most
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.delay = delay
+        self.messages = []
+        self.open_connections = 0
+        self.max_connections = 0
+        self.lock = threading.Lock()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def close_connection(self):
+        # Counted as closed before the client hears back, so it can never
+        # see a free slot the stand-in has not released yet
+        if self.counted:
+            self.counted = False
+            with self.server.lock:
+                self.server.open_connections -= 1
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.open_connections += 1
+            server.max_connections = max(
+                server.max_connections, server.open_connections
+            )
+        self.counted = True
+        try:
+            self.reply("220 localhost stand-in")
+            recipients = []
+            for raw in self.rfile:
+                command = raw.decode().strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    self.reply("250 localhost")
+                elif command.startswith("MAIL"):
+                    recipients = []
+                    self.reply("250 OK")
+                elif command.startswith("RCPT"):
+                    recipients.append(raw.decode().split(":", 1)[1].strip())
+                    self.reply("250 OK")
+                elif command == "DATA":
+                    self.reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    for line in self.rfile:
+                        if line in (b".\r\n", b".\n"):
+                            break
+                        lines.append(line)
+                    time.sleep(server.delay)
+                    with server.lock:
+                        server.messages.append((recipients, b"".join(lines)))
+                    self.reply("250 OK")
+                elif command == "QUIT":
+                    self.close_connection()
+                    self.reply("221 Bye")
+                    break
+                else:
+                    self.reply("250 OK")
+        finally:
+            self.close_connection()
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn(delay=0.02)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_bounded_executor_blocks_when_full():
+    executor = email_worker.BoundedExecutor(max_workers=1, queue_size=1)
+    release = threading.Event()
+    executor.submit(release.wait)
+    executor.submit(release.wait)
+
+    submitted = threading.Event()
+    threading.Thread(
+        target=lambda: (executor.submit(lambda: None), submitted.set()), daemon=True
+    ).start()
+    assert not submitted.wait(0.1)
+
+    release.set()
+    assert submitted.wait(1)
+    executor.shutdown()
+
+
+def test_nothing_is_claimed_until_the_executor_has_room():
+    """A batch is only claimed once it can be handed to the executor"""
+    db = mongomock.MongoClient().db
+    queue_email(db, "Note", ["user@example.com"], "<p>Hi</p>")
+    executor = email_worker.BoundedExecutor(max_workers=1)
+    release = threading.Event()
+    executor.submit(release.wait)
+
+    claimed = []
+    with patch.object(email_worker, "db", db), patch.object(
+        email_worker, "send_batch"
+    ) as send_batch:
+        worker = threading.Thread(
+            target=lambda: claimed.append(email_worker.deliver_pending(None, executor)),
+            daemon=True,
+        )
+        worker.start()
+        worker.join(0.1)
+        assert db.email_outbox.count_documents({"status": "pending"}) == 1
+
+        release.set()
+        worker.join(1)
+        executor.shutdown()
+
+    assert claimed == [1]
+    send_batch.assert_called_once()
+    assert db.email_outbox.count_documents({"status": "processing"}) == 1
+
+
+def test_refused_batch_gives_its_room_back_once():
+    """The pool's own error reaches the caller and the room is free again"""
+    db = mongomock.MongoClient().db
+    queue_email(db, "Note", ["user@example.com"], "<p>Hi</p>")
+    executor = email_worker.BoundedExecutor(max_workers=1)
+    executor.shutdown()
+
+    with patch.object(email_worker, "db", db), pytest.raises(RuntimeError):
+        email_worker.deliver_pending(None, executor)
+
+    assert executor._slots.acquire(blocking=False)
+    assert not executor._slots.acquire(blocking=False)
+
+
+def test_emails_fan_out_over_bounded_connections(smtp_server, monkeypatch):
+    """Batches go out in parallel, never over more connections than allowed"""
+    db = mongomock.MongoClient().db
+    for i in range(12):
+        queue_email(db, f"Note {i}", [f"user{i}@example.com"], f"<p>{i}</p>")
+
+    monkeypatch.setenv("MAIL_SERVER", "127.0.0.1")
+    monkeypatch.setenv("MAIL_PORT", str(smtp_server.server_address[1]))
+    monkeypatch.setenv("MAIL_USE_TLS", "false")
+    monkeypatch.setenv("MAIL_DEFAULT_SENDER", "together-app@example.com")
+    app = email_worker.create_mail_app()
+    executor = email_worker.BoundedExecutor(max_workers=3, queue_size=1)
+
+    with patch.object(email_worker, "db", db), patch.object(
+        email_worker, "OUTBOX_BATCH_SIZE", 2
+    ):
+        while email_worker.deliver_pending(app, executor):
+            pass
+        executor.shutdown()
+
+    assert len(smtp_server.messages) == 12
+    assert {r[0] for r, _ in smtp_server.messages} == {
+        f"<user{i}@example.com>" for i in range(12)
+    }
+    assert 1 < smtp_server.max_connections <= 3
+    assert db.email_outbox.count_documents({"status": "sent"}) == 12
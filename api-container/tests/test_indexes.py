@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import mongomock
+from flask import Flask
+
+from app.indexes import (
+    INDEXES,
+    ensure_indexes,
+    index_key,
+    index_report,
+    indexes_cli,
+)
+
+
+def declared_count():
+    return sum(len(indexes) for indexes in INDEXES.values())
+
+
+def test_ensure_indexes_is_idempotent():
+    """The first run creates every declared index, later runs create none"""
+    db = mongomock.MongoClient().db
+
+    created = ensure_indexes(db)
+    assert len(created) == declared_count()
+    assert ensure_indexes(db) == []
+
+    info = db.quiz_scores.index_information()
+    assert info["user1_id_1_user2_id_1"]["unique"] is True
+
+
+def test_existing_shell_index_is_reused():
+    """An index created by init-mongo.js is recognised rather than duplicated"""
+    db = mongomock.MongoClient().db
+    db.users.create_index([("email", 1.0)], unique=True)
+
+    created = ensure_indexes(db)
+
+    assert ("users", "email_1") not in created
+    assert len(created) == declared_count() - 1
+
+
+def test_text_index_key_matches_server_form():
+    """The server reports text index fields as _fts/_ftsx"""
+    declared = [("conversation", 1), ("content", "text")]
+    reported = [("conversation", 1.0), ("_fts", "text"), ("_ftsx", 1)]
+    assert index_key(declared) == index_key(reported)
+
+
+def test_report_lists_missing_and_undeclared():
+    """The report shows declared indexes that are missing and extra ones"""
+    db = mongomock.MongoClient().db
+    db.messages.create_index("sender_id")
+
+    report = index_report(db)
+    assert ("quiz_scores", [("user1_id", 1), ("user2_id", 1)]) in report["missing"]
+    assert ("messages", "sender_id_1") in report["undeclared"]
+
+    ensure_indexes(db)
+    report = index_report(db)
+    assert report["missing"] == []
+    assert report["undeclared"] == [("messages", "sender_id_1")]
+
+
+def test_cli_commands():
+    """flask indexes ensure/report operate on the app database"""
+    app = Flask(__name__)
+    app.cli.add_command(indexes_cli)
+    runner = app.test_cli_runner()
+    db = mongomock.MongoClient().db
+
+    with patch("app.mongo") as mock_mongo:
+        mock_mongo.db = db
+
+        result = runner.invoke(args=["indexes", "ensure"])
+        assert f"Created {declared_count()} index(es)" in result.output
+
+        result = runner.invoke(args=["indexes", "report"])
+        assert "All declared indexes are present and in use" in result.output
+
+
+def test_retired_index_is_dropped():
+    """The full (status, scheduled_time) index gives way to the partial one"""
+    db = mongomock.MongoClient().db
+    db.scheduled_messages.create_index([("status", 1), ("scheduled_time", 1)])
+
+    ensure_indexes(db)
+
+    info = db.scheduled_messages.index_information()
+    assert "status_1_scheduled_time_1" not in info
+    assert info["status_1_scheduled_time_1__id_1"]["partialFilterExpression"] == {
+        "status": "pending"
+    }
+    assert ensure_indexes(db) == []
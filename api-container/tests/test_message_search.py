@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import mongomock
+from bson.objectid import ObjectId
+
+from app.message_search import (
+    InvertedIndexSearch,
+    TextIndexSearch,
+    highlights,
+    search_terms,
+)
+from app.message_store import archive_messages, conversation_key
+
+
+def make_message(content, minutes, conversation="a|b"):
+    return {
+        "_id": ObjectId(),
+        "content": content,
+        "conversation": conversation,
+        "created_at": datetime(2025, 4, 1, 12, 0) + timedelta(minutes=minutes),
+    }
+
+
+def test_search_terms_and_highlights():
+    assert search_terms("Dinner, dinner at 8?") == ["dinner", "at", "8"]
+    assert highlights("Dinner at the dinner place", ["dinner"]) == [[0, 6], [14, 20]]
+    assert highlights(None, ["dinner"]) == []
+
+
+def test_inverted_index_ranks_and_pages():
+    """More occurrences rank first, then newer messages; other chats are out"""
+    index = InvertedIndexSearch()
+    for message in [
+        make_message("dinner tonight?", 0),
+        make_message("dinner dinner dinner!", 1),
+        make_message("lunch instead", 2),
+        make_message("dinner at 8", 3),
+        make_message("dinner with friends", 4, conversation="a|c"),
+    ]:
+        index.add(message)
+
+    page, has_more = index.search("a|b", ["dinner"], offset=0, limit=2)
+    assert [m["content"] for m in page] == ["dinner dinner dinner!", "dinner at 8"]
+    assert has_more is True
+
+    page, has_more = index.search("a|b", ["dinner"], offset=2, limit=2)
+    assert [m["content"] for m in page] == ["dinner tonight?"]
+    assert has_more is False
+
+    # Any term matches
+    page, _ = index.search("a|b", ["lunch", "tonight"])
+    assert {m["content"] for m in page} == {"lunch instead", "dinner tonight?"}
+    assert index.search("x|y", ["dinner"]) == ([], False)
+
+
+def test_inverted_index_picks_up_new_messages():
+    """Messages written after the first search are indexed on the next one"""
+    db = mongomock.MongoClient().db
+    key = conversation_key("b", "a")
+    db.messages.insert_one(make_message("movie night", 0, conversation=key))
+    index = InvertedIndexSearch(db)
+
+    assert len(index.search(key, ["movie"])[0]) == 1
+
+    db.messages.insert_one(make_message("which movie?", 1, conversation=key))
+    page, _ = index.search(key, ["movie"])
+    assert [m["content"] for m in page] == ["which movie?", "movie night"]
+
+
+def test_text_index_query():
+    """The text search is scoped to the conversation and sorted by score"""
+    db = MagicMock()
+    cursor = db.messages.find.return_value.sort.return_value.skip.return_value
+    cursor.limit.return_value = [{"content": "dinner"}] * 3
+
+    page, has_more = TextIndexSearch(db).search("a|b", ["dinner", "8"], 20, 2)
+
+    assert len(page) == 2 and has_more is True
+    query, projection = db.messages.find.call_args[0]
+    assert query == {"conversation": "a|b", "$text": {"$search": "dinner 8"}}
+    assert projection == {"score": {"$meta": "textScore"}}
+    db.messages.find.return_value.sort.return_value.skip.assert_called_once_with(20)
+    cursor.limit.assert_called_once_with(3)
+
+
+def test_inverted_index_searches_archived_messages():
+    """Messages moved into buckets before the index is built still match"""
+    db = mongomock.MongoClient().db
+    key = conversation_key("b", "a")
+    for minutes, content in enumerate(["movie night", "which movie?", "see you"]):
+        message = make_message(content, minutes, conversation=key)
+        db.messages.insert_one(
+            dict(message, sender_id="a", receiver_id="b", is_read=True)
+        )
+    db.messages.insert_one(make_message("movie again", 60 * 24 * 40, conversation=key))
+
+    archived = archive_messages(
+        db, timedelta(days=30), now=datetime(2025, 5, 15), batch_size=2
+    )
+    assert archived == 3
+
+    page, has_more = InvertedIndexSearch(db).search(key, ["movie"])
+    assert [m["content"] for m in page] == [
+        "movie again",
+        "which movie?",
+        "movie night",
+    ]
+    assert has_more is False
+    assert all(m["conversation"] == key for m in page)
+
+
+def test_text_index_falls_back_to_archived_messages():
+    """Archived matches follow the live ones, paged on from where they end"""
+    db = MagicMock()
+    live = db.messages.find.return_value.sort.return_value.skip.return_value
+    live.limit.return_value = [{"content": "dinner at 8"}]
+    db.message_buckets.find.return_value = [
+        {
+            "messages": [
+                make_message("dinner?", 0),
+                make_message("lunch", 1),
+                make_message("dinner dinner", 2),
+                make_message("dinner", 3),
+            ]
+        }
+    ]
+
+    page, has_more = TextIndexSearch(db).search("a|b", ["dinner"], 0, 3)
+    assert [m["content"] for m in page] == ["dinner at 8", "dinner dinner", "dinner"]
+    assert has_more is True
+    query, projection = db.message_buckets.find.call_args[0]
+    assert query == {"conversation": "a|b", "$text": {"$search": "dinner"}}
+    assert projection == {"messages": 1}
+
+    # Past the end of the live matches, their count places the archived page
+    live.limit.return_value = []
+    db.messages.count_documents.return_value = 1
+    page, has_more = TextIndexSearch(db).search("a|b", ["dinner"], 3, 3)
+    assert [m["content"] for m in page] == ["dinner?"]
+    assert has_more is False
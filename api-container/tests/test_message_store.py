@@ -0,0 +1,262 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+
+from app.message_store import (
+    InvalidCursor,
+    archive_messages,
+    backfill_participants,
+    conversation_key,
+    decode_cursor,
+    encode_cursor,
+    mark_read,
+    page_messages,
+    participants_key,
+    rebuild_unread_counts,
+    unread_count,
+)
+
+
+@pytest.fixture
+def messages_db():
+    db = mongomock.MongoClient().db
+    start = datetime(2025, 4, 1, 12, 0, 0)
+    docs = []
+    for i in range(7):
+        docs.append(
+            {
+                "_id": ObjectId(),
+                "content": f"message {i}",
+                "sender_id": "a" if i % 2 else "b",
+                "receiver_id": "b" if i % 2 else "a",
+                "participants": ["a", "b"],
+                # Pairs of messages share a timestamp so _id breaks ties
+                "created_at": start + timedelta(minutes=i // 2),
+            }
+        )
+    docs.append(
+        {
+            "_id": ObjectId(),
+            "content": "someone else",
+            "sender_id": "c",
+            "receiver_id": "d",
+            "participants": ["c", "d"],
+            "created_at": start,
+        }
+    )
+    db.messages.insert_many(docs)
+    with patch("app.message_store.mongo") as mock_mongo:
+        mock_mongo.db = db
+        yield docs[:7]
+
+
+def test_cursor_round_trip():
+    message = {"_id": ObjectId(), "created_at": datetime(2025, 4, 1, 12, 30, 15, 250)}
+    assert decode_cursor(encode_cursor(message)) == (
+        message["created_at"],
+        message["_id"],
+    )
+    with pytest.raises(InvalidCursor):
+        decode_cursor("garbage")
+
+
+def test_pages_older_messages_without_gaps(messages_db):
+    """Following next cursors visits every message exactly once, newest first"""
+    expected = [m["content"] for m in reversed(messages_db)]
+    seen = []
+    before = None
+    while True:
+        page, has_more = page_messages("a", before=before, limit=3)
+        seen.extend(m["content"] for m in page)
+        if not has_more:
+            break
+        before = encode_cursor(page[-1])
+    assert seen == expected
+
+
+def test_pages_newer_messages(messages_db):
+    """An after cursor returns the messages just newer than it, newest first"""
+    oldest = messages_db[0]
+    page, has_more = page_messages("a", after=encode_cursor(oldest), limit=2)
+    assert [m["content"] for m in page] == ["message 2", "message 1"]
+    assert has_more is True
+
+
+def test_backfill_participants():
+    """Old messages get the same keys new messages are written with"""
+    db = mongomock.MongoClient().db
+    db.messages.insert_many(
+        [{"sender_id": "b", "receiver_id": "a", "content": "old"}]
+        + [{"sender_id": "a", "receiver_id": "b"} for _ in range(4)]
+        + [{"sender_id": "a", "receiver_id": "b", "participants": ["a", "b"]}]
+    )
+
+    assert backfill_participants(db, batch_size=2) == 6
+    assert backfill_participants(db) == 0
+    old = db.messages.find_one({"content": "old"})
+    assert old["participants"] == participants_key("b", "a") == ["a", "b"]
+    assert old["conversation"] == conversation_key("b", "a") == "a|b"
+
+
+@pytest.fixture
+def unread_db():
+    db = mongomock.MongoClient().db
+    user_id = ObjectId()
+    start = datetime(2025, 4, 1, 12, 0, 0)
+    db.users.insert_one({"_id": user_id, "unread_messages": 3})
+    docs = [
+        {
+            "_id": ObjectId(),
+            "receiver_id": str(user_id),
+            "is_read": False,
+            "created_at": start + timedelta(minutes=i),
+        }
+        for i in range(3)
+    ]
+    db.messages.insert_many(docs)
+    with patch("app.message_store.mongo") as mock_mongo:
+        mock_mongo.db = db
+        yield db, str(user_id), docs
+
+
+def test_mark_read_up_to_cursor(unread_db):
+    """Messages up to and including the cursor are marked and uncounted once"""
+    db, user_id, docs = unread_db
+
+    assert mark_read(user_id, encode_cursor(docs[1])) == 2
+    assert unread_count(user_id) == 1
+    assert db.messages.find_one({"_id": docs[2]["_id"]})["is_read"] is False
+
+    # Marking the same range again changes nothing
+    assert mark_read(user_id, encode_cursor(docs[1])) == 0
+    assert unread_count(user_id) == 1
+    user = db.users.find_one({"_id": ObjectId(user_id)})
+    assert user["versions"]["messages"] == 1
+
+
+def test_rebuild_unread_counts(unread_db):
+    """The rebuild recomputes a drifted counter from the is_read flags"""
+    db, user_id, docs = unread_db
+    other = db.users.insert_one({"unread_messages": 5}).inserted_id
+    db.users.update_one({"_id": ObjectId(user_id)}, {"$set": {"unread_messages": 9}})
+
+    assert rebuild_unread_counts(db) == 1
+    assert unread_count(user_id) == 3
+    assert unread_count(str(other)) == 0
+
+
+@pytest.fixture
+def history_db():
+    """Two months of messages between a and b, plus another couple's"""
+    db = mongomock.MongoClient().db
+    start = datetime(2025, 1, 20, 9, 0, 0)
+    docs = []
+    for i in range(24):
+        sender, receiver = ("a", "b") if i % 2 else ("b", "a")
+        docs.append(
+            {
+                "_id": ObjectId(),
+                "content": f"message {i}",
+                "sender_id": sender,
+                "receiver_id": receiver,
+                "participants": ["a", "b"],
+                "conversation": "a|b",
+                # Pairs share a timestamp so _id breaks ties across buckets too
+                "created_at": start + timedelta(days=4 * (i // 2)),
+                # One old message is still unread
+                "is_read": i != 3,
+            }
+        )
+    docs.append(
+        {
+            "_id": ObjectId(),
+            "content": "someone else",
+            "sender_id": "c",
+            "receiver_id": "d",
+            "participants": ["c", "d"],
+            "conversation": "c|d",
+            "created_at": start,
+            "is_read": True,
+        }
+    )
+    db.messages.insert_many(docs)
+    with patch("app.message_store.mongo") as mock_mongo:
+        mock_mongo.db = db
+        yield db, docs[:24]
+
+
+def read_all(user_id, limit, older=True):
+    """Every message of a user by following cursors in one direction"""
+    seen = []
+    cursor = None
+    if not older:
+        # Start before the first message
+        cursor = encode_cursor(
+            {"_id": ObjectId("0" * 24), "created_at": datetime(2000, 1, 1)}
+        )
+    while True:
+        if older:
+            page, has_more = page_messages(user_id, before=cursor, limit=limit)
+        else:
+            page, has_more = page_messages(user_id, after=cursor, limit=limit)
+        seen.extend(m["content"] for m in (page if older else reversed(page)))
+        if not has_more:
+            return seen
+        cursor = encode_cursor(page[-1] if older else page[0])
+
+
+def test_archived_messages_page_like_hot_ones(history_db):
+    """Paging reads bucketed and hot messages as one ordered history"""
+    db, docs = history_db
+    newest_first = read_all("a", 5)
+    assert len(newest_first) == 24
+
+    now = docs[-1]["created_at"] + timedelta(days=1)
+    assert archive_messages(db, timedelta(days=10), now=now) == 18
+    assert archive_messages(db, timedelta(days=10), now=now) == 0
+
+    assert db.messages.count_documents({"conversation": "a|b"}) == 7
+    assert db.messages.find_one({"content": "message 3"})["is_read"] is False
+    buckets = list(db.message_buckets.find({"conversation": "a|b"}))
+    assert sorted(b["month"].month for b in buckets) == [1, 2]
+    assert sum(b["count"] for b in buckets) == 17
+
+    assert read_all("a", 5) == newest_first
+    assert read_all("a", 4, older=False) == list(reversed(newest_first))
+    assert read_all("c", 5) == ["someone else"]
+
+
+def test_full_hot_page_reads_no_bucket(history_db):
+    """Buckets are only loaded when they can reach into the page"""
+    db, docs = history_db
+    now = docs[-1]["created_at"] + timedelta(days=1)
+    archive_messages(db, timedelta(days=10), now=now)
+
+    with patch.object(
+        db.message_buckets, "find_one", wraps=db.message_buckets.find_one
+    ) as load:
+        page, has_more = page_messages("a", limit=5)
+        assert len(page) == 5 and has_more is True
+        load.assert_not_called()
+
+        # The next page runs out of hot messages and reads the newest bucket
+        page, _ = page_messages("a", before=encode_cursor(page[-1]), limit=5)
+        assert len(page) == 5
+        assert load.call_count == 1
+
+
+def test_archive_spills_full_buckets(history_db):
+    """A month with more messages than a bucket holds uses several buckets"""
+    db, docs = history_db
+    now = docs[-1]["created_at"] + timedelta(days=1)
+
+    with patch("app.message_store.MAX_BUCKET_MESSAGES", 4):
+        archive_messages(db, timedelta(days=0), now=now)
+
+    buckets = list(db.message_buckets.find({"conversation": "a|b"}))
+    assert all(b["count"] <= 4 for b in buckets)
+    assert sum(b["count"] for b in buckets) == 23
+    assert len(read_all("b", 7)) == 24
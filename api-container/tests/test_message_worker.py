@@ -0,0 +1,371 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+from pymongo.errors import AutoReconnect
+
+from app.indexes import ensure_indexes
+from workers import message_worker
+
+
+@pytest.fixture
+def worker_db():
+    db = mongomock.MongoClient().db
+    with patch.object(message_worker, "db", db):
+        yield db
+
+
+def test_seconds_until_due(worker_db):
+    """The worker sleeps until the earliest pending message, within bounds"""
+    now = datetime(2025, 2, 13, 23, 59, 0)
+    assert message_worker.seconds_until_due(now) == message_worker.MAX_IDLE_SECONDS
+
+    worker_db.scheduled_messages.insert_many(
+        [
+            {"status": "pending", "scheduled_time": now + timedelta(seconds=30)},
+            {"status": "pending", "scheduled_time": now + timedelta(seconds=2.5)},
+            {"status": "sent", "scheduled_time": now - timedelta(seconds=10)},
+        ]
+    )
+    assert message_worker.seconds_until_due(now) == 2.5
+
+    worker_db.scheduled_messages.insert_one(
+        {"status": "pending", "scheduled_time": now - timedelta(seconds=1)}
+    )
+    assert message_worker.seconds_until_due(now) == 0
+
+    worker_db.scheduled_messages.delete_many({})
+    worker_db.scheduled_messages.insert_one(
+        {"status": "pending", "scheduled_time": now + timedelta(hours=5)}
+    )
+    assert message_worker.seconds_until_due(now) == message_worker.MAX_IDLE_SECONDS
+
+
+def schedule(db, sender, receiver, due):
+    user_ids = []
+    for user_id in [sender, receiver]:
+        db.users.update_one(
+            {"_id": user_id},
+            {"$setOnInsert": {"name": "User", "email": f"{user_id}@example.com"}},
+            upsert=True,
+        )
+        user_ids.append(str(user_id))
+    return db.scheduled_messages.insert_one(
+        {
+            "sender_id": user_ids[0],
+            "receiver_id": user_ids[1],
+            "content": "Good morning",
+            "scheduled_time": due,
+            "status": "pending",
+        }
+    ).inserted_id
+
+
+def metric(name, **labels):
+    """Current value of one of the worker's metric samples, 0 when unset"""
+    return message_worker.METRICS.get_sample_value(name, labels) or 0
+
+
+def test_workers_share_and_recover_leases(worker_db):
+    """A claimed message is left alone until its lease expires"""
+    ensure_indexes(worker_db)
+    now = datetime.utcnow()
+    due = now - timedelta(hours=1)
+    scheduled_id = schedule(worker_db, ObjectId(), ObjectId(), due)
+
+    with patch.object(message_worker, "WORKER_ID", "worker-a"):
+        ids, _ = message_worker.find_due(due, 10)
+        [claimed] = message_worker.claim_due_messages(due, ids)
+    assert claimed["lease_owner"] == "worker-a"
+    # The lease runs from the claim, not from the due cutoff
+    assert claimed["lease_expires_at"] > now
+
+    # worker-a stalls; another worker finds nothing until the lease runs out
+    with patch.object(message_worker, "WORKER_ID", "worker-b"):
+        assert message_worker.process_scheduled_messages(now) == 0
+        later = now + timedelta(seconds=message_worker.LEASE_SECONDS + 60)
+        assert message_worker.process_scheduled_messages(later) == 1
+
+    scheduled = worker_db.scheduled_messages.find_one({"_id": scheduled_id})
+    assert scheduled["status"] == "sent"
+    assert "lease_owner" not in scheduled
+    assert worker_db.messages.count_documents({}) == 1
+
+    # The stalled worker no longer owns the message and cannot overwrite it
+    with patch.object(message_worker, "WORKER_ID", "worker-a"):
+        worker_db.scheduled_messages.bulk_write(
+            [message_worker.finish_message(claimed, {"status": "failed"})]
+        )
+    scheduled = worker_db.scheduled_messages.find_one({"_id": scheduled_id})
+    assert scheduled["status"] == "sent"
+
+
+def test_reclaimed_message_is_not_delivered_twice(worker_db):
+    """A reclaimed message is inserted, counted and emailed exactly once"""
+    ensure_indexes(worker_db)
+    now = datetime.utcnow()
+    lease = timedelta(seconds=message_worker.LEASE_SECONDS + 60)
+    receiver = ObjectId()
+    scheduled_id = schedule(worker_db, ObjectId(), receiver, now)
+
+    # The first owner dies after the insert, before any side effect
+    with patch.object(
+        message_worker, "bump_unread_counts", side_effect=RuntimeError("killed")
+    ), pytest.raises(RuntimeError):
+        message_worker.process_scheduled_messages(now)
+    assert worker_db.messages.find_one()["side_effects_pending"] is True
+    assert worker_db.email_outbox.count_documents({}) == 0
+
+    # The next one finishes them, then dies before recording the outcome
+    with patch.object(
+        message_worker, "record_outcomes", side_effect=AutoReconnect("down")
+    ), pytest.raises(AutoReconnect):
+        message_worker.process_scheduled_messages(now + lease)
+
+    # The last one only has to mark it sent
+    assert message_worker.process_scheduled_messages(now + 2 * lease) == 0
+
+    [message] = worker_db.messages.find()
+    assert "side_effects_pending" not in message
+    assert worker_db.users.find_one({"_id": receiver})["unread_messages"] == 1
+    assert worker_db.email_outbox.count_documents({}) == 1
+    scheduled = worker_db.scheduled_messages.find_one({"_id": scheduled_id})
+    assert scheduled["status"] == "sent"
+    assert scheduled["attempts"] == 3
+
+
+def test_message_failing_after_insert_goes_dead(worker_db):
+    """Attempts that never record an outcome still use up MAX_ATTEMPTS"""
+    ensure_indexes(worker_db)
+    now = datetime.utcnow()
+    lease = timedelta(seconds=message_worker.LEASE_SECONDS + 60)
+    scheduled_id = schedule(worker_db, ObjectId(), ObjectId(), now)
+    dead = metric("scheduled_messages_dead_total")
+
+    with patch.object(message_worker, "MAX_ATTEMPTS", 3):
+        with patch.object(
+            message_worker, "bump_unread_counts", side_effect=RuntimeError("poison")
+        ):
+            for attempt in range(3):
+                with pytest.raises(RuntimeError):
+                    message_worker.process_scheduled_messages(now + attempt * lease)
+        assert message_worker.process_scheduled_messages(now + 3 * lease) == 0
+
+    scheduled = worker_db.scheduled_messages.find_one({"_id": scheduled_id})
+    assert scheduled["status"] == "dead"
+    assert scheduled["attempts"] == 3
+    assert "lease_owner" not in scheduled
+    assert metric("scheduled_messages_dead_total") == dead + 1
+    assert message_worker.seconds_until_due(now) == message_worker.MAX_IDLE_SECONDS
+
+
+def test_invalid_receiver_fails_only_its_message(worker_db):
+    """A bad user id is caught before the chunk's shared writes"""
+    ensure_indexes(worker_db)
+    now = datetime.utcnow()
+    alice, bob = ObjectId(), ObjectId()
+    good_id = schedule(worker_db, alice, bob, now - timedelta(minutes=1))
+    bad_id = schedule(worker_db, alice, "not-an-id", now - timedelta(minutes=2))
+
+    assert message_worker.process_scheduled_messages(now) == 1
+
+    assert worker_db.scheduled_messages.find_one({"_id": good_id})["status"] == "sent"
+    bad = worker_db.scheduled_messages.find_one({"_id": bad_id})
+    assert bad["status"] == "dead"
+    assert "Invalid receiver_id" in bad["last_error"]
+    assert worker_db.messages.count_documents({}) == 1
+    assert worker_db.users.find_one({"_id": bob})["unread_messages"] == 1
+
+
+def test_backlog_is_delivered_in_chunks(worker_db):
+    """Each chunk is one insert_many and one bulk_write; users are cached"""
+    ensure_indexes(worker_db)
+    now = datetime(2025, 2, 14, 0, 0)
+    alice, bob = ObjectId(), ObjectId()
+    for minute in range(5):
+        schedule(worker_db, alice, bob, now - timedelta(minutes=minute))
+    schedule(worker_db, bob, alice, now + timedelta(minutes=1))
+
+    with patch.object(message_worker, "CHUNK_SIZE", 2), patch.object(
+        worker_db.messages, "insert_many", wraps=worker_db.messages.insert_many
+    ) as insert_many, patch.object(
+        worker_db.users, "find", wraps=worker_db.users.find
+    ) as find_users, patch.object(
+        worker_db.email_outbox,
+        "insert_many",
+        wraps=worker_db.email_outbox.insert_many,
+    ) as queue_many:
+        assert message_worker.process_scheduled_messages(now) == 5
+
+    assert insert_many.call_count == 3
+    # One outbox write per chunk
+    assert queue_many.call_count == 3
+    # The couple is read once for the whole pass
+    assert find_users.call_count == 1
+    assert find_users.call_args[0][1] == message_worker.USER_FIELDS
+    assert worker_db.scheduled_messages.count_documents({"status": "sent"}) == 5
+    assert worker_db.users.find_one({"_id": bob})["unread_messages"] == 5
+    assert worker_db.users.find_one({"_id": alice})["versions"]["messages"] == 3
+    assert worker_db.email_outbox.count_documents({}) == 5
+    # Earliest due first
+    created = [m["scheduled_from"] for m in worker_db.messages.find()]
+    due = [
+        str(m["_id"])
+        for m in worker_db.scheduled_messages.find({"status": "sent"}).sort(
+            "scheduled_time", 1
+        )
+    ]
+    assert created == due
+
+
+def test_get_users_by_ids_reads_only_uncached_users(worker_db):
+    alice, bob = ObjectId(), ObjectId()
+    worker_db.users.insert_many(
+        [
+            {"_id": alice, "name": "Alice", "email": "a@x.com", "password_hash": "h"},
+            {"_id": bob, "name": "Bob", "email": "b@x.com"},
+        ]
+    )
+    cache = {}
+    missing = str(ObjectId())
+
+    users = message_worker.get_users_by_ids([str(alice), missing], cache)
+    assert users[str(alice)] == {"_id": str(alice), "name": "Alice", "email": "a@x.com"}
+    assert users[missing] is None
+
+    with patch.object(worker_db.users, "find", wraps=worker_db.users.find) as find:
+        users = message_worker.get_users_by_ids([str(alice), str(bob), missing], cache)
+        message_worker.get_users_by_ids([str(bob), missing], cache)
+    assert users[str(bob)]["name"] == "Bob"
+    assert find.call_count == 1
+    assert find.call_args[0][0] == {"_id": {"$in": [bob]}}
+
+
+def test_pass_records_metrics(worker_db):
+    ensure_indexes(worker_db)
+    now = datetime.utcnow()
+    alice, bob = ObjectId(), ObjectId()
+    schedule(worker_db, alice, bob, now - timedelta(seconds=90))
+    schedule(worker_db, bob, alice, now - timedelta(seconds=3))
+    worker_db.scheduled_messages.insert_one(
+        {"status": "pending", "scheduled_time": now - timedelta(seconds=1)}
+    )
+    names = [
+        "scheduled_messages_sent_total",
+        "scheduled_messages_failed_total",
+        "scheduled_message_emails_total",
+        "scheduled_message_dispatch_lag_seconds_count",
+        "scheduled_message_dispatch_lag_seconds_sum",
+        "scheduled_message_pass_seconds_count",
+    ]
+    before = {name: metric(name) for name in names}
+
+    assert message_worker.process_scheduled_messages(now) == 2
+
+    added = {name: metric(name) - before[name] for name in names}
+    assert added["scheduled_messages_sent_total"] == 2
+    # The third message has no content and fails for good
+    assert added["scheduled_messages_failed_total"] == 1
+    assert worker_db.scheduled_messages.count_documents({"status": "dead"}) == 1
+    assert added["scheduled_message_emails_total"] == 2
+    # Lag runs up to the delivery of each chunk, a moment after now
+    assert added["scheduled_message_dispatch_lag_seconds_count"] == 2
+    assert 93 <= added["scheduled_message_dispatch_lag_seconds_sum"] < 93 + 10
+    assert added["scheduled_message_pass_seconds_count"] == 1
+    assert metric("scheduled_messages_backlog") == 3
+    for operation in ["claim", "insert_messages"]:
+        assert metric("scheduled_message_mongo_seconds_count", operation=operation)
+
+
+def test_retry_delay_backs_off_with_jitter():
+    for attempts, full in [(1, 30), (2, 60), (3, 120), (10, 3600)]:
+        delay = message_worker.retry_delay(attempts).total_seconds()
+        assert full / 2 <= delay <= full
+
+
+def test_transient_failure_is_retried(worker_db):
+    """A failed insert is retried after a backoff instead of being dropped"""
+    ensure_indexes(worker_db)
+    now = datetime.utcnow()
+    scheduled_id = schedule(worker_db, ObjectId(), ObjectId(), now)
+
+    with patch.object(
+        worker_db.messages, "insert_many", side_effect=AutoReconnect("down")
+    ):
+        assert message_worker.process_scheduled_messages(now) == 0
+
+    scheduled = worker_db.scheduled_messages.find_one({"_id": scheduled_id})
+    assert scheduled["status"] == "retrying"
+    assert scheduled["attempts"] == 1
+    assert scheduled["last_error"] == "down"
+    retry_at = scheduled["next_attempt_at"]
+    # The backoff starts when the chunk was handled, just after now
+    assert now + timedelta(seconds=15) <= retry_at <= now + timedelta(seconds=31)
+    assert message_worker.seconds_until_due(now) == (retry_at - now).total_seconds()
+
+    # Not due before its backoff has passed, then delivered normally
+    assert message_worker.process_scheduled_messages(now) == 0
+    assert message_worker.process_scheduled_messages(retry_at) == 1
+    scheduled = worker_db.scheduled_messages.find_one({"_id": scheduled_id})
+    assert scheduled["status"] == "sent"
+    assert worker_db.messages.count_documents({}) == 1
+
+
+def test_message_is_dead_after_max_attempts(worker_db):
+    ensure_indexes(worker_db)
+    now = datetime.utcnow()
+    scheduled_id = schedule(worker_db, ObjectId(), ObjectId(), now)
+    dead = metric("scheduled_messages_dead_total")
+
+    with patch.object(message_worker, "MAX_ATTEMPTS", 3), patch.object(
+        worker_db.messages, "insert_many", side_effect=AutoReconnect("down")
+    ):
+        for hours in range(4):
+            message_worker.process_scheduled_messages(now + timedelta(hours=hours))
+
+    scheduled = worker_db.scheduled_messages.find_one({"_id": scheduled_id})
+    assert scheduled["status"] == "dead"
+    assert scheduled["attempts"] == 3
+    assert scheduled["last_error"] == "down"
+    assert metric("scheduled_messages_dead_total") == dead + 1
+    assert message_worker.seconds_until_due(now) == message_worker.MAX_IDLE_SECONDS
+
+
+def test_find_due_streams_backlog_with_resume_token(worker_db):
+    """Chunks follow due order, ties included, and never repeat a message"""
+    ensure_indexes(worker_db)
+    now = datetime(2025, 2, 14, 0, 0)
+    times = [now - timedelta(minutes=m) for m in (5, 5, 5, 3, 1, 0)]
+    ids = worker_db.scheduled_messages.insert_many(
+        [{"status": "pending", "scheduled_time": t} for t in times]
+        + [
+            {"status": "pending", "scheduled_time": now + timedelta(minutes=1)},
+            {"status": "sent", "scheduled_time": now - timedelta(days=1)},
+        ]
+    ).inserted_ids
+    retry_id = worker_db.scheduled_messages.insert_one(
+        {
+            "status": "retrying",
+            "scheduled_time": now - timedelta(days=2),
+            "next_attempt_at": now,
+        }
+    ).inserted_id
+
+    chunks = []
+    after = None
+    while True:
+        chunk, after = message_worker.find_due(now, 2, after)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk[0] == retry_id:
+            # Messages due again leave their state once claimed
+            message_worker.claim_due_messages(now, chunk)
+
+    assert chunks[0][0] == retry_id
+    streamed = [i for chunk in chunks for i in chunk if i != retry_id]
+    expected = sorted(ids[:6], key=lambda i: (times[ids.index(i)], i))
+    assert streamed == expected
+    assert all(len(chunk) <= 2 for chunk in chunks)
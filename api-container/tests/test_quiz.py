@@ -1,135 +1,375 @@
-import unittest
-from unittest.mock import patch, MagicMock
-from datetime import datetime, timedelta
-from bson.objectid import ObjectId
-from flask import Flask
-from flask_jwt_extended import JWTManager, create_access_token
-from app.routes.quiz import quiz_bp
-
-
-class TestQuizModule(unittest.TestCase):
-    def setUp(self):
-        self.app = Flask(__name__)
-        self.app.config["TESTING"] = True
-        self.app.config["JWT_SECRET_KEY"] = "test-key"
-        self.app.register_blueprint(quiz_bp, url_prefix="/api/quiz")
-        self.jwt = JWTManager(self.app)
-        self.client = self.app.test_client()
-
-        with self.app.app_context():
-            self.token = create_access_token(identity=str(ObjectId()))
-
-        self.auth_headers = {"Authorization": f"Bearer {self.token}"}
-
-        self.jwt_patcher = patch("app.routes.quiz.jwt_required")
-        self.mock_jwt_required = self.jwt_patcher.start()
-        self.mock_jwt_required.return_value = lambda f: f
-
-        self.identity_patcher = patch("app.routes.quiz.get_jwt_identity")
-        self.mock_get_jwt_identity = self.identity_patcher.start()
-        self.mock_get_jwt_identity.return_value = str(ObjectId())
-
-        self.mongo_patcher = patch("app.routes.quiz.mongo")
-        self.mock_mongo = self.mongo_patcher.start()
-
-        self.mock_users = MagicMock()
-        self.mock_quiz_batches = MagicMock()
-        self.mock_quiz_scores = MagicMock()
-        self.mock_quiz_responses = MagicMock()
-        self.mock_mongo.db.users = self.mock_users
-        self.mock_mongo.db.quiz_batches = self.mock_quiz_batches
-        self.mock_mongo.db.quiz_scores = self.mock_quiz_scores
-        self.mock_mongo.db.quiz_responses = self.mock_quiz_responses
-
-    def tearDown(self):
-        self.jwt_patcher.stop()
-        self.identity_patcher.stop()
-        self.mongo_patcher.stop()
-
-    def test_get_score_no_partner(self):
-        self.mock_users.find_one.return_value = {"_id": ObjectId()}
-        response = self.client.get("/api/quiz/score", headers=self.auth_headers)
-        self.assertEqual(response.status_code, 200)
-
-    def test_get_status_no_partner(self):
-        self.mock_users.find_one.return_value = {"_id": ObjectId()}
-        response = self.client.get("/api/quiz/status", headers=self.auth_headers)
-        self.assertEqual(response.status_code, 200)
-
-    def test_get_batch_no_partner(self):
-        self.mock_users.find_one.return_value = {"_id": ObjectId()}
-        response = self.client.get("/api/quiz/batch", headers=self.auth_headers)
-        self.assertEqual(response.status_code, 400)
-
-    def test_get_question_no_partner(self):
-        self.mock_users.find_one.return_value = {"_id": ObjectId()}
-        response = self.client.get("/api/quiz/question", headers=self.auth_headers)
-        self.assertEqual(response.status_code, 400)
-
-    def test_submit_answer_missing_params(self):
-        response = self.client.post(
-            "/api/quiz/answer", headers=self.auth_headers, json={}
-        )
-        self.assertEqual(response.status_code, 400)
-
-    def test_submit_answer_no_partner(self):
-        self.mock_users.find_one.return_value = {"_id": ObjectId()}
-        response = self.client.post(
-            "/api/quiz/answer",
-            headers=self.auth_headers,
-            json={"question_id": 1, "answer": "A"},
-        )
-        self.assertEqual(response.status_code, 400)
-
-    def test_check_partner_response_missing_params(self):
-        response = self.client.get(
-            "/api/quiz/check-partner-response", headers=self.auth_headers
-        )
-        self.assertEqual(response.status_code, 400)
-
-    def test_check_partner_response_no_partner(self):
-        self.mock_users.find_one.return_value = {"_id": ObjectId()}
-        response = self.client.get(
-            "/api/quiz/check-partner-response?question_id=1", headers=self.auth_headers
-        )
-        self.assertEqual(response.status_code, 400)
-
-    def test_get_batch_results_no_partner(self):
-        self.mock_users.find_one.return_value = {"_id": ObjectId()}
-        response = self.client.get(
-            "/api/quiz/batch/123/results", headers=self.auth_headers
-        )
-        self.assertEqual(response.status_code, 400)
-
-    def test_get_score_with_matches(self):
-        self.mock_users.find_one.return_value = {
-            "_id": ObjectId(),
-            "partner_id": str(ObjectId()),
-        }
-        self.mock_quiz_responses.find.return_value = []
-        self.mock_quiz_scores.find_one.return_value = {"score": 100}
-        self.mock_quiz_responses.count_documents.return_value = 2
-        response = self.client.get("/api/quiz/score", headers=self.auth_headers)
-        self.assertEqual(response.status_code, 200)
-
-    def test_get_score_with_partner_no_matches(self):
-        self.mock_users.find_one.return_value = {
-            "_id": ObjectId(),
-            "partner_id": str(ObjectId()),
-        }
-        self.mock_quiz_responses.find.return_value = []
-        self.mock_quiz_scores.find_one.return_value = {"score": 0}
-        self.mock_quiz_responses.count_documents.return_value = 0
-        response = self.client.get("/api/quiz/score", headers=self.auth_headers)
-        self.assertEqual(response.status_code, 200)
-
-    def test_get_status_with_partner(self):
-        self.mock_users.find_one.return_value = {
-            "_id": ObjectId(),
-            "partner_id": str(ObjectId()),
-        }
-        self.mock_quiz_batches.find_one.return_value = None
-        self.mock_quiz_responses.distinct.side_effect = [[], []]
-        self.mock_quiz_scores.find_one.return_value = {"score": 10}
-        response = self.client.get("/api/quiz/status", headers=self.auth_headers)
-        self.assertEqual(response.status_code, 200)
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from app.routes.quiz import quiz_bp, compute_pair_stats, get_or_create_batch
+from app.quiz_catalog import CATALOG
+from app.quiz_events import answer_notifier
+
+
+class TestQuizModule(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config["TESTING"] = True
+        self.app.config["JWT_SECRET_KEY"] = "test-key"
+        self.app.register_blueprint(quiz_bp, url_prefix="/api/quiz")
+        self.jwt = JWTManager(self.app)
+        self.client = self.app.test_client()
+
+        with self.app.app_context():
+            self.token = create_access_token(identity=str(ObjectId()))
+
+        self.auth_headers = {"Authorization": f"Bearer {self.token}"}
+
+        self.jwt_patcher = patch("app.routes.quiz.jwt_required")
+        self.mock_jwt_required = self.jwt_patcher.start()
+        self.mock_jwt_required.return_value = lambda f: f
+
+        self.identity_patcher = patch("app.routes.quiz.get_jwt_identity")
+        self.mock_get_jwt_identity = self.identity_patcher.start()
+        self.mock_get_jwt_identity.return_value = str(ObjectId())
+
+        self.mongo_patcher = patch("app.routes.quiz.mongo")
+        self.mock_mongo = self.mongo_patcher.start()
+
+        self.mock_users = MagicMock()
+        self.mock_quiz_batches = MagicMock()
+        self.mock_quiz_scores = MagicMock()
+        self.mock_quiz_responses = MagicMock()
+        self.mock_mongo.db.users = self.mock_users
+        self.mock_mongo.db.quiz_batches = self.mock_quiz_batches
+        self.mock_mongo.db.quiz_scores = self.mock_quiz_scores
+        self.mock_mongo.db.quiz_responses = self.mock_quiz_responses
+
+    def tearDown(self):
+        self.jwt_patcher.stop()
+        self.identity_patcher.stop()
+        self.mongo_patcher.stop()
+
+    def test_get_score_no_partner(self):
+        self.mock_users.find_one.return_value = {"_id": ObjectId()}
+        response = self.client.get("/api/quiz/score", headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_status_no_partner(self):
+        self.mock_users.find_one.return_value = {"_id": ObjectId()}
+        response = self.client.get("/api/quiz/status", headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_batch_no_partner(self):
+        self.mock_users.find_one.return_value = {"_id": ObjectId()}
+        response = self.client.get("/api/quiz/batch", headers=self.auth_headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_question_no_partner(self):
+        self.mock_users.find_one.return_value = {"_id": ObjectId()}
+        response = self.client.get("/api/quiz/question", headers=self.auth_headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_submit_answer_missing_params(self):
+        response = self.client.post(
+            "/api/quiz/answer", headers=self.auth_headers, json={}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_submit_answer_no_partner(self):
+        self.mock_users.find_one.return_value = {"_id": ObjectId()}
+        response = self.client.post(
+            "/api/quiz/answer",
+            headers=self.auth_headers,
+            json={"question_id": 1, "answer": "A"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_check_partner_response_missing_params(self):
+        response = self.client.get(
+            "/api/quiz/check-partner-response", headers=self.auth_headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_check_partner_response_no_partner(self):
+        self.mock_users.find_one.return_value = {"_id": ObjectId()}
+        response = self.client.get(
+            "/api/quiz/check-partner-response?question_id=1", headers=self.auth_headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_batch_results_no_partner(self):
+        self.mock_users.find_one.return_value = {"_id": ObjectId()}
+        response = self.client.get(
+            "/api/quiz/batch/123/results", headers=self.auth_headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_score_with_matches(self):
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(),
+            "partner_id": str(ObjectId()),
+        }
+        self.mock_quiz_responses.find.return_value = []
+        self.mock_quiz_scores.find_one.return_value = {"score": 100}
+        self.mock_quiz_responses.count_documents.return_value = 2
+        response = self.client.get("/api/quiz/score", headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_score_with_partner_no_matches(self):
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(),
+            "partner_id": str(ObjectId()),
+        }
+        self.mock_quiz_responses.find.return_value = []
+        self.mock_quiz_scores.find_one.return_value = {"score": 0}
+        self.mock_quiz_responses.count_documents.return_value = 0
+        response = self.client.get("/api/quiz/score", headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_status_with_partner(self):
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(),
+            "partner_id": str(ObjectId()),
+        }
+        self.mock_quiz_batches.find_one.return_value = None
+        self.mock_quiz_responses.distinct.side_effect = [[], []]
+        self.mock_quiz_scores.find_one.return_value = {"score": 10}
+        response = self.client.get("/api/quiz/status", headers=self.auth_headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_status_from_snapshot(self):
+        uid = self.mock_get_jwt_identity.return_value
+        partner_id = str(ObjectId())
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(uid),
+            "partner_id": partner_id,
+        }
+        slot = "user1" if sorted([uid, partner_id])[0] == uid else "user2"
+        partner_slot = "user2" if slot == "user1" else "user1"
+        self.mock_quiz_scores.find_one.return_value = {
+            "score": 12,
+            f"{slot}_answered_ids": [1, 2],
+            f"{partner_slot}_answered_ids": [1, 2, 3, 4],
+            "active_batch": {
+                "id": "b1",
+                "current_index": 2,
+                "total": 5,
+                "expires_at": datetime.utcnow() + timedelta(days=1),
+            },
+        }
+        response = self.client.get("/api/quiz/status", headers=self.auth_headers)
+        data = response.get_json()
+        self.assertEqual(data["current_score"], 12)
+        self.assertEqual(data["pending_questions"], 2)
+        self.assertTrue(data["has_active_batch"])
+        self.assertEqual(data["batch_info"]["progress"], "2/5")
+        # Everything comes from the snapshot document
+        self.mock_quiz_responses.distinct.assert_not_called()
+        self.mock_quiz_batches.find_one.assert_not_called()
+
+    def test_get_status_snapshot_batch_expired(self):
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(),
+            "partner_id": str(ObjectId()),
+        }
+        self.mock_quiz_scores.find_one.return_value = {
+            "user1_answered_ids": [],
+            "user2_answered_ids": [],
+            "active_batch": {
+                "id": "b1",
+                "current_index": 0,
+                "total": 5,
+                "expires_at": datetime.utcnow() - timedelta(minutes=1),
+            },
+        }
+        response = self.client.get("/api/quiz/status", headers=self.auth_headers)
+        data = response.get_json()
+        self.assertFalse(data["has_active_batch"])
+        self.assertIsNone(data["batch_info"])
+
+    def test_get_score_from_pair_aggregate(self):
+        uid = self.mock_get_jwt_identity.return_value
+        partner_id = str(ObjectId())
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(uid),
+            "partner_id": partner_id,
+        }
+        slot = "user1" if sorted([uid, partner_id])[0] == uid else "user2"
+        self.mock_quiz_scores.find_one.return_value = {
+            "score": 8,
+            f"{slot}_answered": 4,
+            "both_answered": 2,
+            "matched": 1,
+        }
+        response = self.client.get("/api/quiz/score", headers=self.auth_headers)
+        data = response.get_json()
+        self.assertEqual(data["total_answered"], 4)
+        self.assertEqual(data["matches"], 1)
+        self.assertEqual(data["match_percent"], 50)
+        self.mock_quiz_responses.find.assert_not_called()
+        self.mock_quiz_responses.find_one.assert_not_called()
+
+    def test_compute_pair_stats_replays_score(self):
+        pair = ["a", "b"]
+        now = datetime.utcnow()
+        responses = [
+            {"user_id": "a", "question_id": 1, "answer": "X", "created_at": now},
+            {"user_id": "b", "question_id": 1, "answer": "Y", "created_at": now},
+            {
+                "user_id": "a",
+                "question_id": 2,
+                "answer": "X",
+                "created_at": now + timedelta(minutes=1),
+            },
+            {
+                "user_id": "b",
+                "question_id": 2,
+                "answer": "X",
+                "created_at": now + timedelta(minutes=2),
+            },
+            {
+                "user_id": "a",
+                "question_id": 3,
+                "answer": "X",
+                "created_at": now + timedelta(minutes=3),
+            },
+        ]
+        stats = compute_pair_stats(pair, responses)
+        # Mismatch first clamps at 0, then the match adds 5
+        self.assertEqual(stats["score"], 5)
+        self.assertEqual(stats["user1_answered"], 3)
+        self.assertEqual(stats["user2_answered"], 2)
+        self.assertEqual(stats["both_answered"], 2)
+        self.assertEqual(stats["matched"], 1)
+        self.assertEqual(stats["user1_answered_ids"], [1, 2, 3])
+        self.assertEqual(stats["user2_answered_ids"], [1, 2])
+
+    def test_backfill_stats_command(self):
+        user_id = str(ObjectId())
+        partner_id = str(ObjectId())
+        self.mock_users.find.return_value = [
+            {"_id": ObjectId(user_id), "partner_id": partner_id},
+            {"_id": ObjectId(partner_id), "partner_id": user_id},
+        ]
+        self.mock_quiz_responses.find.return_value = [
+            {"user_id": user_id, "question_id": 1, "answer": "A"},
+            {"user_id": partner_id, "question_id": 1, "answer": "A"},
+        ]
+        result = self.app.test_cli_runner().invoke(args=["quiz", "backfill-stats"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Rebuilt quiz stats for 1 pair(s)", result.output)
+        self.mock_quiz_scores.update_one.assert_called_once()
+        stats = self.mock_quiz_scores.update_one.call_args[0][1]["$set"]
+        self.assertEqual(stats["score"], 5)
+        self.assertEqual(stats["matched"], 1)
+
+    def test_wait_partner_response_missing_params(self):
+        response = self.client.get(
+            "/api/quiz/wait-partner-response", headers=self.auth_headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_wait_partner_response_already_answered(self):
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(),
+            "partner_id": str(ObjectId()),
+        }
+        uid = self.mock_get_jwt_identity.return_value
+        partner_id = self.mock_users.find_one.return_value["partner_id"]
+        self.mock_quiz_batches.find_one.return_value = {
+            "question_ids": [1, 2],
+            "answers": {"1": {uid: "Cat", partner_id: "Cat"}},
+        }
+        self.mock_quiz_scores.find_one.return_value = {"score": 5}
+        response = self.client.get(
+            "/api/quiz/wait-partner-response?question_id=1",
+            headers=self.auth_headers,
+        )
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data["has_answered"])
+        self.assertTrue(data["is_match"])
+
+    def test_wait_partner_response_times_out(self):
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(),
+            "partner_id": str(ObjectId()),
+        }
+        self.mock_quiz_batches.find_one.return_value = None
+        response = self.client.get(
+            "/api/quiz/wait-partner-response?question_id=1&timeout=0",
+            headers=self.auth_headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.get_json()["has_answered"])
+
+    def test_wait_partner_response_woken_by_answer(self):
+        uid = self.mock_get_jwt_identity.return_value
+        partner_id = str(ObjectId())
+        pair = tuple(sorted([uid, partner_id]))
+        self.mock_users.find_one.return_value = {
+            "_id": ObjectId(uid),
+            "partner_id": partner_id,
+        }
+        answered = threading.Event()
+
+        def find_batch(query, sort=None):
+            answers = {uid: "Cat"}
+            if answered.is_set():
+                answers[partner_id] = "Cat"
+            return {"question_ids": [7], "answers": {"7": answers}}
+
+        self.mock_quiz_batches.find_one.side_effect = find_batch
+        self.mock_quiz_scores.find_one.return_value = {"score": 5}
+
+        def partner_answers():
+            time.sleep(0.2)
+            answered.set()
+            answer_notifier.notify((pair, 7))
+
+        threading.Thread(target=partner_answers, daemon=True).start()
+        started = time.monotonic()
+        response = self.client.get(
+            "/api/quiz/wait-partner-response?question_id=7",
+            headers=self.auth_headers,
+        )
+        # Woken by the notification well before the re-check interval
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertTrue(response.get_json()["has_answered"])
+
+    def test_new_batch_stores_question_ids_only(self):
+        self.mock_quiz_batches.find_one.side_effect = [None, {"_id": "b1"}]
+        get_or_create_batch(str(ObjectId()), str(ObjectId()))
+        batch = self.mock_quiz_batches.insert_one.call_args[0][0]
+        self.assertNotIn("questions", batch)
+        self.assertEqual(len(batch["question_ids"]), 5)
+        self.assertTrue(all(isinstance(i, int) for i in batch["question_ids"]))
+
+    def test_new_batch_skips_answered_questions(self):
+        answered = [i for i in CATALOG.ids if i > 5]
+        self.mock_quiz_scores.find_one.return_value = {
+            "user1_answered_ids": answered[::2],
+            "user2_answered_ids": answered[1::2],
+        }
+        self.mock_quiz_batches.find_one.side_effect = [None, {"_id": "b1"}]
+        get_or_create_batch(str(ObjectId()), str(ObjectId()))
+        batch = self.mock_quiz_batches.insert_one.call_args[0][0]
+        self.assertEqual(sorted(batch["question_ids"]), [1, 2, 3, 4, 5])
+        self.mock_quiz_responses.distinct.assert_not_called()
+
+    def test_new_batch_aggregate_without_answered_ids(self):
+        # An aggregate from before answered ids were tracked, until
+        # backfill-stats fills them in: sampling does not scan responses
+        self.mock_quiz_scores.find_one.return_value = {"score": 10}
+        self.mock_quiz_batches.find_one.side_effect = [None, {"_id": "b1"}]
+        get_or_create_batch(str(ObjectId()), str(ObjectId()))
+        batch = self.mock_quiz_batches.insert_one.call_args[0][0]
+        self.assertEqual(len(set(batch["question_ids"])), 5)
+        self.mock_quiz_responses.distinct.assert_not_called()
+
+    def test_get_question_by_id_unknown(self):
+        response = self.client.get(
+            "/api/quiz/question/999999", headers=self.auth_headers
+        )
+        self.assertEqual(response.status_code, 404)
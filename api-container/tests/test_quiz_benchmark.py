@@ -0,0 +1,21 @@
+from benchmarks.quiz_benchmark import percentile, run_benchmark
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7], 95) == 7
+
+
+def test_benchmark_smoke():
+    """A tiny mongomock run plays every batch without errors"""
+    result = run_benchmark(couples=2, threads=2, batches=1)
+
+    endpoints = result["endpoints"]
+    assert endpoints["GET /batch"]["requests"] == 2
+    # Both partners fetch and answer each of the 5 questions
+    assert endpoints["POST /answer"]["requests"] == 20
+    assert endpoints["GET /check-partner-response"]["requests"] == 10
+    assert all(row["errors"] == 0 for row in endpoints.values())
+    assert all(row["ops_per_request"] > 0 for row in endpoints.values())
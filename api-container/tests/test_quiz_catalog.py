@@ -0,0 +1,50 @@
+import pytest
+from app.quiz_catalog import CATALOG, QUIZ_QUESTIONS, QuizCatalog
+
+
+def test_ids_follow_source_order():
+    """Ids are assigned by position without mutating the source data"""
+    assert CATALOG.ids == tuple(range(1, len(QUIZ_QUESTIONS) + 1))
+    assert CATALOG.get(1).text == QUIZ_QUESTIONS[0]["text"]
+    assert all("id" not in q for q in QUIZ_QUESTIONS)
+
+
+def test_lookup_by_id_and_tag():
+    """Entries can be found by id and by tag"""
+    question = CATALOG.get(2)
+    assert question.id == 2
+    assert 2 in CATALOG
+    assert CATALOG.get(len(CATALOG) + 1) is None
+    assert question in CATALOG.by_tag(question.tag)
+    assert all(q.tag == "pets" for q in CATALOG.by_tag("pets"))
+    assert CATALOG.by_tag("no-such-tag") == ()
+
+
+def test_entries_are_immutable():
+    """Catalog entries cannot be modified in place"""
+    question = CATALOG.get(1)
+    with pytest.raises(AttributeError):
+        question.text = "changed"
+    assert isinstance(question.options, tuple)
+
+
+def test_sample_ids():
+    """Samples are distinct catalog ids and never exceed the catalog size"""
+    catalog = QuizCatalog(QUIZ_QUESTIONS[:3])
+    assert sorted(catalog.sample_ids(3)) == [1, 2, 3]
+    assert len(catalog.sample_ids(10)) == 3
+    ids = CATALOG.sample_ids(5)
+    assert len(set(ids)) == 5
+    assert all(i in CATALOG for i in ids)
+
+
+def test_sample_ids_skips_excluded():
+    """Excluded ids are only used once every other id is taken"""
+    catalog = QuizCatalog(QUIZ_QUESTIONS[:6])
+    assert sorted(catalog.sample_ids(3, exclude={1, 2, 3})) == [4, 5, 6]
+
+    ids = catalog.sample_ids(3, exclude={1, 2, 3, 4, 5})
+    assert len(set(ids)) == 3
+    assert ids[0] == 6
+
+    assert len(catalog.sample_ids(3, exclude=catalog.ids)) == 3
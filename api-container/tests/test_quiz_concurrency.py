@@ -0,0 +1,298 @@
+import threading
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+from app.routes.quiz import expire_batches, quiz_bp, rebuild_pair_stats
+
+
+class SerializedCollection:
+    """
+    mongomock collection whose operations run one at a time.
+
+    mongod applies each single-document write atomically; mongomock does not
+    lock across the find and update halves of find_one_and_update, so the
+    lock stands in for the server's guarantee.
+    """
+
+    def __init__(self, collection, lock):
+        self._collection = collection
+        self._lock = lock
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return call
+
+
+class SerializedDatabase:
+    def __init__(self, db):
+        self._db = db
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        return SerializedCollection(getattr(self._db, name), self._lock)
+
+
+@pytest.fixture
+def quiz_env():
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.config["JWT_SECRET_KEY"] = "test-key"
+    app.register_blueprint(quiz_bp, url_prefix="/api/quiz")
+    JWTManager(app)
+
+    raw_db = mongomock.MongoClient().db
+    user_id, partner_id = ObjectId(), ObjectId()
+    raw_db.users.insert_many(
+        [
+            {"_id": user_id, "partner_id": str(partner_id)},
+            {"_id": partner_id, "partner_id": str(user_id)},
+        ]
+    )
+    pair = sorted([str(user_id), str(partner_id)])
+    raw_db.quiz_batches.insert_one(
+        {
+            "user1_id": pair[0],
+            "user2_id": pair[1],
+            "question_ids": [1, 2, 3, 4, 5],
+            "answers": {},
+            "created_at": datetime.utcnow(),
+            "expires_at": datetime.utcnow() + timedelta(days=7),
+            "completed": False,
+            "current_index": 0,
+        }
+    )
+
+    mock_mongo = MagicMock()
+    mock_mongo.db = SerializedDatabase(raw_db)
+    # A standalone server: no transactions
+    mock_mongo.cx.topology_description.topology_type_name = "Single"
+
+    with app.app_context():
+        tokens = [
+            create_access_token(identity=str(user_id)),
+            create_access_token(identity=str(partner_id)),
+        ]
+
+    with patch("app.routes.quiz.mongo", mock_mongo), patch(
+        "app.routes.quiz._transactions_supported", None
+    ):
+        yield app, raw_db, tokens
+
+
+def submit_concurrently(app, tokens, payloads):
+    """POST one answer per token at the same instant, return the responses"""
+    barrier = threading.Barrier(len(tokens))
+    results = [None] * len(tokens)
+
+    def submit(i):
+        client = app.test_client()
+        barrier.wait()
+        results[i] = client.post(
+            "/api/quiz/answer",
+            json=payloads[i],
+            headers={"Authorization": f"Bearer {tokens[i]}"},
+        )
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(tokens))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_partners_answering_together_score_once(quiz_env):
+    """Both partners answering at once applies the score exactly once"""
+    app, db, tokens = quiz_env
+
+    for question_id in [1, 2, 3, 4, 5]:
+        answer = {"question_id": question_id, "answer": "Cat"}
+        responses = submit_concurrently(app, tokens, [answer, answer])
+
+        assert [r.status_code for r in responses] == [200, 200]
+        data = [r.get_json() for r in responses]
+        # Exactly one submission sees both answers and resolves the question
+        assert sorted(d["waiting_for_partner"] for d in data) == [False, True]
+
+    stats = db.quiz_scores.find_one()
+    assert stats["score"] == 25
+    assert stats["both_answered"] == 5
+    assert stats["matched"] == 5
+    assert stats["user1_answered"] == 5
+    assert stats["user2_answered"] == 5
+    assert stats["user1_answered_ids"] == [1, 2, 3, 4, 5]
+    assert stats["user2_answered_ids"] == [1, 2, 3, 4, 5]
+
+    batch = db.quiz_batches.find_one()
+    assert batch["current_index"] == 5
+    assert batch["completed"] is True
+    # Completed batches are deleted by the TTL index after their retention
+    assert batch["purge_at"] > datetime.utcnow()
+    assert db.quiz_responses.count_documents({}) == 10
+
+    # The resolving submission of the last question reports completion
+    assert any(d["batch_complete"] for d in data)
+
+
+def test_duplicate_submission_is_rejected(quiz_env):
+    """The same user submitting twice at once is only recorded once"""
+    app, db, tokens = quiz_env
+    answer = {"question_id": 1, "answer": "Cat"}
+
+    responses = submit_concurrently(app, [tokens[0], tokens[0]], [answer, answer])
+
+    assert sorted(r.status_code for r in responses) == [200, 409]
+    assert db.quiz_responses.count_documents({}) == 1
+    assert db.quiz_scores.find_one()["score"] == 0
+
+
+def test_expired_batch_is_not_active(quiz_env):
+    """A batch past expires_at accepts no answers and is archived by the sweep"""
+    app, db, tokens = quiz_env
+    past = datetime.utcnow() - timedelta(minutes=1)
+    db.quiz_batches.update_one({}, {"$set": {"expires_at": past}})
+    db.quiz_batches.insert_one(
+        {"user1_id": "x", "user2_id": "y", "completed": True, "expires_at": past}
+    )
+
+    response = app.test_client().post(
+        "/api/quiz/answer",
+        json={"question_id": 1, "answer": "Cat"},
+        headers={"Authorization": f"Bearer {tokens[0]}"},
+    )
+    assert response.status_code == 400
+
+    assert expire_batches(db) == 1
+    batch = db.quiz_batches.find_one({"expired": True})
+    assert batch["completed"] is True
+    assert batch["purge_at"] > datetime.utcnow()
+    # Completed batches are left alone, and a second sweep finds nothing
+    assert db.quiz_batches.count_documents({"purge_at": {"$exists": True}}) == 1
+    assert expire_batches(db) == 0
+
+
+def test_status_snapshot_follows_answers(quiz_env):
+    """Batch creation and answers keep the status snapshot current"""
+    app, db, tokens = quiz_env
+    db.quiz_batches.delete_many({})
+    client = app.test_client()
+    headers = [{"Authorization": f"Bearer {token}"} for token in tokens]
+
+    client.get("/api/quiz/batch", headers=headers[0])
+    question_ids = db.quiz_batches.find_one()["question_ids"]
+
+    for h in headers:
+        client.post(
+            "/api/quiz/answer",
+            json={"question_id": question_ids[0], "answer": "Cat"},
+            headers=h,
+        )
+    client.post(
+        "/api/quiz/answer",
+        json={"question_id": question_ids[1], "answer": "Cat"},
+        headers=headers[0],
+    )
+
+    status = client.get("/api/quiz/status", headers=headers[1]).get_json()
+    assert status["has_active_batch"] is True
+    assert status["batch_info"]["progress"] == "1/5"
+    assert status["pending_questions"] == 1
+    assert status["current_score"] == 5
+
+
+def test_rebuild_matches_live_stats_after_repeat(quiz_env):
+    """A question served again after the catalog ran out counts the same way"""
+    app, db, tokens = quiz_env
+    client = app.test_client()
+    headers = [{"Authorization": f"Bearer {token}"} for token in tokens]
+    db.quiz_batches.update_one({}, {"$set": {"question_ids": [1]}})
+    batch = db.quiz_batches.find_one()
+
+    def answer_both(answers):
+        for h, answer in zip(headers, answers):
+            response = client.post(
+                "/api/quiz/answer", json={"question_id": 1, "answer": answer}, headers=h
+            )
+            assert response.status_code == 200
+
+    answer_both(["Cat", "Cat"])
+    assert db.quiz_batches.find_one({"_id": batch["_id"]})["completed"] is True
+
+    # The next batch repeats question 1, as sample_ids tops up with answered ids
+    db.quiz_batches.insert_one(
+        {
+            **{k: batch[k] for k in ("user1_id", "user2_id", "expires_at")},
+            "question_ids": [1],
+            "answers": {},
+            "created_at": datetime.utcnow(),
+            "completed": False,
+            "current_index": 0,
+        }
+    )
+    answer_both(["Cat", "Dog"])
+
+    fields = [
+        "score",
+        "user1_answered",
+        "user2_answered",
+        "both_answered",
+        "matched",
+        "user1_answered_ids",
+        "user2_answered_ids",
+    ]
+    live = db.quiz_scores.find_one()
+    assert live["score"] == 3 and live["both_answered"] == 2
+    with patch("app.routes.quiz.mongo") as mock_mongo:
+        mock_mongo.db = db
+        rebuilt = rebuild_pair_stats(batch["user1_id"], batch["user2_id"])
+    assert {f: rebuilt[f] for f in fields} == {f: live[f] for f in fields}
+
+
+def test_batch_from_before_answers_are_kept_on_it(quiz_env):
+    """Answers stored only in quiz_responses are picked up by the batch"""
+    app, db, tokens = quiz_env
+    client = app.test_client()
+    user_id, partner_id = [str(user["_id"]) for user in db.users.find()]
+    db.quiz_batches.update_one({}, {"$unset": {"answers": ""}})
+    batch_id = str(db.quiz_batches.find_one()["_id"])
+    db.quiz_responses.insert_many(
+        [
+            {"user_id": partner_id, "question_id": 1, "answer": "Cat"},
+            {"user_id": user_id, "question_id": 2, "answer": "Dog"},
+            {"user_id": partner_id, "question_id": 2, "answer": "Dog"},
+        ]
+    )
+    db.quiz_responses.update_many({}, {"$set": {"batch_id": batch_id}})
+    headers = {"Authorization": f"Bearer {tokens[0]}"}
+
+    # The partner answered question 1 before it, the user after it
+    response = client.post(
+        "/api/quiz/answer", json={"question_id": 1, "answer": "Cat"}, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["waiting_for_partner"] is False and data["is_match"] is True
+    assert db.quiz_batches.find_one()["answers"]["1"] == {
+        partner_id: "Cat",
+        user_id: "Cat",
+    }
+
+    # Both answered question 2 before the upgrade
+    db.quiz_batches.update_one({}, {"$unset": {"answers": ""}})
+    response = client.get(
+        "/api/quiz/wait-partner-response?question_id=2&timeout=0", headers=headers
+    )
+    assert response.get_json()["has_answered"] is True
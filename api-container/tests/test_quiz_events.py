@@ -0,0 +1,52 @@
+import threading
+import time
+from app.quiz_events import AnswerNotifier
+
+
+def test_notify_wakes_listener():
+    """A notification wakes a waiting listener"""
+    notifier = AnswerNotifier()
+    woke = []
+
+    with notifier.listen(("pair", 1)) as listener:
+        thread = threading.Thread(
+            target=lambda: woke.append(listener.wait(timeout=5)), daemon=True
+        )
+        thread.start()
+        time.sleep(0.05)
+        notifier.notify(("pair", 1))
+        thread.join(timeout=5)
+
+    assert woke == [True]
+
+
+def test_notify_before_wait_is_not_lost():
+    """A notification between listen() and wait() is still observed"""
+    notifier = AnswerNotifier()
+
+    with notifier.listen(("pair", 1)) as listener:
+        notifier.notify(("pair", 1))
+        assert listener.wait(timeout=0) is True
+        # The notification was consumed, so the next wait times out
+        assert listener.wait(timeout=0) is False
+
+
+def test_wait_times_out_for_other_keys():
+    """Notifications for a different question do not wake the listener"""
+    notifier = AnswerNotifier()
+
+    with notifier.listen(("pair", 1)) as listener:
+        notifier.notify(("pair", 2))
+        assert listener.wait(timeout=0.05) is False
+
+
+def test_state_is_released_without_listeners():
+    """Keys are forgotten once the last listener leaves"""
+    notifier = AnswerNotifier()
+
+    notifier.notify(("pair", 1))
+    with notifier.listen(("pair", 1)):
+        notifier.notify(("pair", 1))
+
+    assert notifier._waiters == {}
+    assert notifier._versions == {}
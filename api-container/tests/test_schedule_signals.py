@@ -0,0 +1,92 @@
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import mongomock
+
+from app.schedule_signals import (
+    AWAIT_MS,
+    SIGNALS,
+    ScheduleListener,
+    ensure_signal_collection,
+    signal_scheduled,
+)
+
+
+def test_signal_records_scheduled_time():
+    db = mongomock.MongoClient().db
+    when = datetime(2025, 2, 14, 0, 0)
+
+    signal_scheduled(db, when)
+
+    assert db[SIGNALS].find_one()["scheduled_time"] == when
+
+
+def test_missing_capped_support_is_logged():
+    """mongomock cannot create capped collections; startup carries on"""
+    logger = MagicMock()
+    ensure_signal_collection(mongomock.MongoClient().db, logger)
+    logger.error.assert_called_once()
+
+
+def test_listener_returns_on_signal():
+    """A signal after the ones already written ends the wait straight away"""
+    db = MagicMock()
+    cursor = db[SIGNALS].find.return_value.max_await_time_ms.return_value
+    cursor.alive = True
+    # Two existing signals are skipped when the listener starts
+    cursor.try_next.side_effect = [{"_id": 2}, {"_id": 1}, None, None, {"_id": 3}]
+    listener = ScheduleListener(db)
+
+    started = time.monotonic()
+    assert listener.wait(5) is True
+    assert time.monotonic() - started < 1
+    # Tailed in natural order: _ids of different writers are not ordered
+    assert db[SIGNALS].find.call_args[0] == ({},)
+    assert db[SIGNALS].find.call_count == 1
+
+
+def test_listener_reopens_dead_cursor():
+    """A cursor that died may have missed signals, so the wait ends at once"""
+    db = MagicMock()
+    cursor = db[SIGNALS].find.return_value.max_await_time_ms.return_value
+    cursor.alive = True
+    cursor.try_next.return_value = None
+    listener = ScheduleListener(db)
+
+    cursor.alive = False
+    opened = db[SIGNALS].find.return_value.max_await_time_ms.return_value = MagicMock()
+    opened.alive = True
+    opened.try_next.return_value = None
+
+    assert listener.wait(5) is True
+    assert db[SIGNALS].find.call_count == 2
+    assert listener.wait(0.05) is False
+
+
+def test_listener_overruns_timeout_by_one_await_at_most():
+    """A timed-out wait ends after the cursor read in progress returns"""
+    db = MagicMock()
+    cursor = db[SIGNALS].find.return_value.max_await_time_ms.return_value
+    cursor.alive = True
+    cursor.try_next.return_value = None
+    listener = ScheduleListener(db)
+    db[SIGNALS].find.return_value.max_await_time_ms.assert_called_once_with(AWAIT_MS)
+
+    def await_signal():
+        time.sleep(AWAIT_MS / 1000)
+
+    cursor.try_next.side_effect = await_signal
+    started = time.monotonic()
+    assert listener.wait(0.05) is False
+    assert time.monotonic() - started < 0.05 + AWAIT_MS / 1000 + 0.1
+    assert AWAIT_MS <= 200
+
+
+def test_listener_falls_back_to_sleeping():
+    """Without tailable cursors the wait is a plain sleep"""
+    listener = ScheduleListener(mongomock.MongoClient().db)
+
+    started = time.monotonic()
+    assert listener.wait(0.05) is False
+    assert time.monotonic() - started >= 0.05
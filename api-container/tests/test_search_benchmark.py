@@ -0,0 +1,11 @@
+from benchmarks.search_benchmark import run_benchmark
+
+
+def test_benchmark_smoke():
+    """A small in-process run searches every conversation within the target"""
+    result = run_benchmark(messages=2000, couples=4, queries=50, target_ms=1000)
+
+    assert result["messages_per_conversation"] == 500
+    assert result["queries"] == 50
+    assert result["mean_hits"] > 0
+    assert result["within_target"] is True
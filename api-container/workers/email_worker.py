@@ -0,0 +1,162 @@
+# api-container/workers/email_worker.py
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+from pymongo import MongoClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.email_outbox import OUTBOX_BATCH_SIZE, claim_emails, deliver_batch, mark_failed
+from app.email_utils import init_mail, mail
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("email_worker")
+
+# MongoDB connection
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://db:27017/together")
+client = MongoClient(MONGO_URI)
+db = client.get_database()
+
+# Seconds to wait before polling again when the outbox is empty
+POLL_INTERVAL = float(os.environ.get("EMAIL_POLL_INTERVAL", "5"))
+
+# SMTP connections open at once, each sending one claimed batch
+CONCURRENCY = int(os.environ.get("EMAIL_CONCURRENCY", "4"))
+# Claimed batches allowed to wait for a free connection; when they are all
+# taken the worker stops claiming until a batch finishes
+QUEUE_SIZE = int(os.environ.get("EMAIL_QUEUE_SIZE", "4"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class BoundedExecutor:
+    """
+    Thread pool whose submit() blocks while max_workers tasks are running
+    and queue_size more are waiting, so the caller slows down to the pace of
+    the pool instead of piling up work.
+    """
+
+    def __init__(self, max_workers, queue_size=0):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="smtp"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+
+    def reserve(self):
+        """Block until there is room for one more task and hold it"""
+        self._slots.acquire()
+
+    def release(self):
+        """Give back room held by reserve() that ended up unused"""
+        self._slots.release()
+
+    def submit(self, fn, *args, **kwargs):
+        self.reserve()
+        return self.submit_reserved(fn, *args, **kwargs)
+
+    def submit_reserved(self, fn, *args, **kwargs):
+        """submit() for a caller already holding room from reserve()"""
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def create_mail_app():
+    """Flask app holding the SMTP settings from the MAIL_* environment"""
+    app = Flask(__name__)
+    for key in ("MAIL_SERVER", "MAIL_USERNAME", "MAIL_PASSWORD", "MAIL_DEFAULT_SENDER"):
+        if key in os.environ:
+            app.config[key] = os.environ[key]
+    if "MAIL_PORT" in os.environ:
+        app.config["MAIL_PORT"] = int(os.environ["MAIL_PORT"])
+    if "MAIL_USE_TLS" in os.environ:
+        app.config["MAIL_USE_TLS"] = os.environ["MAIL_USE_TLS"].lower() == "true"
+    init_mail(app)
+    return app
+
+
+def send_batch(app, jobs):
+    """
+    Send a claimed batch of emails over a single SMTP connection.
+    Returns the number of emails sent.
+    """
+    with app.app_context():
+        try:
+            with mail.connect() as connection:
+                sent, failed = deliver_batch(db, jobs, connection.send, WORKER_ID)
+        except Exception as e:
+            # The SMTP connection itself failed; every job in the batch retries
+            logger.error(f"Error connecting to mail server: {str(e)}")
+            for job in jobs:
+                try:
+                    mark_failed(db, job, WORKER_ID, e)
+                except Exception as record_error:
+                    # Left claimed; the job is retried once its lease runs out
+                    logger.error(f"Error recording failed email: {record_error}")
+            return 0
+
+    logger.info(f"Delivered {sent} email(s), {failed} failed")
+    return sent
+
+
+def deliver_pending(app, executor):
+    """
+    Claim one batch of due emails and hand it to the executor, waiting for
+    room there first. Returns the number of jobs claimed.
+
+    The room is taken before the claim, so no job's lease runs down while
+    its batch waits for the executor.
+    """
+    executor.reserve()
+    try:
+        jobs = claim_emails(db, WORKER_ID, OUTBOX_BATCH_SIZE)
+    except Exception:
+        executor.release()
+        raise
+    if not jobs:
+        executor.release()
+        return 0
+    # Gives the room back itself if the pool refuses the batch
+    executor.submit_reserved(send_batch, app, jobs)
+    return len(jobs)
+
+
+def run_worker():
+    """
+    Run the worker process in a loop
+    """
+    logger.info(
+        f"Starting email delivery worker {WORKER_ID} with {CONCURRENCY} connection(s)"
+    )
+    app = create_mail_app()
+    executor = BoundedExecutor(CONCURRENCY, QUEUE_SIZE)
+
+    while True:
+        try:
+            claimed = deliver_pending(app, executor)
+        except Exception as e:
+            logger.error(f"Error in worker process: {str(e)}")
+            claimed = 0
+
+        # A full batch suggests more are waiting, so go again straight away
+        if claimed < OUTBOX_BATCH_SIZE:
+            time.sleep(POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    run_worker()
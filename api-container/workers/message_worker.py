@@ -1,8 +1,14 @@
 # api-container/workers/message_worker.py
 import os
+import random
+import socket
 import time
-from datetime import datetime
-from pymongo import MongoClient
+from datetime import datetime, timedelta
+from collections import Counter
+from prometheus_client import CollectorRegistry, Gauge, Histogram, start_http_server
+from prometheus_client import Counter as MetricCounter
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
 from bson.objectid import ObjectId
 import logging
 
@@ -22,87 +28,530 @@ import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app.email_utils import send_partner_message
+from app import email_outbox
+from app.email_utils import send_partner_messages
+from app.change_versions import MESSAGES, bump_versions
+from app.message_store import bump_unread_counts, conversation_key, participants_key
+from app.routes.quiz import expire_batches
+from app.schedule_signals import ScheduleListener, ensure_signal_collection
 
+# Longest the worker sleeps without looking at the schedule again; also how
+# often expired quiz batches are swept
+MAX_IDLE_SECONDS = 60
 
-def get_user_by_id(user_id):
+# How long a claimed message belongs to this worker. A worker that dies
+# mid-delivery leaves the message to be reclaimed once the lease runs out.
+LEASE_SECONDS = int(os.environ.get("SCHEDULE_LEASE_SECONDS", "300"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Due messages claimed and delivered together, with one write per collection
+CHUNK_SIZE = int(os.environ.get("SCHEDULE_CHUNK_SIZE", "500"))
+
+DUPLICATE_KEY = 11000
+
+# Failed deliveries are retried with the email outbox's backoff; after
+# MAX_ATTEMPTS failed attempts a message is left "dead" with its last_error
+MAX_ATTEMPTS = int(os.environ.get("SCHEDULE_MAX_ATTEMPTS", "5"))
+
+# All the worker reads of a user
+USER_FIELDS = {"name": 1, "email": 1, "email_notifications": 1}
+
+# Port of the Prometheus /metrics endpoint; 0 turns it off
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9101"))
+
+# The worker's own registry, so only its metrics are served
+METRICS = CollectorRegistry()
+SENT = MetricCounter(
+    "scheduled_messages_sent_total",
+    "Scheduled messages delivered",
+    registry=METRICS,
+)
+FAILED = MetricCounter(
+    "scheduled_messages_failed_total",
+    "Failed attempts to deliver a scheduled message",
+    registry=METRICS,
+)
+DEAD = MetricCounter(
+    "scheduled_messages_dead_total",
+    "Scheduled messages given up after failing too often",
+    registry=METRICS,
+)
+EMAILED = MetricCounter(
+    "scheduled_message_emails_total",
+    "Notification emails queued for delivered scheduled messages",
+    registry=METRICS,
+)
+DISPATCH_LAG = Histogram(
+    "scheduled_message_dispatch_lag_seconds",
+    "Time from scheduled_time to delivery",
+    registry=METRICS,
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+PASS_DURATION = Histogram(
+    "scheduled_message_pass_seconds",
+    "Duration of a pass over the due scheduled messages",
+    registry=METRICS,
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+BACKLOG = Gauge(
+    "scheduled_messages_backlog",
+    "Pending scheduled messages already due at the start of the last pass",
+    registry=METRICS,
+)
+MONGO_SECONDS = Histogram(
+    "scheduled_message_mongo_seconds",
+    "Duration of the worker's MongoDB operations",
+    ["operation"],
+    registry=METRICS,
+)
+
+
+def get_users_by_ids(user_ids, cache=None):
     """
-    Retrieve a user by ID
+    Retrieve several users with one query, keyed by their string ID. Users
+    already in cache are not read again, and the ones read are added to it;
+    unknown and invalid IDs map to None.
     """
-    try:
-        user = db.users.find_one({"_id": ObjectId(user_id)})
-        if user:
-            user["_id"] = str(user["_id"])
-        return user
-    except Exception as e:
-        logger.error(f"Error fetching user {user_id}: {str(e)}")
-        return None
+    cache = {} if cache is None else cache
+    missing = {
+        user_id
+        for user_id in user_ids
+        if user_id not in cache and ObjectId.is_valid(user_id)
+    }
+    if missing:
+        try:
+            with MONGO_SECONDS.labels(operation="find_users").time():
+                found = list(
+                    db.users.find(
+                        {"_id": {"$in": [ObjectId(user_id) for user_id in missing]}},
+                        USER_FIELDS,
+                    )
+                )
+            for user in found:
+                user["_id"] = str(user["_id"])
+                cache[user["_id"]] = user
+            for user_id in missing:
+                cache.setdefault(user_id, None)
+        except Exception as e:
+            logger.error(f"Error fetching users: {str(e)}")
+    return {user_id: cache.get(user_id) for user_id in user_ids}
 
 
-def process_scheduled_messages():
+def due_filter(now):
     """
-    Check for and process scheduled messages that are due to be sent
+    Pending messages that are due, failed ones due for another attempt, and
+    claimed ones whose lease expired
     """
-    current_time = datetime.utcnow()
-    logger.info(f"Checking for scheduled messages to send at {current_time}")
+    return {
+        "$or": [
+            {"status": "pending", "scheduled_time": {"$lte": now}},
+            {"status": "retrying", "next_attempt_at": {"$lte": now}},
+            {"status": "processing", "lease_expires_at": {"$lte": now}},
+        ]
+    }
+
+
+# (status, due field) of messages due again: claims whose lease expired and
+# failed messages whose backoff has passed. Each has its own partial index.
+DUE_AGAIN = [("processing", "lease_expires_at"), ("retrying", "next_attempt_at")]
+
+
+def find_due(now, limit, after=None):
+    """
+    IDs of the next up to limit due scheduled messages, and the resume token
+    to pass back as after for the chunk that follows.
+
+    Messages due again come first; they are few and leave their state once
+    claimed. Pending messages are then read in (scheduled_time, _id) order
+    along the partial index of pending messages, starting after the token,
+    so a pass over any backlog reads each entry once and holds one chunk.
+    """
+    found = []
+    for status, field in DUE_AGAIN:
+        if len(found) < limit:
+            found += (
+                db.scheduled_messages.find(
+                    {"status": status, field: {"$lte": now}}, {"_id": 1}
+                )
+                .sort(field, 1)
+                .limit(limit - len(found))
+            )
+
+    if len(found) < limit:
+        query = {"status": "pending", "scheduled_time": {"$lte": now}}
+        if after:
+            scheduled_time, last_id = after
+            query["scheduled_time"]["$gte"] = scheduled_time
+            query["$or"] = [
+                {"scheduled_time": {"$gt": scheduled_time}},
+                {"_id": {"$gt": last_id}},
+            ]
+        pending = list(
+            db.scheduled_messages.find(query, {"_id": 1, "scheduled_time": 1})
+            .sort([("scheduled_time", 1), ("_id", 1)])
+            .limit(limit - len(found))
+        )
+        if pending:
+            after = (pending[-1]["scheduled_time"], pending[-1]["_id"])
+        found += pending
+    return [message["_id"] for message in found], after
+
+
+def claim_due_messages(now, ids):
+    """
+    Take the scheduled messages among ids that are due by now for this
+    worker, earliest first. The lease runs from the claim itself rather than
+    from now, which is the start of a pass that may have been running for a
+    while.
+
+    Every claim counts as an attempt, so a message whose attempts never
+    record an outcome (a worker dying on it, or a write after the insert
+    failing every time) still runs out of attempts.
+
+    The claiming update_many re-checks that each message is still due, so
+    one another worker claimed in the meantime is skipped; the ones that
+    carry this worker's new lease afterwards are the claimed chunk.
+    """
+    if not ids:
+        return []
+    with MONGO_SECONDS.labels(operation="claim").time():
+        lease_expires_at = datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)
+        db.scheduled_messages.update_many(
+            {"_id": {"$in": ids}, **due_filter(now)},
+            {
+                "$set": {
+                    "status": "processing",
+                    "lease_owner": WORKER_ID,
+                    "lease_expires_at": lease_expires_at,
+                },
+                "$inc": {"attempts": 1},
+            },
+        )
+        return list(
+            db.scheduled_messages.find(
+                {
+                    "_id": {"$in": ids},
+                    "status": "processing",
+                    "lease_owner": WORKER_ID,
+                    "lease_expires_at": lease_expires_at,
+                }
+            ).sort("scheduled_time", 1)
+        )
 
-    # Find all scheduled messages that are due to be sent
-    scheduled_messages = db.scheduled_messages.find(
-        {"scheduled_time": {"$lte": current_time}, "status": "pending"}
+
+def finish_message(message, update):
+    """
+    Write recording the outcome of a claimed message; it only applies while
+    this worker still owns the message
+    """
+    return UpdateOne(
+        {"_id": message["_id"], "lease_owner": WORKER_ID},
+        {"$set": update, "$unset": {"lease_owner": "", "lease_expires_at": ""}},
     )
 
-    count = 0
-    for message in scheduled_messages:
-        try:
-            # Create a new message in the messages collection
-            new_message = {
-                "content": message["content"],
-                "sender_id": message["sender_id"],
-                "receiver_id": message["receiver_id"],
-                "created_at": current_time,
-                "is_read": False,
-                "scheduled_from": str(
-                    message["_id"]
-                ),  # Reference to the original scheduled message
-            }
-
-            # Insert the new message
-            db.messages.insert_one(new_message)
-
-            # Update the scheduled message status to 'sent'
-            db.scheduled_messages.update_one(
-                {"_id": message["_id"]},
-                {"$set": {"status": "sent", "sent_at": current_time}},
+
+def retry_delay(attempts):
+    """
+    The outbox's backoff after the given number of failed attempts, with
+    jitter so messages that failed together are not retried together
+    """
+    return email_outbox.retry_delay(attempts) * random.uniform(0.5, 1)
+
+
+def failed_attempt(message, error, now, retry=True):
+    """
+    Outcome of a failed delivery attempt: another attempt after a backoff,
+    or the dead state once MAX_ATTEMPTS is reached or retry is False
+    """
+    attempts = message.get("attempts", 1)
+    update = {"attempts": attempts, "last_error": str(error)}
+    FAILED.inc()
+    if retry and attempts < MAX_ATTEMPTS:
+        update["status"] = "retrying"
+        update["next_attempt_at"] = now + retry_delay(attempts)
+        logger.warning(
+            f"Scheduled message {message['_id']} failed (attempt {attempts}), "
+            f"retrying at {update['next_attempt_at']}: {error}"
+        )
+    else:
+        update["status"] = "dead"
+        update["dead_at"] = now
+        DEAD.inc()
+        logger.error(
+            f"Giving up on scheduled message {message['_id']} "
+            f"after {attempts} attempt(s): {error}"
+        )
+    return finish_message(message, update)
+
+
+def delivered_message(message, now):
+    """The messages document a scheduled message turns into"""
+    for field in ("sender_id", "receiver_id"):
+        if not ObjectId.is_valid(message[field]):
+            raise ValueError(f"Invalid {field}: {message[field]!r}")
+    return {
+        "content": message["content"],
+        "sender_id": message["sender_id"],
+        "receiver_id": message["receiver_id"],
+        "participants": participants_key(message["sender_id"], message["receiver_id"]),
+        "conversation": conversation_key(message["sender_id"], message["receiver_id"]),
+        "created_at": now,
+        "is_read": False,
+        "scheduled_from": str(message["_id"]),  # Reference to the original
+        # Removed once the counters are bumped and the email is queued
+        "side_effects_pending": True,
+    }
+
+
+def insert_messages(documents):
+    """
+    Insert a chunk of delivered messages in one unordered insert_many.
+
+    Returns {position: error} for the documents that were not inserted. A
+    duplicate scheduled_from means the message was delivered before, by a
+    worker whose lease expired; that error is None.
+    """
+    try:
+        with MONGO_SECONDS.labels(operation="insert_messages").time():
+            db.messages.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        return {
+            error["index"]: (
+                None if error["code"] == DUPLICATE_KEY else error.get("errmsg")
             )
+            for error in e.details["writeErrors"]
+        }
+    return {}
 
-            # Send email notification if receiver has it enabled
-            try:
-                # Get sender and receiver info
-                sender = get_user_by_id(message["sender_id"])
-                receiver = get_user_by_id(message["receiver_id"])
 
-                # Check if receiver has email notifications enabled
-                if receiver and receiver.get("email_notifications", True):
-                    send_partner_message(
+def unfinished_deliveries(messages):
+    """
+    IDs of the scheduled messages among messages whose delivered copy is
+    still waiting for its side effects
+    """
+    with MONGO_SECONDS.labels(operation="find_unfinished").time():
+        return {
+            delivered["scheduled_from"]
+            for delivered in db.messages.find(
+                {
+                    "scheduled_from": {"$in": [str(m["_id"]) for m in messages]},
+                    "side_effects_pending": True,
+                },
+                {"scheduled_from": 1},
+            )
+        }
+
+
+def finish_side_effects(messages):
+    """Record that the side effects of delivered messages are done"""
+    with MONGO_SECONDS.labels(operation="finish_side_effects").time():
+        db.messages.update_many(
+            {"scheduled_from": {"$in": [str(m["_id"]) for m in messages]}},
+            {"$unset": {"side_effects_pending": ""}},
+        )
+
+
+def notify_receivers(messages, user_cache=None):
+    """Queue notification emails for delivered messages with one outbox write"""
+    user_ids = []
+    for message in messages:
+        user_ids += [message["sender_id"], message["receiver_id"]]
+    users = get_users_by_ids(user_ids, user_cache)
+
+    notifications = []
+    for message in messages:
+        try:
+            sender = users.get(message["sender_id"])
+            receiver = users.get(message["receiver_id"])
+
+            # Check if receiver has email notifications enabled
+            if receiver and receiver.get("email_notifications", True):
+                notifications.append(
+                    (
                         receiver["email"],
                         sender["name"] if sender else "Your partner",
                         message["content"],
                     )
-                    logger.info(f"Sent email notification to {receiver['email']}")
-            except Exception as e:
-                logger.error(f"Error sending email notification: {str(e)}")
-                # Continue processing even if email fails
+                )
+        except Exception as e:
+            logger.error(f"Error preparing email notification: {str(e)}")
+            # Continue with the other emails
+    if not notifications:
+        return
+    try:
+        send_partner_messages(notifications, db=db)
+        EMAILED.inc(len(notifications))
+        logger.info(f"Queued {len(notifications)} email notification(s)")
+    except Exception as e:
+        logger.error(f"Error sending email notifications: {str(e)}")
+
+
+def record_outcomes(outcomes):
+    """Write the outcomes of a chunk in one round trip"""
+    with MONGO_SECONDS.labels(operation="record_outcomes").time():
+        db.scheduled_messages.bulk_write(outcomes, ordered=False)
+
 
-            count += 1
-            logger.info(f"Sent scheduled message {message['_id']}")
+def deliver_chunk(messages, user_cache=None):
+    """
+    Deliver a claimed chunk of scheduled messages: one insert_many into
+    messages, one bulk_write of outcomes and at most one $in query for the
+    users to notify. Returns the number of messages delivered.
+
+    The unread counters, versions and emails of a message are handled after
+    its insert and before its outcome is recorded, and the delivered copy
+    notes when they are done. A worker that reclaims a message finds the
+    copy and completes whatever the previous owner left unfinished.
+    """
+    now = datetime.utcnow()
+    outcomes = []
+    documents = []
+    for message in messages:
+        if message.get("attempts", 0) > MAX_ATTEMPTS:
+            # Every attempt ended without recording an outcome
+            DEAD.inc()
+            logger.error(
+                f"Giving up on scheduled message {message['_id']} "
+                f"after {MAX_ATTEMPTS} unfinished attempt(s)"
+            )
+            outcomes.append(
+                finish_message(
+                    message,
+                    {
+                        "status": "dead",
+                        "dead_at": now,
+                        "attempts": MAX_ATTEMPTS,
+                        "last_error": message.get("last_error")
+                        or "No outcome recorded before the lease expired",
+                    },
+                )
+            )
+            continue
+        try:
+            documents.append((message, delivered_message(message, now)))
         except Exception as e:
-            logger.error(f"Error sending scheduled message {message['_id']}: {str(e)}")
-            # Mark the message as failed
-            db.scheduled_messages.update_one(
-                {"_id": message["_id"]}, {"$set": {"status": "failed", "error": str(e)}}
+            # A malformed message fails the same way every time
+            outcomes.append(failed_attempt(message, e, now, retry=False))
+    if not documents:
+        record_outcomes(outcomes)
+        return 0
+
+    try:
+        errors = insert_messages([document for _, document in documents])
+    except PyMongoError as e:
+        # Nothing is known about what was written; the retry's insert is
+        # sorted out by the unique scheduled_from index
+        logger.error(f"Error inserting scheduled messages: {str(e)}")
+        outcomes += [failed_attempt(message, e, now) for message, _ in documents]
+        record_outcomes(outcomes)
+        return 0
+
+    delivered = []
+    duplicates = []
+    for position, (message, _) in enumerate(documents):
+        if position not in errors:
+            delivered.append(message)
+        elif errors[position] is None:
+            duplicates.append(message)
+        else:
+            outcomes.append(failed_attempt(message, errors[position], now))
+
+    if duplicates:
+        unfinished = unfinished_deliveries(duplicates)
+        for message in duplicates:
+            if str(message["_id"]) in unfinished:
+                logger.info(f"Finishing delivery of scheduled message {message['_id']}")
+                delivered.append(message)
+            else:
+                logger.info(f"Scheduled message {message['_id']} was already sent")
+                outcomes.append(
+                    finish_message(message, {"status": "sent", "sent_at": now})
+                )
+
+    if delivered:
+        with MONGO_SECONDS.labels(operation="bump_counters").time():
+            bump_unread_counts(
+                db, Counter(message["receiver_id"] for message in delivered)
+            )
+            participants = set()
+            for message in delivered:
+                participants.update([message["sender_id"], message["receiver_id"]])
+            bump_versions(db, participants, MESSAGES)
+        notify_receivers(delivered, user_cache)
+        finish_side_effects(delivered)
+        outcomes += [
+            finish_message(message, {"status": "sent", "sent_at": now})
+            for message in delivered
+        ]
+
+    # Update the scheduled messages' status in one round trip
+    record_outcomes(outcomes)
+
+    for message in delivered:
+        SENT.inc()
+        DISPATCH_LAG.observe((now - message["scheduled_time"]).total_seconds())
+        logger.info(f"Sent scheduled message {message['_id']}")
+    return len(delivered)
+
+
+def process_scheduled_messages(now=None):
+    """
+    Check for and process scheduled messages that are due to be sent.
+
+    now, the start of the pass by default, is only the due cutoff; each
+    chunk is claimed and delivered with the time it is handled.
+    """
+    current_time = now or datetime.utcnow()
+    logger.info(f"Checking for scheduled messages to send at {current_time}")
+
+    with PASS_DURATION.time():
+        with MONGO_SECONDS.labels(operation="count_backlog").time():
+            BACKLOG.set(
+                db.scheduled_messages.count_documents(
+                    {"status": "pending", "scheduled_time": {"$lte": current_time}}
+                )
             )
 
+        count = 0
+        # Users read during this pass; couples with many due messages are read once
+        user_cache = {}
+        after = None
+        while True:
+            # Claim due messages a chunk at a time, so several workers can share them
+            with MONGO_SECONDS.labels(operation="find_due").time():
+                ids, after = find_due(current_time, CHUNK_SIZE, after)
+            if not ids:
+                break
+            messages = claim_due_messages(current_time, ids)
+            if messages:
+                count += deliver_chunk(messages, user_cache)
+
     logger.info(f"Processed {count} scheduled messages")
+    return count
+
+
+def seconds_until_due(now=None):
+    """
+    Seconds until the earliest pending scheduled message or retry is due: 0
+    when one is due already, MAX_IDLE_SECONDS at most
+    """
+    now = now or datetime.utcnow()
+    due_times = []
+    with MONGO_SECONDS.labels(operation="next_due").time():
+        for status, field in [
+            ("pending", "scheduled_time"),
+            ("retrying", "next_attempt_at"),
+        ]:
+            message = db.scheduled_messages.find_one(
+                {"status": status}, {field: 1}, sort=[(field, 1)]
+            )
+            if message:
+                due_times.append(message[field])
+    if not due_times:
+        return MAX_IDLE_SECONDS
+    delay = (min(due_times) - now) / timedelta(seconds=1)
+    return min(max(delay, 0), MAX_IDLE_SECONDS)
 
 
 def run_worker():
@@ -110,6 +559,12 @@ def run_worker():
     Run the worker process in a loop
     """
     logger.info("Starting scheduled message worker")
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT, registry=METRICS)
+        logger.info(f"Serving metrics on port {METRICS_PORT}")
+    ensure_signal_collection(db, logger)
+    listener = ScheduleListener(db)
+    last_sweep = None
 
     while True:
         try:
@@ -117,8 +572,24 @@ def run_worker():
         except Exception as e:
             logger.error(f"Error in worker process: {str(e)}")
 
-        # Sleep for 60 seconds before the next check
-        time.sleep(60)
+        if last_sweep is None or time.monotonic() - last_sweep >= MAX_IDLE_SECONDS:
+            last_sweep = time.monotonic()
+            try:
+                expired = expire_batches(db)
+                if expired:
+                    logger.info(f"Archived {expired} expired quiz batches")
+            except Exception as e:
+                logger.error(f"Error expiring quiz batches: {str(e)}")
+
+        # Sleep until the next message is due, waking early when a message
+        # is scheduled in the meantime
+        try:
+            delay = seconds_until_due()
+        except Exception as e:
+            logger.error(f"Error reading the schedule: {str(e)}")
+            delay = MAX_IDLE_SECONDS
+        if delay > 0:
+            listener.wait(delay)
 
 
 if __name__ == "__main__":
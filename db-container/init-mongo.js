@@ -19,15 +19,33 @@ coreCols.forEach(col => {
     }
 });
 
+// Capped collection the API signals scheduled messages on; the message
+// worker tails it (api-container/app/schedule_signals.py)
+if (!db.getCollectionNames().includes('schedule_signals')) {
+    db.createCollection('schedule_signals', { capped: true, size: 1048576 });
+    db.schedule_signals.insertOne({ created_at: new Date() });
+}
+
 // --- Indexes ---
+// The API declares the full set in api-container/app/indexes.py and applies
+// it at startup; keep these in sync with that module.
 db.users.createIndex({ email: 1 }, { unique: true });
-db.events.createIndex({ user_id: 1 });
-db.events.createIndex({ start_time: 1 });
-db.messages.createIndex({ sender_id: 1 });
-db.messages.createIndex({ receiver_id: 1 });
-db.scheduled_messages.createIndex({ scheduled_time: 1 });
-db.scheduled_messages.createIndex({ sender_id: 1 });
-db.daily_question.createIndex({ date: 1 }, { unique: true });
+db.events.createIndex({ user_id: 1, start_time: 1 });
+db.messages.createIndex({ participants: 1, created_at: -1, _id: -1 });
+db.messages.createIndex({ conversation: 1, content: "text" }, { default_language: "none" });
+db.messages.createIndex({ scheduled_from: 1 }, { unique: true, partialFilterExpression: { scheduled_from: { $exists: true } } });
+db.messages.createIndex({ receiver_id: 1, created_at: 1 }, { partialFilterExpression: { is_read: false } });
+db.message_buckets.createIndex({ participants: 1, end: -1 });
+db.message_buckets.createIndex({ participants: 1, start: 1 });
+db.message_buckets.createIndex({ conversation: 1, month: 1 });
+db.message_buckets.createIndex({ conversation: 1, "messages.content": "text" }, { default_language: "none" });
+db.scheduled_messages.createIndex({ status: 1, scheduled_time: 1, _id: 1 }, { partialFilterExpression: { status: "pending" } });
+db.scheduled_messages.createIndex({ status: 1, next_attempt_at: 1 }, { partialFilterExpression: { status: "retrying" } });
+db.scheduled_messages.createIndex({ status: 1, lease_expires_at: 1 }, { partialFilterExpression: { status: "processing" } });
+db.scheduled_messages.createIndex({ sender_id: 1, status: 1, scheduled_time: 1 });
+db.email_outbox.createIndex({ status: 1, next_attempt_at: 1 });
+db.email_outbox.createIndex({ purge_at: 1 }, { expireAfterSeconds: 0 });
+db.daily_questions.createIndex({ date: 1 }, { unique: true });
 
 try {
     db.users.insertOne({
@@ -2,6 +2,8 @@ from flask import Flask, render_template, request, redirect, url_for, session, f
 import requests
 import os
 import json
+import threading
+from collections import OrderedDict
 from datetime import datetime
 import random
 
@@ -11,9 +13,47 @@ app.secret_key = os.environ.get("SECRET_KEY", "dev-web-secret-key")
 # API URL from environment variable1111
 API_URL = os.environ.get("API_URL", "http://api:5001/api")
 
+# Read timeout for proxied quiz calls; must outlast the API's long-poll window
+QUIZ_PROXY_TIMEOUT = float(os.environ.get("QUIZ_PROXY_TIMEOUT", "35"))
+
+# Messages shown on the dashboard card and per page on the messages view
+DASHBOARD_MESSAGE_LIMIT = 5
+MESSAGE_PAGE_SIZE = 50
+
+
+# Most recent GET responses that carried an ETag, keyed by (token, endpoint,
+# params). The token identifies the login session, so each session only ever
+# revalidates its own bodies; the API answers 304 while they are current.
+RESPONSE_CACHE_SIZE = 256
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+def cached_response(key):
+    with _response_cache_lock:
+        response = _response_cache.get(key)
+        if response is not None:
+            _response_cache.move_to_end(key)
+        return response
+
+
+def store_response(key, response):
+    with _response_cache_lock:
+        _response_cache[key] = response
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+def forget_responses(token):
+    """Drop every cached response of a session, e.g. on logout"""
+    with _response_cache_lock:
+        for key in [key for key in _response_cache if key[0] == token]:
+            del _response_cache[key]
+
 
 # Helper function to make API requests
-def api_request(endpoint, method="GET", data=None, token=None):
+def api_request(endpoint, method="GET", data=None, token=None, params=None):
     url = f"{API_URL}/{endpoint}"
     headers = {}
 
@@ -21,7 +61,17 @@ def api_request(endpoint, method="GET", data=None, token=None):
         headers["Authorization"] = f"Bearer {token}"
 
     if method == "GET":
-        response = requests.get(url, headers=headers)
+        key = (token, endpoint, tuple(sorted((params or {}).items())))
+        cached = cached_response(key) if token else None
+        if cached is not None:
+            headers["If-None-Match"] = cached.headers["ETag"]
+
+        response = requests.get(url, headers=headers, params=params)
+
+        if response.status_code == 304 and cached is not None:
+            return cached
+        if token and response.status_code == 200 and "ETag" in response.headers:
+            store_response(key, response)
     elif method == "POST":
         headers["Content-Type"] = "application/json"
         response = requests.post(url, headers=headers, data=json.dumps(data))
@@ -68,6 +118,7 @@ def login():
 # Route for logout
 @app.route("/logout")
 def logout():
+    forget_responses(session.get("token"))
     session.pop("token", None)
     session.pop("user", None)
     return redirect(url_for("login"))
@@ -160,9 +211,13 @@ def dashboard():
     except Exception as e:
         flash(f"Error fetching events: {str(e)}", "error")
 
-    # Fetch messages
+    # Fetch the most recent messages
     try:
-        response = api_request("messages/messages", token=session["token"])
+        response = api_request(
+            "messages/messages",
+            token=session["token"],
+            params={"limit": DASHBOARD_MESSAGE_LIMIT},
+        )
         if response.status_code == 200:
             messages = response.json().get("messages", [])
     except Exception as e:
@@ -289,6 +344,7 @@ def messages():
         return redirect(url_for("login"))
 
     messages_list = []
+    next_cursor = None
     user = session.get("user", {})
     partner_id = None
     partner_name = None
@@ -304,23 +360,72 @@ def messages():
     except Exception as e:
         flash(f"Error fetching partner info: {str(e)}", "error")
 
-    # Then get messages
+    # Then get the newest page of messages; older pages load on demand
     try:
-        response = api_request("messages/messages", token=session["token"])
+        response = api_request(
+            "messages/messages",
+            token=session["token"],
+            params={"limit": MESSAGE_PAGE_SIZE},
+        )
         if response.status_code == 200:
-            messages_list = response.json().get("messages", [])
+            data = response.json()
+            messages_list = data.get("messages", [])
+            if data.get("has_more"):
+                next_cursor = data.get("next_cursor")
+            # Everything up to the newest message shown has now been seen
+            if data.get("prev_cursor"):
+                api_request(
+                    "messages/mark-read",
+                    method="POST",
+                    data={"up_to": data["prev_cursor"]},
+                    token=session["token"],
+                )
     except Exception as e:
         flash(f"Error fetching messages: {str(e)}", "error")
 
     return render_template(
         "messages.html",
         messages=messages_list,
+        next_cursor=next_cursor,
         user=user,
         partner_id=partner_id,
         partner_name=partner_name,
     )
 
 
+# Route for loading older messages on the messages page
+@app.route("/messages/older")
+def older_messages():
+    if "token" not in session:
+        return {"error": "Not authorized"}, 401
+
+    try:
+        response = api_request(
+            "messages/messages",
+            token=session["token"],
+            params={
+                "before": request.args.get("before", ""),
+                "limit": MESSAGE_PAGE_SIZE,
+            },
+        )
+        return response.json(), response.status_code
+    except Exception as e:
+        return {"error": f"Error fetching messages: {str(e)}"}, 500
+
+
+# Route for the unread badge in the navigation bar
+@app.route("/messages/unread-count")
+def unread_count():
+    if "token" not in session:
+        return {"error": "Not authorized"}, 401
+
+    try:
+        response = api_request("messages/unread-count", token=session["token"])
+        return response.json(), response.status_code
+    except Exception as e:
+        return {"error": f"Error fetching unread count: {str(e)}"}, 500
+
+
 # Route for sending messeges
 @app.route("/messages/send", methods=["POST"])
 def send_message():
@@ -682,10 +787,15 @@ def quiz_api_proxy(subpath):
     try:
         if request.method == "GET":
             params = request.args.to_dict()
-            response = requests.get(url, headers=headers, params=params)
+            response = requests.get(
+                url, headers=headers, params=params, timeout=QUIZ_PROXY_TIMEOUT
+            )
         else:
             response = requests.post(
-                url, headers=headers, data=request.data if request.data else None
+                url,
+                headers=headers,
+                data=request.data if request.data else None,
+                timeout=QUIZ_PROXY_TIMEOUT,
             )
 
         # Return the API response
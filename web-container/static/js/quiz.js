@@ -24,7 +24,7 @@ document.addEventListener('DOMContentLoaded', function() {
     let currentBatchId = null;
     let batchSize = 5;
     let batchProgress = 0;
-    let pollInterval = null;
+    let pollGeneration = 0;
 
     // Function to update all score displays
     function updateScoreDisplays(score, matchPercent) {
@@ -369,68 +369,91 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    //polling for partner response
+    // Wait for the partner's answer using long-poll requests. Each request is
+    // held open by the API until the partner answers or the wait times out.
     function startPolling() {
-        // Clear any existing interval
-        if (pollInterval) {
-            clearInterval(pollInterval);
-        }
+        // Cancel any wait that is already running
+        stopPolling();
+
+        const waitId = ++pollGeneration;
+        const questionId = currentQ.id;
+
+        async function waitForPartner() {
+            let failures = 0;
+
+            while (waitId === pollGeneration) {
+                let responseData = null;
+                try {
+                    responseData = await fetchAPI(`wait-partner-response?question_id=${questionId}`);
+                    failures = 0;
+                } catch (e) {
+                    console.error('Error waiting for partner response:', e);
+                    failures++;
+                    // Back off before retrying so a failing API is not hammered
+                    await new Promise(resolve => setTimeout(resolve, Math.min(30000, 1000 * 2 ** failures)));
+                    continue;
+                }
 
-        // Poll every 3 seconds
-        pollInterval = setInterval(async() => {
-            try {
-                // Check if partner has answered the current question
-                const responseData = await fetchAPI(`check-partner-response?question_id=${currentQ.id}`).catch(() => null);
+                // A newer wait (or a cancel) superseded this one
+                if (waitId !== pollGeneration) return;
 
-                // If we get a valid response and partner has answered
                 if (responseData && responseData.has_answered) {
-                    clearInterval(pollInterval);
-
-                    // Update UI to show match/no match result
-                    const resDiv = document.createElement('div');
-                    resDiv.className = `answer-result ${responseData.is_match ? 'match' : 'no-match'}`;
-                    resDiv.textContent = responseData.is_match ?
-                        `Match! +${responseData.delta}` :
-                        `No match: ${responseData.delta}`;
-
-                    // Replace the waiting message
-                    const existingResult = document.querySelector('.answer-result');
-                    if (existingResult) {
-                        existingResult.replaceWith(resDiv);
-                    } else {
-                        opts.appendChild(resDiv);
-                    }
-
-                    // Hide waiting indicator
-                    waitingIndicator.style.display = 'none';
-
-                    // Update score
-                    if (responseData.new_score !== null && responseData.new_score !== undefined) {
-                        const matchPercent = Math.round((matches / answered) * 100);
-                        updateScoreDisplays(responseData.new_score, matchPercent);
-                    }
-
-                    // Update stats
-                    if (responseData.is_match) {
-                        matches++;
-                        statMatches.textContent = matches;
-                        const matchPercent = Math.round((matches / answered) * 100);
-                        updateScoreDisplays(null, matchPercent);
-                    }
-
-                    // Check if batch is complete
-                    if (responseData.batch_complete) {
-                        setTimeout(() => showBatchComplete(), 1500);
-                    } else {
-                        // Show next button
-                        nextBtn.textContent = 'Next Question';
-                        nextBtn.style.display = 'inline-block';
-                    }
+                    pollGeneration++;
+                    showPartnerResult(responseData);
+                    return;
                 }
-            } catch (e) {
-                console.error('Error polling for partner response:', e);
             }
-        }, 3000);
+        }
+
+        waitForPartner();
+    }
+
+    function stopPolling() {
+        pollGeneration++;
+    }
+
+    // Show the match result once the partner has answered
+    function showPartnerResult(responseData) {
+        // Update UI to show match/no match result
+        const resDiv = document.createElement('div');
+        resDiv.className = `answer-result ${responseData.is_match ? 'match' : 'no-match'}`;
+        resDiv.textContent = responseData.is_match ?
+            `Match! +${responseData.delta}` :
+            `No match: ${responseData.delta}`;
+
+        // Replace the waiting message
+        const existingResult = document.querySelector('.answer-result');
+        if (existingResult) {
+            existingResult.replaceWith(resDiv);
+        } else {
+            opts.appendChild(resDiv);
+        }
+
+        // Hide waiting indicator
+        waitingIndicator.style.display = 'none';
+
+        // Update score
+        if (responseData.new_score !== null && responseData.new_score !== undefined) {
+            const matchPercent = Math.round((matches / answered) * 100);
+            updateScoreDisplays(responseData.new_score, matchPercent);
+        }
+
+        // Update stats
+        if (responseData.is_match) {
+            matches++;
+            statMatches.textContent = matches;
+            const matchPercent = Math.round((matches / answered) * 100);
+            updateScoreDisplays(null, matchPercent);
+        }
+
+        // Check if batch is complete
+        if (responseData.batch_complete) {
+            setTimeout(() => showBatchComplete(), 1500);
+        } else {
+            // Show next button
+            nextBtn.textContent = 'Next Question';
+            nextBtn.style.display = 'inline-block';
+        }
     }
 
     // Create a new batch
@@ -507,11 +530,8 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     function showBatchComplete() {
-        // Clear polling if active
-        if (pollInterval) {
-            clearInterval(pollInterval);
-            pollInterval = null;
-        }
+        // Stop waiting for the partner if a wait is active
+        stopPolling();
 
         // Hide question elements
         opts.innerHTML = '';
@@ -20,6 +20,20 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     });
 
+    // Show the unread message count next to the Messages link
+    const unreadBadge = document.getElementById('unread-badge');
+    if (unreadBadge) {
+        fetch('/messages/unread-count')
+            .then(response => response.ok ? response.json() : null)
+            .then(data => {
+                if (data && data.unread > 0) {
+                    unreadBadge.textContent = data.unread > 99 ? '99+' : data.unread;
+                    unreadBadge.hidden = false;
+                }
+            })
+            .catch(() => {});
+    }
+
     // Convert all UTC times to user's local time
     const utcElements = document.querySelectorAll('.utc-time');
     utcElements.forEach(span => {
@@ -36,6 +36,46 @@ def mock_api_response():
     return mock_response
 
 
+# Stand-in for a requests response from the API
+def api_response(status_code, body=None, etag=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = body
+    response.headers = {"ETag": etag} if etag else {}
+    return response
+
+
+def test_api_request_revalidates_cached_body():
+    from app import api_request, forget_responses
+
+    forget_responses("etag-token")
+    with patch("app.requests.get") as mock_get:
+        mock_get.return_value = api_response(200, {"events": ["a"]}, etag='"v1"')
+        first = api_request("calendar/events", token="etag-token")
+        assert "If-None-Match" not in mock_get.call_args[1]["headers"]
+
+        # Unchanged: the API answers 304 and the cached body is reused
+        mock_get.return_value = api_response(304)
+        second = api_request("calendar/events", token="etag-token")
+        assert mock_get.call_args[1]["headers"]["If-None-Match"] == '"v1"'
+        assert second is first
+        assert second.json() == {"events": ["a"]}
+
+        # Other parameters are cached separately
+        mock_get.return_value = api_response(200, {"messages": []})
+        api_request("calendar/events", token="etag-token", params={"limit": 5})
+        assert "If-None-Match" not in mock_get.call_args[1]["headers"]
+
+        # Changed: the new body replaces the cached one
+        mock_get.return_value = api_response(200, {"events": ["b"]}, etag='"v2"')
+        third = api_request("calendar/events", token="etag-token")
+        assert third.json() == {"events": ["b"]}
+
+        forget_responses("etag-token")
+        api_request("calendar/events", token="etag-token")
+        assert "If-None-Match" not in mock_get.call_args[1]["headers"]
+
+
 # Helper function to simulate login
 def login(client, email="test@example.com", password="password123"):
     mock_user = {
@@ -372,6 +412,92 @@ def test_messages_page(client):
         assert b"Hi there!" in response.data
 
 
+def test_messages_page_requests_first_page(client):
+    login(client)
+
+    with patch("app.api_request") as mock_api:
+        mock_api.return_value.status_code = 200
+        mock_api.return_value.json.return_value = {
+            "messages": [{"content": "Newest", "created_at": "2025-04-25T12:05:00"}],
+            "has_more": True,
+            "next_cursor": "older-page",
+        }
+
+        response = client.get("/messages")
+
+        assert response.status_code == 200
+        assert b'data-cursor="older-page"' in response.data
+        messages_call = [
+            c for c in mock_api.call_args_list if c[0][0] == "messages/messages"
+        ][0]
+        assert messages_call[1]["params"] == {"limit": 50}
+
+
+def test_older_messages(client):
+    login(client)
+
+    with patch("app.api_request") as mock_api:
+        mock_api.return_value.status_code = 200
+        mock_api.return_value.json.return_value = {
+            "messages": [{"content": "Old", "created_at": "2025-04-20T12:00:00"}],
+            "has_more": False,
+            "next_cursor": None,
+        }
+
+        response = client.get("/messages/older?before=abc")
+
+        assert response.status_code == 200
+        assert response.get_json()["messages"][0]["content"] == "Old"
+        assert mock_api.call_args[1]["params"] == {"before": "abc", "limit": 50}
+
+
+def test_older_messages_requires_login(client):
+    response = client.get("/messages/older?before=abc")
+    assert response.status_code == 401
+
+
+def test_messages_page_marks_messages_read(client):
+    login(client)
+
+    with patch("app.api_request") as mock_api:
+        mock_api.return_value.status_code = 200
+        mock_api.return_value.json.return_value = {
+            "messages": [{"content": "Newest", "created_at": "2025-04-25T12:05:00"}],
+            "has_more": False,
+            "next_cursor": "newest",
+            "prev_cursor": "newest",
+        }
+
+        response = client.get("/messages")
+
+        assert response.status_code == 200
+        mock_api.assert_any_call(
+            "messages/mark-read",
+            method="POST",
+            data={"up_to": "newest"},
+            token="test_token",
+        )
+
+
+def test_unread_count(client):
+    login(client)
+
+    with patch("app.api_request") as mock_api:
+        mock_api.return_value.status_code = 200
+        mock_api.return_value.json.return_value = {"unread": 3}
+
+        response = client.get("/messages/unread-count")
+
+        assert response.status_code == 200
+        assert response.get_json() == {"unread": 3}
+        mock_api.assert_called_once_with("messages/unread-count", token="test_token")
+
+
+def test_unread_count_requires_login(client):
+    response = client.get("/messages/unread-count")
+    assert response.status_code == 401
+
+
 def test_send_message(client):
     login(client)
 
@@ -641,6 +767,24 @@ def test_quiz_api_proxy_post(client):
         assert b'"score": 85' in response.data
 
 
+def test_quiz_api_proxy_long_poll_timeout(client):
+    login(client)
+
+    with patch("app.requests.get") as mock_get:
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps({"has_answered": False}).encode()
+        mock_response.headers = {"Content-Type": "application/json"}
+        mock_get.return_value = mock_response
+
+        response = client.get("/api/quiz/wait-partner-response?question_id=3")
+
+        assert response.status_code == 200
+        # The proxy must wait longer than the API holds the long-poll open
+        assert mock_get.call_args[1]["timeout"] > 25
+        assert mock_get.call_args[1]["params"] == {"question_id": "3"}
+
+
 def test_quiz_api_proxy_unauthorized(client):
     response = client.get("/api/quiz/questions")
 